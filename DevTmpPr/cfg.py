@@ -8,8 +8,10 @@ from app_cons import GRAVITY_ACCELERATION_ABS
 from math import pi
 from nn_iface.projects import MSE_RLLoss, MSELoss, LossActorInterface, LossCriticInterface
 from states.i_states import IInitStates, IStatesStore
-from states.s_states import InitGenerator, DictStore
-from tools import Finish
+from states.s_states import InitGenerator
+from states.a_states import ArrayStore
+from tools_bt import FinishBatch
+from integrators import IIntegrator, SemiImplicitEuler, RK4, RK45
 from nn_iface.ifaces import ProjectInterface
 from nn_iface.if_state import InterfaceStorage
 from fl_store.store_en import EnvironmentStateStorage
@@ -89,11 +91,32 @@ VALIDATION_SET_LENGTH = None
 # Генератор начальных состояний.
 START_STATES: IInitStates = InitGenerator(TRANING_SET_LENGTH)
 
-# Объект-хранилище текущих испытаний
-STATES_STORE: IStatesStore = DictStore()
+# Объект-хранилище текущих испытаний. Пакетная физическая модель требует хранилища, которое хранит батч
+# целиком, вместе со служебными столбцами (IStatesStore.get_batch() / update_batch())
+STATES_STORE: IStatesStore = ArrayStore()
 
-# Условие окончания одного конкретного испытания.
-FINISH = Finish()
+# Условие окончания испытаний (проверяется для всего батча сразу).
+FINISH = FinishBatch()
+
+# Метод интегрирования уравнений движения на интервале между считываниями показаний датчиков:
+# SemiImplicitEuler() - один шаг Эйлера на интервал (по умолчанию), RK4() - один шаг Рунге-Кутты 4-го порядка,
+# RK45(tolerance) - Дорман-Принс с автоматическим выбором шага по допустимой локальной ошибке.
+# Методы повышают точность, но не укрупняют шаг: он не длиннее интервала считывания показаний датчиков.
+INTEGRATOR: IIntegrator = SemiImplicitEuler()
+
+# Перемотка баллистического полёта (все двигатели выключены) за один шаг: до смены интервала считывания показаний
+# датчиков или до касания поверхности.
+COAST_FAST_FORWARD: bool = True
+
+# Количество процессов, между которыми делятся испытания: у каждого процесса своё хранилище, и шаг своих испытаний
+# (интервал считывания, перемотка, интегрирование, окончание испытаний, подкрепления) он считает целиком.
+# 0 или 1 - расчёт в нити физической модели. Выигрыш зависит от размера батча и метода интегрирования:
+# при дешёвом шаге пересылка результатов между процессами может стоить дороже расчёта.
+PHYSICS_WORKERS: int = 0
+
+# Конвейерный режим: пока блок физической модели рассчитывает шаг, нейросеть обучается по предыдущим шагам.
+# Значение - на сколько шагов обучение может отставать от выбора действий. 0 - конвейерный режим выключен.
+PIPELINE_LAG: int = 0
 
 # PROJECT_MAIN_CLASS_NAME: str = 'ProjectMainClass'
 
@@ -13,4 +13,29 @@ PROJECT_CONFIG_NAME = PROJECT_CONFIG_FILE[1:-3]
 # Промежуточное сохранения состояний каждые ... батчей
 BATCH_PER_SAVING: int = 1
 # Промежуточное сохранение состояний каждые ... эпох
-EPOCH_PER_SAVING: int = 1
\ No newline at end of file
+EPOCH_PER_SAVING: int = 1
+
+# Транспорт каналов передачи данных между блоками приложения:
+# 'queue' - очереди внутри одного процесса, 'tcp' - соединения TCP, 'unix' - сокеты Unix,
+# 'shm' - кольцевые буферы в разделяемой памяти (блоки приложения в процессах одного узла).
+WIRE_TRANSPORT: str = 'queue'
+# Узел и первый порт каналов транспорта 'tcp'. Каждый канал слушает свой порт, по порядку создания в main.wires()
+WIRE_HOST: str = '127.0.0.1'
+WIRE_PORT: int = 50100
+# Каталог файлов сокетов транспорта 'unix'.
+WIRE_SOCKET_DIR: str = '/tmp/landing'
+# Количество ячеек буфера канала транспорта 'shm'. Ёмкость канала, если она больше, ограничивается этим значением.
+WIRE_SHM_SLOTS: int = 16
+# Размер ячейки буфера канала транспорта 'shm': наибольший размер закодированного контейнера, байт.
+WIRE_SHM_SLOT_SIZE: int = 1 << 20
+# Ограничение очереди состояний, ожидающих отображения в блоке визуализации (кроме событий начала и окончания
+# испытаний). В очереди ожидает только последнее состояние каждого испытания. 0 - без дополнительного ограничения.
+VIEW_WIRE_WINDOW: int = 0
+# Ёмкость канала состояний в блок визуализации. Ограничивает очередь событий начала и окончания испытаний,
+# если визуализация отстала: тогда вытесняются испытания, начало которых визуализация ещё не получила.
+# Блок физической модели визуализацию не ждёт.
+VIEW_WIRE_CAPACITY: int = 4096
+# Сбор статистики каналов передачи данных: частота сообщений, глубина очередей, время ожидания в очереди
+# и время ожидания отправителя и получателя. Статистика выводится в лог по завершении приложения, а также
+# по сигналу SIGUSR1 (kill -USR1 <pid>).
+WIRE_METRICS: bool = False
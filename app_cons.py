@@ -11,6 +11,9 @@ START_TESTID_FOR_VIEW: TestId = 0
 
 # Время сна, сек.
 SLEEP_TIME: float = 0.001
+# Максимальное время ожидания данных в канале, сек. Ожидание прерывается сразу по поступлении данных
+# или команды на завершение приложения, по истечении - повторная проверка условий ожидания.
+WAIT_TIME: float = 1.
 COROUTINE_SLEEP_TIME: float = 0.001
 
 GRAVITY_ACCELERATION_ABS = 9.8067
@@ -1,6 +1,6 @@
 """ Классы и типы уровня приложения. """
 from typing import Dict, Optional, Any
-from torch import dtype, float32, int64
+from torch import dtype, float32, float64, int64
 
 # Тип словаря хранилища состояния окружающей среды
 EnvDictType = Dict[str, Optional[Any]]
@@ -16,6 +16,8 @@ Bit = int
 
 TENSOR_DTYPE: dtype = float32
 TENSOR_INDEX_DTYPE: dtype = int64
+# Тип элементов тензоров пакетной физической модели (точность расчёта движения важнее скорости)
+PHYSICS_DTYPE: dtype = float64
 
 # Оценка функции ценности
 Q_est_value = ZeroOne
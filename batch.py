@@ -0,0 +1,191 @@
+""" Пакетное представление состояний изделия: все испытания батча в одной матрице (struct-of-arrays). """
+from typing import List, Dict, Iterable, Iterator, Mapping, Optional
+from torch import Tensor, tensor, empty
+from app_type import TestId, PHYSICS_DTYPE
+from point import VectorComplex
+from structures import RealWorldStageStatusN, StageControlCommands
+
+# Строка матрицы состояний - одно испытание, столбец - одна величина состояния.
+# Номера столбцов матрицы состояний.
+# Положение центра масс изделия в СКИП
+POS_X, POS_Y = 0, 1
+# Линейная скорость
+VEL_X, VEL_Y = 2, 3
+# Линейное ускорение
+ACC_X, ACC_Y = 4, 5
+# Ориентация (единичный вектор продольной оси изделия)
+ORI_X, ORI_Y = 6, 7
+# Угловая скорость
+ANG_VEL = 8
+# Угловое ускорение
+ANG_ACC = 9
+# Метка времени, миллисекунды
+TIME_STAMP = 10
+
+# Количество столбцов физического состояния изделия (величины объекта RealWorldStageStatusN).
+PHYSICS_WIDTH = 11
+
+# Служебные столбцы. Состояние планировщика интервалов считывания показаний датчиков (гистерезис для каждого испытания).
+# Текущий интервал между считываниями показаний, миллисекунды
+FREQUENCY = 11
+# Длительность (счётчик) нахождения в верхнем диапазоне после перехода с нижнего
+BORDER_COUNTER = 12
+# Состояние расчёта подкрепления. Наименьшее расстояние до точки посадки, достигнутое в испытании, метров
+MIN_DISTANCE = 13
+
+# Количество столбцов в матрице состояний.
+STATE_WIDTH = 14
+
+# Количество реактивных двигателей изделия (столбцов в матрице команд).
+JETS_WIDTH = 5
+
+
+class StatesBatch:
+    """ Батч состояний изделия. Строка матрицы *data* соответствует испытанию с идентификатором из *ids*
+    под тем же номером. Свойства-величины возвращают представления (views) матрицы, а не копии. """
+    def __init__(self, ids: List[TestId], data: Tensor):
+        """
+
+        :param ids: Идентификаторы испытаний в порядке строк матрицы.
+        :param data: Матрица состояний размером (len(ids), STATE_WIDTH)
+        """
+        assert data.dim() == 2 and data.size(dim=1) == STATE_WIDTH, \
+            "Batch data should be a matrix with {} columns. But now shape is {}".format(STATE_WIDTH, tuple(data.shape))
+        assert data.size(dim=0) == len(ids), \
+            "Rows count ({}) mismatch ids count ({})".format(data.size(dim=0), len(ids))
+
+        self.__ids: List[TestId] = ids
+        self.__data: Tensor = data
+
+    @classmethod
+    def empty(cls, ids: List[TestId]) -> 'StatesBatch':
+        """ Батч с неинициализированной матрицей состояний. """
+        return StatesBatch(ids, empty((len(ids), STATE_WIDTH), dtype=PHYSICS_DTYPE))
+
+    @classmethod
+    def from_states(cls, states: Dict[TestId, RealWorldStageStatusN]) -> 'StatesBatch':
+        """ Упаковать словарь состояний в батч (порядок строк - порядок ключей словаря).
+
+        :param states: Словарь состояний.
+        """
+        rows: List[List[float]] = []
+        for state in states.values():
+            rows.append([state.position.x, state.position.y,
+                         state.velocity.x, state.velocity.y,
+                         state.acceleration.x, state.acceleration.y,
+                         state.orientation.x, state.orientation.y,
+                         state.angular_velocity, state.angular_acceleration,
+                         state.time_stamp,
+                         # Служебные столбцы нового испытания: переход в реальный диапазон из "виртуального" верхнего,
+                         # к точке посадки ещё не приближались.
+                         float("inf"), 0., float("inf")])
+
+        data: Tensor = tensor(rows, dtype=PHYSICS_DTYPE) if len(rows) > 0 \
+            else empty((0, STATE_WIDTH), dtype=PHYSICS_DTYPE)
+
+        return StatesBatch(list(states.keys()), data)
+
+    def to_states(self) -> Dict[TestId, RealWorldStageStatusN]:
+        """ Распаковать батч в словарь объектов-состояний. """
+        result: Dict[TestId, RealWorldStageStatusN] = {}
+        for test_id, row in zip(self.__ids, self.__data.tolist()):
+            result[test_id] = row_to_state(row)
+        return result
+
+    def __len__(self) -> int:
+        return len(self.__ids)
+
+    @property
+    def ids(self) -> List[TestId]:
+        """ Идентификаторы испытаний в порядке строк матрицы. """
+        return self.__ids
+
+    @property
+    def data(self) -> Tensor:
+        """ Матрица состояний. """
+        return self.__data
+
+    @property
+    def position(self) -> Tensor:
+        return self.__data[:, POS_X:POS_Y + 1]
+
+    @property
+    def velocity(self) -> Tensor:
+        return self.__data[:, VEL_X:VEL_Y + 1]
+
+    @property
+    def acceleration(self) -> Tensor:
+        return self.__data[:, ACC_X:ACC_Y + 1]
+
+    @property
+    def orientation(self) -> Tensor:
+        return self.__data[:, ORI_X:ORI_Y + 1]
+
+    @property
+    def angular_velocity(self) -> Tensor:
+        return self.__data[:, ANG_VEL]
+
+    @property
+    def angular_acceleration(self) -> Tensor:
+        return self.__data[:, ANG_ACC]
+
+    @property
+    def time_stamp(self) -> Tensor:
+        return self.__data[:, TIME_STAMP]
+
+    @property
+    def service(self) -> Tensor:
+        """ Служебные столбцы (не входят в объект-состояние). """
+        return self.__data[:, PHYSICS_WIDTH:]
+
+
+class StatesView(Mapping):
+    """ Словарь состояний только для чтения поверх батча. Объект-состояние создаётся лишь при обращении к нему
+    по ключу, поэтому раздача батча целиком не требует создания объекта на каждое испытание. """
+    def __init__(self, states: StatesBatch):
+        self.__states: StatesBatch = states
+        # Номер строки матрицы по идентификатору испытания. Строится при первом обращении по ключу.
+        self.__index: Optional[Dict[TestId, int]] = None
+
+    def __getitem__(self, test_id: TestId) -> RealWorldStageStatusN:
+        if self.__index is None:
+            self.__index = {key: row for row, key in enumerate(self.__states.ids)}
+        return row_to_state(self.__states.data[self.__index[test_id]].tolist())
+
+    def __iter__(self) -> Iterator[TestId]:
+        return iter(self.__states.ids)
+
+    def __len__(self) -> int:
+        return len(self.__states)
+
+    @property
+    def batch(self) -> StatesBatch:
+        """ Батч, над которым построено представление. """
+        return self.__states
+
+
+def row_to_state(row: List[float]) -> RealWorldStageStatusN:
+    """ Объект-состояние из строки матрицы состояний.
+
+    :param row: Строка матрицы состояний в виде списка.
+    """
+    return RealWorldStageStatusN(position=VectorComplex.get_instance(row[POS_X], row[POS_Y]),
+                                 velocity=VectorComplex.get_instance(row[VEL_X], row[VEL_Y]),
+                                 acceleration=VectorComplex.get_instance(row[ACC_X], row[ACC_Y]),
+                                 orientation=VectorComplex.get_instance(row[ORI_X], row[ORI_Y]),
+                                 angular_velocity=row[ANG_VEL],
+                                 angular_acceleration=row[ANG_ACC],
+                                 time_stamp=int(row[TIME_STAMP]))
+
+
+def jets_tensor(commands: Iterable[StageControlCommands]) -> Tensor:
+    """ Матрица команд на двигатели. Порядок столбцов совпадает с порядком в *tools.action_variants()*:
+    верхний левый, верхний правый, нижний левый, нижний правый, маршевый.
+
+    :param commands: Команды на двигатели в порядке строк батча состояний.
+    :return: Матрица из 0 и 1 размером (N, JETS_WIDTH)
+    """
+    rows: List[List[float]] = [[command.top_left, command.top_right, command.down_left, command.down_right,
+                                command.main] for command in commands]
+
+    return tensor(rows, dtype=PHYSICS_DTYPE) if len(rows) > 0 else empty((0, JETS_WIDTH), dtype=PHYSICS_DTYPE)
@@ -2,6 +2,7 @@
 from abc import ABC, abstractmethod
 from enum import Enum
 from typing import Any, Tuple, Optional, overload, Dict, TypeVar, Type
+from threading import Event
 
 
 # Тип данных (уровня семантики Python), передаваемых между функциональными блоками приложения.
@@ -34,25 +35,16 @@ class AppModulesEnum(Enum):
 
 class DataTypeEnum(Enum):
     """ Константы, определяющие тип (тип, в смысле функционала приложения) передаваемых данных. """
-    # Количество оставшихся испытаний (и текущих, и в плане)
-    REMANING_TESTS = 0  # int
     # Состояние ступени
     STAGE_STATUS = 1    # RealWorldStageStatusN
-    # Команда на двигатели
-    JETS_COMMAND = 2    # ?
     # Приказ завершить приложение
     APP_FINISH = 3  # True
-    # Модуль запрашивает указанное количество тестов
-    REQUESTED_TESTS = 4     # int
-    # Подкрепление
-    REINFORCEMENT = 5
-    # Готов перейти к следующему батчу
-    # READY_FOR_NEXT_BATCH = 6 # True
-    ENV_ROAD = 6 # RoadEnum
     # Запрос на завершение приложения.
     APP_FINISH_REQUEST = 7
-    # Сохранить состояния процесса обучения.
-    ENV_SAVE = 8
+    # Запрос шага обучения: команды на двигатели батча и управляющие флаги (из БНС в БФМ)
+    STEP_REQUEST = 9    # StepRequestContainer
+    # Ответ на запрос шага: подкрепления, флаги завершения испытаний и следующий батч состояний (из БФМ в БНС)
+    STEP_RESPONSE = 10  # StepResponseContainer
 
 
 class RoadEnum(Enum):
@@ -73,6 +65,21 @@ class EnvSaveEnum(Enum):
     CONTINUE = 1
 
 
+class OverflowEnum(Enum):
+    """ Что делать отправителю, если канал передачи данных заполнен до предела своей ёмкости. """
+    # Ждать, пока получатель не освободит место.
+    BLOCK = 0
+    # Отбросить самые старые из ожидающих получения данных.
+    DROP_OLDEST = 1
+    # Отбросить отправляемые данные.
+    DROP_NEWEST = 2
+    # Исключение queue.Full у отправителя.
+    ERROR = 3
+    # Очередь канала сама отбрасывает ожидающие данные, которые получатель может пропустить (см.
+    # *wire.LatestValueQueue*), отправитель не ждёт никогда.
+    EVICT = 4
+
+
 class BioEnum(Enum):
     """ Статус состояния изделия. """
     INIT = -1   # Состояние инициализировано.
@@ -177,10 +184,27 @@ class ISender(ABC):
 class IReceiver(ABC):
     """ Интерфейс получателя данных """
     @abstractmethod
-    def receive(self) -> IContainer:
-        """ Получить ожидаемые данные.
+    def receive(self, timeout: Optional[float] = None) -> Optional[IContainer]:
+        """ Получить ожидаемые данные. Если данных в канале нет - ждать их появления.
+
+        :param timeout: Максимальное время ожидания данных, сек. None - ждать без ограничения.
+        :return: Контейнер с данными. None - если за время ожидания данные не появились.
+        """
+        pass
+
+    @abstractmethod
+    def subscribe(self, event: Event) -> None:
+        """ Подписать событие на поступление данных: событие устанавливается при каждой отправке в канал.
 
-        :return: Контейнер с данными.
+        :param event: Событие, которое ожидает получатель (например, сразу нескольких каналов).
+        """
+        pass
+
+    @abstractmethod
+    def unsubscribe(self, event: Event) -> None:
+        """ Отменить подписку события на поступление данных.
+
+        :param event: Событие, подписанное ранее.
         """
         pass
 
@@ -240,7 +264,15 @@ class IWire(ISender, IReceiver):
         pass
 
     @abstractmethod
-    def receive(self) -> IContainer:
+    def receive(self, timeout: Optional[float] = None) -> Optional[IContainer]:
+        pass
+
+    @abstractmethod
+    def subscribe(self, event: Event) -> None:
+        pass
+
+    @abstractmethod
+    def unsubscribe(self, event: Event) -> None:
         pass
 
     @abstractmethod
@@ -256,6 +288,19 @@ class IWire(ISender, IReceiver):
         pass
 
 
+class IReportWire(IWire):
+    """ Интерфейс двустороннего канала передачи данных: с линией рапорта в обратном направлении. """
+    @abstractmethod
+    def get_report_sender(self) -> ISender:
+        """ Получить интерфейс отправителя рапортов. """
+        pass
+
+    @abstractmethod
+    def get_report_receiver(self) -> IReceiver:
+        """ Получить интерфейс получателя рапортов. """
+        pass
+
+
 class ISocket(ABC):
     """ Специальный интерфейс (в общем смысле) взаимодействия абонента со средой передачи сообщений. """
     # Т. е., собственно, с экземпляром класса реализующего ISwitchboard
@@ -349,3 +394,12 @@ class ISwitchboard(ABC):
         :return: Кортеж ВСЕХ  исходящий линий данного отправителя.
         """
         pass
+
+    @abstractmethod
+    def get_version(self) -> int:
+        """ Версия состава каналов: меняется при каждом добавлении канала.
+        Позволяет пользователям щита кэшировать выборки каналов.
+
+        :return: Номер версии.
+        """
+        pass
@@ -0,0 +1,356 @@
+""" Компактное двоичное кодирование контейнеров для каналов передачи данных между процессами. """
+# Сообщение: байт вида контейнера, затем его дополнительные данные и груз.
+# Груз: байт вида груза, затем его значения в фиксированном формате (struct, порядок байт - '<').
+# Тензоры (матрицы батча, команды, подкрепления) пишутся как есть - массивами элементов; массивы float64 выровнены
+# по 8 байт от начала сообщения.
+from struct import Struct
+from enum import Enum
+from typing import List, Optional, Tuple, Type, Union
+import unittest
+from torch import Tensor, frombuffer, empty, int8, float64, bool as torch_bool, tensor, rand, equal
+from con_intr.ifaces import IContainer, BioEnum, RoadEnum, EnvSaveEnum
+from con_simp.contain import Container, BioContainer, EnumContainer, BatchContainer, StepRequestContainer, \
+    StepResponseContainer
+from batch import JETS_WIDTH
+from structures import RealWorldStageStatusN, StageStatusSnapshot, StageControlCommands, ReinforcementValue
+from point import VectorComplex
+from app_type import TestId
+
+# Вид контейнера.
+_CONTAINER, _BIO_CONTAINER, _ENUM_CONTAINER, _BATCH_CONTAINER, _STEP_REQUEST, _STEP_RESPONSE = range(6)
+# Вид груза.
+_NONE, _INT, _FLOAT, _BOOL, _COMMANDS, _REINFORCEMENT, _STATE, _SNAPSHOT, _ENUM = range(9)
+
+# Перечисления, которые могут передаваться в качестве груза. Номер в кортеже - код перечисления.
+ENUMS: Tuple[Type[Enum], ...] = (BioEnum, RoadEnum, EnvSaveEnum)
+
+_BYTE = Struct('<B')
+_INT64 = Struct('<q')
+_FLOAT64 = Struct('<d')
+_ENUM_VALUE = Struct('<Bq')
+# Команда на двигатели: отметка времени, длительность, пять флагов двигателей.
+_COMMANDS_FORMAT = Struct('<qq5?')
+# Подкрепление: отметка времени, величина.
+_REINFORCEMENT_FORMAT = Struct('<qd')
+# Состояние: четыре вектора, угловые скорость и ускорение, отметка времени.
+_STATE_FORMAT = Struct('<10dq')
+# Заголовок матрицы: количество строк и их ширина.
+_MATRIX_HEADER = Struct('<qq')
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def _encode_enum(value: Enum) -> bytes:
+    return _ENUM_VALUE.pack(ENUMS.index(type(value)), value.value)
+
+
+def _decode_enum(buffer: Buffer, offset: int) -> Tuple[Enum, int]:
+    code, value = _ENUM_VALUE.unpack_from(buffer, offset)
+    return ENUMS[code](value), offset + _ENUM_VALUE.size
+
+
+def _encode_cargo(cargo) -> bytes:
+    """ Кодирование груза контейнера. """
+    # bool проверяется раньше int: bool - подкласс int.
+    if cargo is None:
+        return _BYTE.pack(_NONE)
+    if isinstance(cargo, bool):
+        return _BYTE.pack(_BOOL) + _BYTE.pack(cargo)
+    if isinstance(cargo, int):
+        return _BYTE.pack(_INT) + _INT64.pack(cargo)
+    if isinstance(cargo, float):
+        return _BYTE.pack(_FLOAT) + _FLOAT64.pack(cargo)
+    if isinstance(cargo, Enum):
+        return _BYTE.pack(_ENUM) + _encode_enum(cargo)
+    if isinstance(cargo, StageControlCommands):
+        return _BYTE.pack(_COMMANDS) + _COMMANDS_FORMAT.pack(
+            int(cargo.time_stamp), int(cargo.duration), bool(cargo.top_left), bool(cargo.top_right),
+            bool(cargo.down_left), bool(cargo.down_right), bool(cargo.main))
+    if isinstance(cargo, ReinforcementValue):
+        return _BYTE.pack(_REINFORCEMENT) + _REINFORCEMENT_FORMAT.pack(int(cargo.time_stamp), cargo.reinforcement)
+    if isinstance(cargo, RealWorldStageStatusN):
+        kind: int = _SNAPSHOT if isinstance(cargo, StageStatusSnapshot) else _STATE
+        return _BYTE.pack(kind) + _STATE_FORMAT.pack(
+            cargo.position.x, cargo.position.y, cargo.velocity.x, cargo.velocity.y,
+            cargo.acceleration.x, cargo.acceleration.y, cargo.orientation.x, cargo.orientation.y,
+            cargo.angular_velocity, cargo.angular_acceleration, int(cargo.time_stamp))
+    raise TypeError("Cargo of class {} can't be encoded.".format(cargo.__class__))
+
+
+def _decode_cargo(buffer: Buffer, offset: int):
+    """ Декодирование груза контейнера.
+
+    :return: Груз и смещение первого байта за ним.
+    """
+    kind, = _BYTE.unpack_from(buffer, offset)
+    offset += _BYTE.size
+    if kind == _NONE:
+        return None, offset
+    if kind == _BOOL:
+        return bool(_BYTE.unpack_from(buffer, offset)[0]), offset + _BYTE.size
+    if kind == _INT:
+        return _INT64.unpack_from(buffer, offset)[0], offset + _INT64.size
+    if kind == _FLOAT:
+        return _FLOAT64.unpack_from(buffer, offset)[0], offset + _FLOAT64.size
+    if kind == _ENUM:
+        return _decode_enum(buffer, offset)
+    if kind == _COMMANDS:
+        values = _COMMANDS_FORMAT.unpack_from(buffer, offset)
+        return StageControlCommands(*values), offset + _COMMANDS_FORMAT.size
+    if kind == _REINFORCEMENT:
+        values = _REINFORCEMENT_FORMAT.unpack_from(buffer, offset)
+        return ReinforcementValue(*values), offset + _REINFORCEMENT_FORMAT.size
+    if kind in (_STATE, _SNAPSHOT):
+        v = _STATE_FORMAT.unpack_from(buffer, offset)
+        state = RealWorldStageStatusN(VectorComplex.get_instance(v[0], v[1]), VectorComplex.get_instance(v[2], v[3]),
+                                      VectorComplex.get_instance(v[4], v[5]), VectorComplex.get_instance(v[6], v[7]),
+                                      v[8], v[9], v[10])
+        return (state.snapshot() if kind == _SNAPSHOT else state), offset + _STATE_FORMAT.size
+    raise ValueError("Unknown cargo kind: {}".format(kind))
+
+
+def _tensor_bytes(values: Tensor) -> bytearray:
+    """ Байты элементов тензора в памяти (одно копирование, без поэлементного преобразования). """
+    values = values.contiguous().view(-1)
+    result: bytearray = bytearray(values.numel() * values.element_size())
+    if len(result) > 0:
+        frombuffer(result, dtype=values.dtype).copy_(values)
+    return result
+
+
+def _encode_ids(result: bytearray, ids: List[TestId]) -> None:
+    result += _INT64.pack(len(ids))
+    result += Struct('<{}q'.format(len(ids))).pack(*ids)
+
+
+def _decode_ids(buffer: Buffer, offset: int) -> Tuple[List[TestId], int]:
+    amount, = _INT64.unpack_from(buffer, offset)
+    offset += _INT64.size
+    return list(Struct('<{}q'.format(amount)).unpack_from(buffer, offset)), offset + amount * _INT64.size
+
+
+def _encode_tensor(result: bytearray, values: Tensor) -> None:
+    """ Дописать в сообщение элементы тензора. Массив float64 выравнивается по 8 байт от начала сообщения. """
+    if values.dtype == float64:
+        result += bytes(-len(result) % 8)
+    result += _tensor_bytes(values)
+
+
+def _decode_tensor(buffer: Buffer, offset: int, dtype, shape: Tuple[int, ...]) -> Tuple[Tensor, int]:
+    """ Тензор, скопированный из сообщения.
+
+    :return: Тензор и смещение первого байта за ним.
+    """
+    if dtype == float64:
+        offset += -offset % 8
+    count: int = 1
+    for size in shape:
+        count *= size
+    if count == 0:
+        return empty(shape, dtype=dtype), offset
+    values: Tensor = frombuffer(buffer, dtype=dtype, count=count, offset=offset).view(shape).clone()
+    return values, offset + count * values.element_size()
+
+
+def _encode_matrix(result: bytearray, values: Tensor) -> None:
+    result += _MATRIX_HEADER.pack(values.size(dim=0), values.size(dim=1))
+    _encode_tensor(result, values.to(float64))
+
+
+def _decode_matrix(buffer: Buffer, offset: int) -> Tuple[Tensor, int]:
+    rows, width = _MATRIX_HEADER.unpack_from(buffer, offset)
+    return _decode_tensor(buffer, offset + _MATRIX_HEADER.size, float64, (rows, width))
+
+
+def _encode_batch(result: bytearray, container: BatchContainer) -> None:
+    ids, bio = container.get()
+    _encode_ids(result, ids)
+    _encode_tensor(result, bio.to(int8))
+    _encode_matrix(result, container.unpack())
+
+
+def _decode_batch(buffer: Buffer, offset: int) -> Tuple[BatchContainer, int]:
+    ids, offset = _decode_ids(buffer, offset)
+    bio, offset = _decode_tensor(buffer, offset, int8, (len(ids),))
+    data, offset = _decode_matrix(buffer, offset)
+    return BatchContainer(ids, bio, data), offset
+
+
+def encode(container: IContainer) -> bytearray:
+    """ Кодирование контейнера в последовательность байт.
+
+    :param container: Контейнер с данными.
+    :return: Закодированное сообщение.
+    """
+    result: bytearray = bytearray()
+    if isinstance(container, BatchContainer):
+        result += _BYTE.pack(_BATCH_CONTAINER)
+        _encode_batch(result, container)
+    elif isinstance(container, StepRequestContainer):
+        ids, batch_size, road, save = container.get()
+        jets: Optional[Tensor] = container.unpack()
+        result += _BYTE.pack(_STEP_REQUEST)
+        result += _INT64.pack(batch_size)
+        result += _encode_enum(road)
+        result += _encode_enum(save)
+        _encode_ids(result, ids)
+        _encode_matrix(result, jets if jets is not None else empty((0, JETS_WIDTH), dtype=float64))
+    elif isinstance(container, StepResponseContainer):
+        tests_left, ids, rewards, done = container.get()
+        result += _BYTE.pack(_STEP_RESPONSE)
+        result += _INT64.pack(tests_left)
+        _encode_ids(result, ids)
+        _encode_tensor(result, rewards.to(float64) if rewards is not None else empty(0, dtype=float64))
+        _encode_tensor(result, done.to(torch_bool) if done is not None else empty(0, dtype=torch_bool))
+        batch: Optional[BatchContainer] = container.unpack()
+        result += _BYTE.pack(batch is not None)
+        if batch is not None:
+            _encode_batch(result, batch)
+    elif isinstance(container, BioContainer):
+        test_id, bio = container.get()
+        result += _BYTE.pack(_BIO_CONTAINER)
+        result += _INT64.pack(test_id)
+        result += _encode_enum(bio)
+        result += _encode_cargo(container.unpack())
+    elif isinstance(container, EnumContainer):
+        result += _BYTE.pack(_ENUM_CONTAINER)
+        result += _encode_enum(container.unpack())
+    elif isinstance(container, Container):
+        result += _BYTE.pack(_CONTAINER)
+        result += _INT64.pack(container.get())
+        result += _encode_cargo(container.unpack())
+    else:
+        raise TypeError("Container of class {} can't be encoded.".format(container.__class__))
+    return result
+
+
+def decode(buffer: Buffer) -> IContainer:
+    """ Декодирование контейнера. Результат не ссылается на *buffer*: буфер можно сразу использовать повторно.
+
+    :param buffer: Закодированное сообщение.
+    :return: Контейнер с данными.
+    """
+    kind, = _BYTE.unpack_from(buffer, 0)
+    offset: int = _BYTE.size
+    if kind == _BATCH_CONTAINER:
+        batch, _ = _decode_batch(buffer, offset)
+        return batch
+    if kind == _STEP_REQUEST:
+        batch_size, = _INT64.unpack_from(buffer, offset)
+        road, offset = _decode_enum(buffer, offset + _INT64.size)
+        save, offset = _decode_enum(buffer, offset)
+        ids, offset = _decode_ids(buffer, offset)
+        jets, _ = _decode_matrix(buffer, offset)
+        return StepRequestContainer(ids, jets, batch_size, road, save)
+    if kind == _STEP_RESPONSE:
+        tests_left, = _INT64.unpack_from(buffer, offset)
+        ids, offset = _decode_ids(buffer, offset + _INT64.size)
+        rewards, offset = _decode_tensor(buffer, offset, float64, (len(ids),))
+        done, offset = _decode_tensor(buffer, offset, torch_bool, (len(ids),))
+        has_batch, = _BYTE.unpack_from(buffer, offset)
+        batch: Optional[BatchContainer] = _decode_batch(buffer, offset + _BYTE.size)[0] if has_batch else None
+        return StepResponseContainer(tests_left, ids, rewards, done, batch)
+    if kind == _BIO_CONTAINER:
+        test_id, = _INT64.unpack_from(buffer, offset)
+        bio, offset = _decode_enum(buffer, offset + _INT64.size)
+        cargo, _ = _decode_cargo(buffer, offset)
+        return BioContainer(test_id, bio, cargo)
+    if kind == _ENUM_CONTAINER:
+        value, _ = _decode_enum(buffer, offset)
+        return EnumContainer(value)
+    if kind == _CONTAINER:
+        test_id, = _INT64.unpack_from(buffer, offset)
+        cargo, _ = _decode_cargo(buffer, offset + _INT64.size)
+        return Container(test_id, cargo)
+    raise ValueError("Unknown container kind: {}".format(kind))
+
+
+class CodecTest(unittest.TestCase):
+    @staticmethod
+    def state() -> RealWorldStageStatusN:
+        return RealWorldStageStatusN(VectorComplex.get_instance(1.5, 200.25), VectorComplex.get_instance(-3., -40.5),
+                                     VectorComplex.get_instance(0.125, -9.8), VectorComplex.get_instance(0.6, 0.8),
+                                     0.01, -0.002, 123456)
+
+    def assertStateEqual(self, expected: RealWorldStageStatusN, actual: RealWorldStageStatusN):
+        self.assertIs(type(expected), type(actual))
+        for name in ('position', 'velocity', 'acceleration', 'orientation'):
+            self.assertTrue(getattr(expected, name) == getattr(actual, name), name)
+        self.assertEqual((expected.angular_velocity, expected.angular_acceleration, expected.time_stamp),
+                         (actual.angular_velocity, actual.angular_acceleration, actual.time_stamp))
+
+    @staticmethod
+    def batch() -> BatchContainer:
+        return BatchContainer([5, 7, 11], tensor([-1, 0, 1], dtype=int8), rand(3, 14, dtype=float64))
+
+    def assertBatchEqual(self, expected: BatchContainer, actual: BatchContainer):
+        self.assertEqual(expected.get()[0], actual.get()[0])
+        self.assertTrue(equal(expected.get()[1], actual.get()[1]))
+        self.assertTrue(equal(expected.unpack(), actual.unpack()))
+
+    def test_cargo(self):
+        for cargo in (None, True, False, -(1 << 40), 2.5, BioEnum.FIN, RoadEnum.CONTINUE, EnvSaveEnum.CONTINUE):
+            decoded = decode(encode(Container(3, cargo))).unpack()
+            self.assertEqual(cargo, decoded)
+            self.assertIs(type(cargo), type(decoded))
+
+        commands = decode(encode(Container(3, StageControlCommands(100, 5, True, False, True, False, True)))).unpack()
+        self.assertEqual((100, 5, True, False, True, False, True),
+                         (commands.time_stamp, commands.duration, commands.top_left, commands.top_right,
+                          commands.down_left, commands.down_right, commands.main))
+
+        reinforcement = decode(encode(Container(3, ReinforcementValue(100, -0.5)))).unpack()
+        self.assertEqual((100, -0.5), reinforcement.get_reinforcement())
+
+        self.assertStateEqual(self.state(), decode(encode(Container(3, self.state()))).unpack())
+        self.assertStateEqual(self.state().snapshot(), decode(encode(Container(3, self.state().snapshot()))).unpack())
+
+    def test_containers(self):
+        container = decode(encode(Container(42, 1.25)))
+        self.assertIsInstance(container, Container)
+        self.assertEqual((42, 1.25), (container.get(), container.unpack()))
+
+        container = decode(encode(BioContainer(42, BioEnum.INIT, self.state().snapshot())))
+        self.assertIsInstance(container, BioContainer)
+        self.assertEqual((42, BioEnum.INIT), container.get())
+        self.assertStateEqual(self.state().snapshot(), container.unpack())
+
+        container = decode(encode(EnumContainer(RoadEnum.ALL_AGES_FINISHED)))
+        self.assertIsInstance(container, EnumContainer)
+        self.assertIs(RoadEnum.ALL_AGES_FINISHED, container.unpack())
+
+        batch = self.batch()
+        self.assertBatchEqual(batch, decode(encode(batch)))
+        # Пустой батч.
+        empty_batch = decode(encode(BatchContainer([], tensor([], dtype=int8), empty((0, 14), dtype=float64))))
+        self.assertEqual(([], (0, 14)), (empty_batch.get()[0], tuple(empty_batch.unpack().shape)))
+
+        jets = tensor([[0, 1, 0, 1, 1], [1, 0, 0, 0, 0]], dtype=float64)
+        container = decode(encode(StepRequestContainer([5, 7], jets, 64, RoadEnum.START_NEW_AGE,
+                                                       EnvSaveEnum.SAVE_PROCESS_STATE)))
+        self.assertIsInstance(container, StepRequestContainer)
+        self.assertEqual(([5, 7], 64, RoadEnum.START_NEW_AGE, EnvSaveEnum.SAVE_PROCESS_STATE), container.get())
+        self.assertTrue(equal(jets, container.unpack()))
+
+        rewards, done = tensor([0.5, -1.], dtype=float64), tensor([False, True])
+        for batch in (self.batch(), None):
+            container = decode(encode(StepResponseContainer(10, [5, 7], rewards, done, batch)))
+            self.assertIsInstance(container, StepResponseContainer)
+            tests_left, ids, decoded_rewards, decoded_done = container.get()
+            self.assertEqual((10, [5, 7]), (tests_left, ids))
+            self.assertTrue(equal(rewards, decoded_rewards))
+            self.assertTrue(equal(done, decoded_done))
+            if batch is None:
+                self.assertIsNone(container.unpack())
+            else:
+                self.assertBatchEqual(batch, container.unpack())
+
+    def test_unknown(self):
+        with self.assertRaises(TypeError):
+            encode(Container(1, object()))
+        with self.assertRaises(ValueError):
+            decode(bytes([255]))
+
+
+if __name__ == "__main__":
+    unittest.main()
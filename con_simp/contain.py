@@ -1,6 +1,7 @@
 """ Разнообразные контейнеры. """
-from con_intr.ifaces import TransferredData, About, IContainer, BioEnum, D
-from typing import Optional, Tuple
+from con_intr.ifaces import TransferredData, About, IContainer, BioEnum, RoadEnum, EnvSaveEnum, D
+from typing import Optional, Tuple, List
+from torch import Tensor
 from app_type import TestId
 
 
@@ -53,6 +54,101 @@ class BioContainer(IContainer):
         return self.__test_id, self.__bio
 
 
+class BatchContainer(IContainer):
+    """ Контейнер для батча испытаний одним сообщением: идентификаторы, Bio-статусы и матрица состояний. """
+    def __init__(self, ids: Optional[List[TestId]] = None, bio: Optional[Tensor] = None,
+                 cargo: Optional[Tensor] = None):
+        """
+
+        :param ids: Идентификаторы испытаний в порядке строк матрицы.
+        :param bio: Значения *BioEnum* для испытаний (N)
+        :param cargo: Матрица состояний (N, STATE_WIDTH), столбцы как в batch.py
+        """
+        self.__cargo: Optional[Tensor] = cargo
+        self.__ids: List[TestId] = ids or []
+        self.__bio: Optional[Tensor] = bio
+
+    def __len__(self) -> int:
+        return len(self.__ids)
+
+    def pack(self, cargo: Tensor) -> None:
+        self.__cargo = cargo
+
+    def unpack(self) -> Tensor:
+        return self.__cargo
+
+    def set(self, about: Tuple[List[TestId], Tensor]) -> None:
+        self.__ids, self.__bio = about[0], about[1]
+
+    def get(self) -> Tuple[List[TestId], Tensor]:
+        return self.__ids, self.__bio
+
+
+class StepRequestContainer(IContainer):
+    """ Запрос шага обучения из БНС в БФМ: команды на двигатели батча и управляющие флаги одним сообщением. """
+    def __init__(self, ids: Optional[List[TestId]] = None, jets: Optional[Tensor] = None, batch_size: int = 0,
+                 road: RoadEnum = RoadEnum.CONTINUE, save: EnvSaveEnum = EnvSaveEnum.CONTINUE):
+        """
+
+        :param ids: Идентификаторы испытаний, которым предназначены команды, в порядке строк матрицы команд.
+        :param jets: Матрица команд на двигатели (N, JETS_WIDTH), столбцы как в *batch.jets_tensor()*
+        :param batch_size: Сколько испытаний БНС готов обработать на следующем шаге.
+        :param road: Что делать БФМ после выполнения команд: продолжать, начать новую эпоху, закончить обучение.
+        :param save: Сохранить ли БФМ состояние после выполнения команд.
+        """
+        self.__cargo: Optional[Tensor] = jets
+        self.__ids: List[TestId] = ids or []
+        self.__batch_size: int = batch_size
+        self.__road: RoadEnum = road
+        self.__save: EnvSaveEnum = save
+
+    def __len__(self) -> int:
+        return len(self.__ids)
+
+    def pack(self, cargo: Tensor) -> None:
+        self.__cargo = cargo
+
+    def unpack(self) -> Optional[Tensor]:
+        return self.__cargo
+
+    def set(self, about: Tuple[List[TestId], int, RoadEnum, EnvSaveEnum]) -> None:
+        self.__ids, self.__batch_size, self.__road, self.__save = about
+
+    def get(self) -> Tuple[List[TestId], int, RoadEnum, EnvSaveEnum]:
+        return self.__ids, self.__batch_size, self.__road, self.__save
+
+
+class StepResponseContainer(IContainer):
+    """ Ответ БФМ на запрос шага: результаты выполнения команд и следующий батч состояний одним сообщением. """
+    def __init__(self, tests_left: int = 0, ids: Optional[List[TestId]] = None, rewards: Optional[Tensor] = None,
+                 done: Optional[Tensor] = None, cargo: Optional[BatchContainer] = None):
+        """
+
+        :param tests_left: Оставшееся количество запланированных испытаний (и текущих, и в плане). 0 - эпоха окончена.
+        :param ids: Идентификаторы испытаний, получивших команды в запросе, в порядке строк запроса.
+        :param rewards: Подкрепления этих испытаний (N)
+        :param done: Флаги завершения этих испытаний (N)
+        :param cargo: Следующий батч состояний.
+        """
+        self.__tests_left: int = tests_left
+        self.__ids: List[TestId] = ids or []
+        self.__rewards: Optional[Tensor] = rewards
+        self.__done: Optional[Tensor] = done
+        self.__cargo: Optional[BatchContainer] = cargo
+
+    def pack(self, cargo: BatchContainer) -> None:
+        self.__cargo = cargo
+
+    def unpack(self) -> Optional[BatchContainer]:
+        return self.__cargo
+
+    def set(self, about: Tuple[int, List[TestId], Tensor, Tensor]) -> None:
+        self.__tests_left, self.__ids, self.__rewards, self.__done = about
+
+    def get(self) -> Tuple[int, List[TestId], Tensor, Tensor]:
+        return self.__tests_left, self.__ids, self.__rewards, self.__done
+
+
 class EnumContainer(IContainer):
     """ Контейнер, для передачи констант-перечислений. """
     def __init__(self, cargo: D):
@@ -0,0 +1,232 @@
+""" Статистика каналов передачи данных: пропускная способность, глубина очередей, время ожидания в очереди. """
+# Статистика собирается, только если она включена (app_cfg.WIRE_METRICS), иначе каналы её не ведут.
+# Каналы с одинаковыми отправителем, получателем и типом данных (например, обе стороны канала через сокет
+# в одном процессе) ведут общую статистику.
+from enum import Enum
+from threading import Lock
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+from weakref import WeakKeyDictionary
+from con_intr.ifaces import IContainer, IReceiver, A, D
+
+
+class Histogram:
+    """ Гистограмма длительностей. Корзина *i* - длительности от 2^(i-1) до 2^i микросекунд. """
+    # Количество корзин: последняя - длительности от 2^(BUCKETS-2) мкс (больше 18 минут).
+    BUCKETS: int = 32
+
+    def __init__(self):
+        self.__counts: List[int] = [0] * Histogram.BUCKETS
+        self.__max: float = 0.
+
+    def add(self, seconds: float) -> None:
+        """ Учесть длительность.
+
+        :param seconds: Длительность, сек.
+        """
+        micro: int = int(seconds * 1e6)
+        self.__counts[min(micro.bit_length(), Histogram.BUCKETS - 1)] += 1
+        self.__max = max(self.__max, seconds)
+
+    def counts(self) -> List[int]:
+        """ Количество длительностей в каждой корзине. """
+        return list(self.__counts)
+
+    def max(self) -> float:
+        """ Максимальная длительность, сек. """
+        return self.__max
+
+    def percentile(self, fraction: float) -> float:
+        """ Оценка перцентиля сверху: верхняя граница корзины, в которой он находится.
+
+        :param fraction: Доля (0, 1]
+        :return: Длительность, сек. 0 - длительностей не было.
+        """
+        total: int = sum(self.__counts)
+        if total == 0:
+            return 0.
+        limit: float = total * fraction
+        passed: int = 0
+        for index, count in enumerate(self.__counts):
+            passed += count
+            if passed >= limit:
+                return min((1 << index) * 1e-6, self.__max)
+        return self.__max
+
+
+class WireStats:
+    """ Статистика одного канала (или нескольких каналов с одинаковыми отправителем, получателем и типом данных).
+
+    Время ожидания в очереди отсчитывается от постановки контейнера в очередь получателя: для канала в памяти -
+    от отправки, для канала через сокет - от приёма из соединения (часы разных узлов не сравниваются).
+    """
+    def __init__(self):
+        self.__lock: Lock = Lock()
+        # Отметки времени постановки в очередь ещё не полученных контейнеров. Контейнер, отброшенный очередью,
+        # удаляется из словаря вместе с последней ссылкой на него.
+        self.__stamps: WeakKeyDictionary = WeakKeyDictionary()
+        self.reset()
+
+    def reset(self) -> None:
+        """ Начать сбор статистики заново. """
+        with self.__lock:
+            self.__start: float = perf_counter()
+            self.__sent: int = 0
+            self.__received: int = 0
+            # Потерянные контейнеры: отброшенные политикой переполнения и самой очередью получателя.
+            self.__dropped: int = 0
+            self.__depth: int = 0
+            self.__peak: int = 0
+            self.__dwell: Histogram = Histogram()
+            # Время, которое отправитель ждал места в заполненном канале, и время, которое получатель ждал данных.
+            self.__send_wait: float = 0.
+            self.__receive_wait: float = 0.
+
+    def sent(self, waited: float, dropped: int) -> None:
+        """ Отправка контейнера.
+
+        :param waited: Сколько отправитель ждал места в канале, сек.
+        :param dropped: Сколько контейнеров отброшено политикой переполнения.
+        """
+        with self.__lock:
+            self.__sent += 1
+            self.__dropped += dropped
+            self.__send_wait += waited
+
+    def discarded(self, count: int) -> None:
+        """ Очередь получателя отбросила ожидавшие получения контейнеры (например, устаревшие промежуточные
+        состояния в *wire.LatestValueQueue*)
+
+        :param count: Количество отброшенных контейнеров.
+        """
+        with self.__lock:
+            self.__dropped += count
+
+    def stamp(self, container: IContainer) -> None:
+        """ Контейнер ставится в очередь получателя: отметка времени для учёта ожидания в очереди.
+
+        :param container: Контейнер.
+        """
+        with self.__lock:
+            self.__stamps[container] = perf_counter()
+
+    def depth(self, depth: int) -> None:
+        """ Глубина очереди получателя после постановки контейнера.
+
+        :param depth: Количество контейнеров в очереди.
+        """
+        with self.__lock:
+            self.__depth = depth
+            self.__peak = max(self.__peak, depth)
+
+    def received(self, container: IContainer, depth: int, waited: float) -> None:
+        """ Получение контейнера.
+
+        :param container: Контейнер.
+        :param depth: Глубина очереди после получения.
+        :param waited: Сколько получатель ждал данных, сек.
+        """
+        now: float = perf_counter()
+        with self.__lock:
+            self.__received += 1
+            self.__depth = depth
+            self.__receive_wait += waited
+            stamp: Optional[float] = self.__stamps.pop(container, None)
+            if stamp is not None:
+                self.__dwell.add(now - stamp)
+
+    def waited(self, seconds: float) -> None:
+        """ Получатель ждал поступления данных (например, в *WireSelector*)
+
+        :param seconds: Время ожидания, сек.
+        """
+        with self.__lock:
+            self.__receive_wait += seconds
+
+    def snapshot(self) -> Dict[str, object]:
+        """ Текущие значения статистики.
+
+        :return: Словарь: количество и частота (в секунду) отправленных и полученных контейнеров, количество
+        отброшенных, текущая и пиковая глубина очереди, время ожидания в очереди (перцентили, максимум
+        и гистограмма), суммарное время ожидания отправителя и получателя.
+        """
+        with self.__lock:
+            elapsed: float = max(perf_counter() - self.__start, 1e-9)
+            return {'elapsed': elapsed, 'sent': self.__sent, 'received': self.__received,
+                    'sent_per_sec': self.__sent / elapsed, 'received_per_sec': self.__received / elapsed,
+                    'dropped': self.__dropped, 'depth': self.__depth, 'peak_depth': self.__peak,
+                    'dwell_p50': self.__dwell.percentile(0.5), 'dwell_p99': self.__dwell.percentile(0.99),
+                    'dwell_max': self.__dwell.max(), 'dwell_histogram': self.__dwell.counts(),
+                    'send_wait': self.__send_wait, 'receive_wait': self.__receive_wait}
+
+
+class WireMetrics:
+    """ Реестр статистики каналов по ключу (Отправитель, Получатель, Тип данных). """
+    def __init__(self):
+        self.__lock: Lock = Lock()
+        self.__enabled: bool = False
+        self.__by_key: Dict[Tuple[A, A, D], WireStats] = {}
+        # Статистика каналов по объектам каналов: для учёта ожидания в *WireSelector*
+        self.__by_wire: WeakKeyDictionary = WeakKeyDictionary()
+
+    def enable(self, enabled: bool = True) -> None:
+        """ Включить сбор статистики. Действует на каналы, создаваемые после включения. """
+        self.__enabled = enabled
+
+    def attach(self, wire: IReceiver, sender: A, receiver: A, data_type: D) -> Optional[WireStats]:
+        """ Статистика для создаваемого канала.
+
+        :param wire: Канал.
+        :param sender: Отправитель.
+        :param receiver: Получатель.
+        :param data_type: Тип данных.
+        :return: Статистика канала. None - сбор статистики выключен.
+        """
+        if not self.__enabled:
+            return None
+        with self.__lock:
+            stats: WireStats = self.__by_key.setdefault((sender, receiver, data_type), WireStats())
+            self.__by_wire[wire] = stats
+        return stats
+
+    def of(self, wire: IReceiver) -> Optional[WireStats]:
+        """ Статистика канала. None - канал создан без сбора статистики. """
+        return self.__by_wire.get(wire)
+
+    def snapshot(self) -> Dict[Tuple[A, A, D], Dict[str, object]]:
+        """ Текущие значения статистики всех каналов (см. *WireStats.snapshot()*) """
+        with self.__lock:
+            items: List[Tuple[Tuple[A, A, D], WireStats]] = list(self.__by_key.items())
+        return {key: stats.snapshot() for key, stats in items}
+
+    def reset(self) -> None:
+        """ Начать сбор статистики всех каналов заново. """
+        with self.__lock:
+            items: List[WireStats] = list(self.__by_key.values())
+        for stats in items:
+            stats.reset()
+
+    def dump(self) -> str:
+        """ Статистика всех каналов в виде текстовой таблицы. """
+        def name(value: Enum) -> str:
+            return value.name if isinstance(value, Enum) else str(value)
+
+        header: str = '{:<44} {:>9} {:>9} {:>7} {:>5} {:>5} {:>9} {:>9} {:>9} {:>9} {:>9}'
+        row: str = '{:<44} {:>9.1f} {:>9.1f} {:>7} {:>5} {:>5} {:>9.3f} {:>9.3f} {:>9.3f} {:>9.3f} {:>9.3f}'
+        lines: List[str] = [header.format('wire', 'sent/s', 'recv/s', 'dropped', 'depth', 'peak', 'p50 ms', 'p99 ms',
+                                          'max ms', 'send w s', 'recv w s')]
+        for (sender, receiver, data_type), s in self.snapshot().items():
+            lines.append(row.format(
+                '{}->{} {}'.format(name(sender), name(receiver), name(data_type)), s['sent_per_sec'],
+                s['received_per_sec'], s['dropped'], s['depth'], s['peak_depth'], s['dwell_p50'] * 1e3,
+                s['dwell_p99'] * 1e3, s['dwell_max'] * 1e3, s['send_wait'], s['receive_wait']))
+            # Непустые корзины гистограммы времени ожидания в очереди: верхняя граница корзины - количество.
+            histogram: List[str] = ['<{}us:{}'.format(1 << index, count)
+                                    for index, count in enumerate(s['dwell_histogram']) if count > 0]
+            if len(histogram) > 0:
+                lines.append('    dwell ' + ' '.join(histogram))
+        return '\n'.join(lines)
+
+
+# Статистика каналов приложения.
+wire_metrics: WireMetrics = WireMetrics()
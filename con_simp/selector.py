@@ -0,0 +1,59 @@
+""" Ожидание данных сразу в нескольких каналах передачи данных. """
+from con_intr.ifaces import IReceiver
+from con_simp.metrics import WireStats, wire_metrics
+from threading import Event
+from time import monotonic
+from typing import List, Iterable, Optional
+
+
+class WireSelector:
+    """ Ожидание поступления данных в любой из нескольких каналов (аналог *select*).
+    Нить спит, пока данных нет, и просыпается сразу при отправке данных в любой из каналов. """
+    def __init__(self, receivers: Iterable[IReceiver]):
+        """
+
+        :param receivers: Каналы, данные из которых ожидаются. Первый - основной: время ожидания учитывается
+        в его статистике (остальные каналы обычно - каналы команды на завершение приложения).
+        """
+        self.__receivers: List[IReceiver] = list(receivers)
+        # Общее для всех каналов событие поступления данных.
+        self.__event: Event = Event()
+        for receiver in self.__receivers:
+            receiver.subscribe(self.__event)
+
+    def __enter__(self) -> 'WireSelector':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def wait(self, timeout: Optional[float] = None) -> List[IReceiver]:
+        """ Ждать появления данных хотя бы в одном из каналов.
+
+        :param timeout: Максимальное время ожидания, сек. None - ждать без ограничения.
+        :return: Каналы, в которых есть данные. Пустой список - за время ожидания данные не появились.
+        """
+        start: float = monotonic()
+        deadline: Optional[float] = None if timeout is None else start + timeout
+        while True:
+            # Событие сбрасывается до проверки каналов: отправка после проверки установит его снова.
+            self.__event.clear()
+            ready: List[IReceiver] = [receiver for receiver in self.__receivers if receiver.has_incoming()]
+            if len(ready) > 0:
+                break
+
+            remaining: Optional[float] = None if deadline is None else deadline - monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            self.__event.wait(remaining)
+
+        stats: Optional[WireStats] = wire_metrics.of(self.__receivers[0]) if len(self.__receivers) > 0 else None
+        if stats is not None:
+            stats.waited(monotonic() - start)
+        return ready
+
+    def close(self) -> None:
+        """ Отменить подписку на каналы. """
+        for receiver in self.__receivers:
+            receiver.unsubscribe(self.__event)
+        self.__receivers = []
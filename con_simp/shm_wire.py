@@ -0,0 +1,298 @@
+""" Канал передачи данных между процессами через разделяемую память. """
+from con_intr.ifaces import IContainer, IWire, A, D, OverflowEnum, AppModulesEnum, DataTypeEnum
+from con_simp.codec import encode, decode
+from con_simp.contain import Container, BatchContainer
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from queue import Queue, Full, Empty
+from struct import Struct
+from threading import Event, Lock, Thread
+from typing import Callable, List, Optional
+import unittest
+from torch import zeros, int8, float64
+
+
+class SharedMemoryWire(IWire):
+    """ Односторонний канал передачи данных между процессами. Внутри - кольцевой буфер из ячеек фиксированного
+    размера в разделяемой памяти, контейнеры в ячейках закодированы модулем *con_simp.codec*.
+
+    Один отправитель и один получатель (каждый может быть в своём процессе). Объект канала передаётся в
+    порождаемый процесс аргументом при его запуске: в процессе-получателе канал подключается к той же памяти.
+
+    Получатель может забирать сообщения из буфера в свою очередь (например, *wire.LatestValueQueue*): тогда
+    с первого обращения получателя к каналу его нить непрерывно переносит сообщения из буфера в эту очередь, и уже
+    очередь решает, что из этого ждёт получения. Буфер при этом не заполняется, пока жив процесс получателя.
+    """
+    # Заголовок буфера: количество записанных и количество прочитанных сообщений.
+    __header: Struct = Struct('<QQ')
+    # Длина сообщения в начале ячейки. 8 байт - чтобы данные в ячейке были выровнены по 8 байт.
+    __length: Struct = Struct('<Q')
+    # Период проверки подписки нитью-наблюдателем, секунды.
+    __watch_period: float = 0.1
+
+    def __init__(self, sender: A, receiver: A, data_type: D, slots: int = 16, slot_size: int = 1 << 20,
+                 overflow: OverflowEnum = OverflowEnum.BLOCK, incoming: Optional[Callable[[], Queue]] = None):
+        """
+
+        :param sender: Отправитель данных.
+        :param receiver: Получатель данных.
+        :param data_type: Тип передаваемых данных.
+        :param slots: Количество ячеек буфера (ёмкость канала).
+        :param slot_size: Максимальный размер закодированного сообщения, байт.
+        :param overflow: Что делать отправителю, если все ячейки заняты. DROP_OLDEST не поддерживается: ячейки
+        освобождает только получатель, который может работать в другом процессе. EVICT - отправитель ждёт
+        свободную ячейку, которую вскоре освободит нить получателя (вытесняет очередь получателя *incoming*).
+        :param incoming: Создание очереди принятых контейнеров на стороне получателя (например,
+        *functools.partial(LatestValueQueue, window)*). Очередь создаётся в процессе получателя, поэтому передаётся
+        не она, а то, что её создаёт. None - контейнеры получаются прямо из буфера.
+        """
+        super().__init__(sender, receiver, data_type)
+        assert overflow != OverflowEnum.DROP_OLDEST, "Shared memory wire can't drop the oldest message."
+        assert overflow != OverflowEnum.EVICT or incoming is not None, \
+            "EVICT overflow policy requires a receiver queue that evicts."
+        self.__overflow: OverflowEnum = overflow
+
+        self.__sender: A = sender
+        self.__receiver: A = receiver
+        self.__type: D = data_type
+
+        self.__slots: int = slots
+        self.__incoming_factory: Optional[Callable[[], Queue]] = incoming
+        # Начало каждой ячейки выровнено по 8 байт.
+        self.__slot_size: int = slot_size + (-slot_size % 8)
+        size: int = SharedMemoryWire.__header.size + slots * (SharedMemoryWire.__length.size + self.__slot_size)
+        self.__memory: SharedMemory = SharedMemory(create=True, size=size)
+        SharedMemoryWire.__header.pack_into(self.__memory.buf, 0, 0, 0)
+        # Память освобождается создавшим её процессом.
+        self.__owner: bool = True
+
+        # Примитивы синхронизации процессов. Процессы порождаются "с нуля" (см. thrds_tk.workers)
+        context = get_context('spawn')
+        # Свободные и заполненные ячейки.
+        self.__free = context.Semaphore(slots)
+        self.__filled = context.Semaphore(0)
+        # Признак поступления данных, для нити-наблюдателя подписок.
+        self.__signal = context.Event()
+
+        self.__init_local()
+
+    def __init_local(self) -> None:
+        """ Состояние, принадлежащее процессу, а не каналу: оно не передаётся в порождаемый процесс. """
+        self.__send_lock: Lock = Lock()
+        self.__receive_lock: Lock = Lock()
+        # События, подписанные на поступление данных в канал.
+        self.__events: List[Event] = []
+        self.__events_lock: Lock = Lock()
+        # Нить, переводящая признак поступления данных из другого процесса в события подписчиков.
+        self.__watcher: Optional[Thread] = None
+        # Очередь принятых контейнеров на стороне получателя и нить, переносящая в неё сообщения из буфера.
+        self.__incoming: Optional[Queue] = None if self.__incoming_factory is None else self.__incoming_factory()
+        self.__drainer: Optional[Thread] = None
+        self.__stop: Event = Event()
+
+    def __getstate__(self) -> dict:
+        return {'sender': self.__sender, 'receiver': self.__receiver, 'type': self.__type,
+                'slots': self.__slots, 'slot_size': self.__slot_size, 'overflow': self.__overflow,
+                'incoming': self.__incoming_factory,
+                'name': self.__memory.name,
+                'free': self.__free, 'filled': self.__filled, 'signal': self.__signal}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__sender, self.__receiver, self.__type = state['sender'], state['receiver'], state['type']
+        self.__slots, self.__slot_size, self.__overflow = state['slots'], state['slot_size'], state['overflow']
+        self.__incoming_factory = state['incoming']
+        self.__memory = SharedMemory(name=state['name'])
+        self.__owner = False
+        self.__free, self.__filled, self.__signal = state['free'], state['filled'], state['signal']
+        self.__init_local()
+
+    def __slot_offset(self, counter: int) -> int:
+        """ Смещение ячейки сообщения с порядковым номером *counter* от начала буфера. """
+        return SharedMemoryWire.__header.size + \
+            (counter % self.__slots) * (SharedMemoryWire.__length.size + self.__slot_size)
+
+    def send(self, cargo: IContainer) -> None:
+        message: bytearray = encode(cargo)
+        if len(message) > self.__slot_size:
+            raise ValueError("Encoded container size {} is more than slot size {}."
+                             .format(len(message), self.__slot_size))
+
+        with self.__send_lock:
+            if not self.__free.acquire(self.__overflow in (OverflowEnum.BLOCK, OverflowEnum.EVICT)):
+                if self.__overflow == OverflowEnum.ERROR:
+                    raise Full("Shared memory wire: all {} slots are occupied.".format(self.__slots))
+                # DROP_NEWEST
+                return
+            written, read = SharedMemoryWire.__header.unpack_from(self.__memory.buf, 0)
+            offset: int = self.__slot_offset(written)
+            SharedMemoryWire.__length.pack_into(self.__memory.buf, offset, len(message))
+            offset += SharedMemoryWire.__length.size
+            self.__memory.buf[offset: offset + len(message)] = message
+            # Счётчик прочитанных меняет только получатель, поэтому пишется только первое поле заголовка.
+            SharedMemoryWire.__length.pack_into(self.__memory.buf, 0, written + 1)
+        self.__filled.release()
+        self.__signal.set()
+
+    def get_receiver(self) -> A:
+        return self.__receiver
+
+    def get_sending_type(self) -> D:
+        return self.__type
+
+    def receive(self, timeout: Optional[float] = None) -> Optional[IContainer]:
+        if self.__incoming is None:
+            if not self.__filled.acquire(timeout=timeout):
+                return None
+            return self.__read()
+
+        self.__drain()
+        try:
+            return self.__incoming.get(timeout=timeout)
+        except Empty:
+            return None
+
+    def __drain(self) -> None:
+        """ Запустить нить, переносящую сообщения из буфера в очередь получателя, если она ещё не запущена. """
+        with self.__events_lock:
+            if self.__drainer is None:
+                self.__drainer = Thread(target=self.__drain_loop, name='SharedMemoryWireDrainer', daemon=True)
+                self.__drainer.start()
+
+    def __drain_loop(self) -> None:
+        """ Цикл нити получателя: переносить сообщения из буфера в очередь получателя до закрытия канала. """
+        while not self.__stop.is_set():
+            if not self.__filled.acquire(timeout=SharedMemoryWire.__watch_period):
+                continue
+            self.__incoming.put(self.__read())
+            with self.__events_lock:
+                for event in self.__events:
+                    event.set()
+
+    def __read(self) -> IContainer:
+        """ Прочитать сообщение из очередной ячейки (ячейка уже занята получателем) и освободить её. """
+        with self.__receive_lock:
+            written, read = SharedMemoryWire.__header.unpack_from(self.__memory.buf, 0)
+            offset: int = self.__slot_offset(read)
+            length, = SharedMemoryWire.__length.unpack_from(self.__memory.buf, offset)
+            offset += SharedMemoryWire.__length.size
+            message: memoryview = self.__memory.buf[offset: offset + length]
+            try:
+                # Декодирование копирует данные из ячейки, после него ячейку можно отдать отправителю.
+                cargo: IContainer = decode(message)
+            finally:
+                message.release()
+            SharedMemoryWire.__length.pack_into(self.__memory.buf, SharedMemoryWire.__length.size, read + 1)
+        self.__free.release()
+        return cargo
+
+    def __watch(self) -> None:
+        """ Цикл нити-наблюдателя: пока есть подписчики, будить их при поступлении данных в канал. """
+        while True:
+            with self.__events_lock:
+                if not self.__events:
+                    self.__watcher = None
+                    return
+            if not self.__signal.wait(SharedMemoryWire.__watch_period):
+                continue
+            # Сброс до проверки наличия данных: отправка после сброса снова выставит признак.
+            self.__signal.clear()
+            if self.has_incoming():
+                with self.__events_lock:
+                    for event in self.__events:
+                        event.set()
+
+    def subscribe(self, event: Event) -> None:
+        if self.__incoming is not None:
+            # События подписчиков будит нить получателя.
+            self.__drain()
+            with self.__events_lock:
+                self.__events.append(event)
+            if not self.__incoming.empty():
+                event.set()
+            return
+        with self.__events_lock:
+            self.__events.append(event)
+            if self.__watcher is None:
+                self.__watcher = Thread(target=self.__watch, name='SharedMemoryWireWatcher', daemon=True)
+                self.__watcher.start()
+        if self.has_incoming():
+            event.set()
+
+    def unsubscribe(self, event: Event) -> None:
+        with self.__events_lock:
+            self.__events.remove(event)
+
+    def has_incoming(self) -> bool:
+        if self.__incoming is not None:
+            self.__drain()
+            return not self.__incoming.empty()
+        written, read = SharedMemoryWire.__header.unpack_from(self.__memory.buf, 0)
+        return written != read
+
+    def get_sender(self) -> A:
+        return self.__sender
+
+    def get_receiving_type(self) -> D:
+        return self.__type
+
+    def close(self) -> None:
+        """ Отключиться от разделяемой памяти. Процесс, создавший канал, освобождает и саму память. """
+        self.__stop.set()
+        if self.__drainer is not None:
+            self.__drainer.join()
+        self.__memory.close()
+        if self.__owner:
+            self.__memory.unlink()
+
+
+def _echo(inbound: SharedMemoryWire, outbound: SharedMemoryWire, count: int) -> None:
+    """ Процесс проверки канала: вернуть *count* принятых контейнеров обратно. """
+    for _ in range(count):
+        outbound.send(inbound.receive(timeout=10))
+    inbound.close()
+    outbound.close()
+
+
+class SharedMemoryWireTest(unittest.TestCase):
+    def test_loopback(self):
+        # Ячеек меньше, чем сообщений: кольцевой буфер проходится несколько раз.
+        forward = SharedMemoryWire(AppModulesEnum.NEURO, AppModulesEnum.PHYSICS, DataTypeEnum.STEP_REQUEST,
+                                   slots=2, slot_size=4096)
+        backward = SharedMemoryWire(AppModulesEnum.PHYSICS, AppModulesEnum.NEURO, DataTypeEnum.STEP_RESPONSE,
+                                    slots=2, slot_size=4096)
+        process = get_context('spawn').Process(target=_echo, args=(forward, backward, 20))
+        process.start()
+        event = Event()
+        backward.subscribe(event)
+        try:
+            for index in range(20):
+                forward.send(Container(index, float(index)))
+                self.assertTrue(event.wait(10))
+                event.clear()
+                container = backward.receive(timeout=10)
+                self.assertEqual((index, float(index)), (container.get(), container.unpack()))
+            self.assertFalse(backward.has_incoming())
+        finally:
+            backward.unsubscribe(event)
+            process.join(10)
+            forward.close()
+            backward.close()
+        self.assertEqual(0, process.exitcode)
+
+    def test_overflow(self):
+        wire = SharedMemoryWire(AppModulesEnum.NEURO, AppModulesEnum.PHYSICS, DataTypeEnum.STEP_REQUEST,
+                                slots=1, slot_size=64, overflow=OverflowEnum.DROP_NEWEST)
+        try:
+            wire.send(Container(1, 1.))
+            wire.send(Container(2, 2.))
+            self.assertEqual(1, wire.receive(timeout=1).get())
+            self.assertIsNone(wire.receive(timeout=0.01))
+            # Сообщение больше ячейки.
+            with self.assertRaises(ValueError):
+                wire.send(BatchContainer(list(range(16)), zeros(16, dtype=int8), zeros((16, 14), dtype=float64)))
+        finally:
+            wire.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
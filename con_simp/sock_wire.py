@@ -0,0 +1,364 @@
+""" Канал передачи данных через сокеты: TCP или сокеты Unix. Блоки приложения могут работать на разных узлах. """
+# Протокол: поток кадров, кадр - длина сообщения (4 байта, порядок '<'), идентификатор отправителя и номер кадра
+# (по 8 байт) и сообщение, закодированное модулем con_simp.codec. Сторона получателя слушает адрес канала, сторона
+# отправителя держит к нему одно соединение. По номеру кадра получатель отбрасывает кадры, повторно отправленные
+# после разрыва соединения: каждый кадр доходит ровно один раз.
+import os
+import random
+from con_intr.ifaces import IContainer, IWire, A, D, OverflowEnum, AppModulesEnum, DataTypeEnum
+from con_simp.codec import encode, decode
+from con_simp.contain import Container
+from con_simp.wire import put, LatestValueQueue
+from con_simp.metrics import WireStats, wire_metrics
+from app_cons import logger_name
+from logging import getLogger
+from multiprocessing import get_context
+from queue import Queue, Empty
+from socket import socket, create_connection, AF_INET, AF_UNIX, SOCK_STREAM, SOL_SOCKET, SO_REUSEADDR, IPPROTO_TCP, \
+    TCP_NODELAY, SHUT_RDWR
+from struct import Struct
+from tempfile import TemporaryDirectory
+from threading import Event, Lock, Thread
+from time import perf_counter
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+import unittest
+
+logger = getLogger(logger_name + '.wire')
+
+# Адрес канала: (узел, порт) для TCP или путь к файлу сокета Unix.
+Address = Union[Tuple[str, int], str]
+
+
+class SocketWire(IWire):
+    """ Односторонний канал передачи данных через сокет.
+
+    Канал пассивен до первого использования: отправка открывает соединение с адресом канала, а получение
+    (в том числе проверка наличия данных и подписка) - начинает слушать этот адрес. Поэтому на узле отправителя
+    и на узле получателя создаётся один и тот же канал, и каждый узел использует только свою сторону.
+    """
+    # Заголовок кадра: длина сообщения, идентификатор отправителя и номер кадра у этого отправителя.
+    __header: Struct = Struct('<IQQ')
+    # Пауза между попытками соединения с ещё не слушающим получателем, секунды.
+    __connect_period: float = 0.1
+
+    def __init__(self, sender: A, receiver: A, data_type: D, address: Address, batch_size: int = 1 << 16,
+                 incoming: Optional[Queue] = None, capacity: int = 0, overflow: OverflowEnum = OverflowEnum.BLOCK):
+        """
+
+        :param sender: Отправитель данных.
+        :param receiver: Получатель данных.
+        :param data_type: Тип передаваемых данных.
+        :param address: Адрес, который слушает сторона получателя: (узел, порт) или путь к сокету Unix.
+        :param batch_size: Накопившиеся к отправке кадры уходят в сокет одной записью, пока их суммарный размер
+        не превысит это значение, байт.
+        :param incoming: Очередь принятых контейнеров (например, *wire.LatestValueQueue*), её ёмкость задаётся при
+        её создании. None - обычная очередь ёмкостью *capacity*
+        :param capacity: Ёмкость каждой из сторон канала: сколько кадров может ожидать отправки и сколько
+        контейнеров - получения. 0 - без ограничения.
+        :param overflow: Что делать отправителю, если заполнена очередь кадров к отправке. Заполненная очередь
+        принятых контейнеров приостанавливает чтение из соединения, и очередь к отправке заполняется за ней.
+        EVICT - очередь принятых *incoming* вытесняет контейнеры сама (см. *wire.LatestValueQueue*).
+        """
+        super().__init__(sender, receiver, data_type)
+
+        self.__sender: A = sender
+        self.__receiver: A = receiver
+        self.__type: D = data_type
+        self.__address: Address = address
+        self.__batch_size: int = batch_size
+
+        self.__start_lock: Lock = Lock()
+
+        # Сторона отправителя: кадры к отправке и нить, пишущая их в соединение.
+        # Очередь к отправке канала с вытеснением не ограничена: вытесняет очередь получателя, она же не даёт
+        # приостановить чтение из соединения, поэтому кадры к отправке не копятся.
+        self.__outgoing: Queue = Queue(0 if overflow == OverflowEnum.EVICT else capacity)
+        self.__overflow: OverflowEnum = overflow
+        # Идентификатор этой стороны отправителя (отличает её от перезапущенной) и номер последнего кадра.
+        self.__session: int = random.getrandbits(64)
+        self.__sequence: int = 0
+        self.__sequence_lock: Lock = Lock()
+        self.__writer: Optional[Thread] = None
+        self.__connection: Optional[socket] = None
+
+        # Сторона получателя: слушающий сокет и принятые контейнеры.
+        self.__listener: Optional[socket] = None
+        self.__incoming: Queue = Queue(capacity) if incoming is None else incoming
+        # Номер последнего принятого кадра по идентификатору отправителя.
+        self.__received: Dict[int, int] = {}
+        self.__received_lock: Lock = Lock()
+        # События, подписанные на поступление данных в канал.
+        self.__events: List[Event] = []
+        self.__events_lock: Lock = Lock()
+
+        # Статистика канала. None - сбор статистики выключен.
+        self.__stats: Optional[WireStats] = wire_metrics.attach(self, sender, receiver, data_type)
+        if self.__stats is not None and isinstance(self.__incoming, LatestValueQueue):
+            # Контейнеры, отброшенные самой очередью принятых, тоже потеряны для получателя.
+            self.__incoming.set_drop_listener(self.__stats.discarded)
+
+    def __is_unix(self) -> bool:
+        return isinstance(self.__address, str)
+
+    #
+    # Сторона отправителя.
+    #
+
+    def send(self, cargo: IContainer) -> None:
+        message: bytearray = encode(cargo)
+        with self.__start_lock:
+            if self.__writer is None:
+                self.__writer = Thread(target=self.__write_loop, name='SocketWireWriter', daemon=True)
+                self.__writer.start()
+        start: float = perf_counter()
+        with self.__sequence_lock:
+            # Номер присваивается при постановке в очередь, чтобы кадры в очереди шли по возрастанию номеров.
+            self.__sequence += 1
+            dropped: int = put(self.__outgoing,
+                               SocketWire.__header.pack(len(message), self.__session, self.__sequence) + message,
+                               self.__overflow)
+        if self.__stats is not None:
+            self.__stats.sent(perf_counter() - start, dropped)
+
+    def __write_loop(self) -> None:
+        """ Цикл нити отправки: все накопившиеся кадры (до *batch_size* байт) отправляются одной записью. """
+        finish: bool = False
+        while not finish:
+            frame: Optional[bytes] = self.__outgoing.get()
+            if frame is None:
+                break
+            frames: List[bytes] = [frame]
+            size: int = len(frame)
+            while size < self.__batch_size:
+                try:
+                    frame = self.__outgoing.get_nowait()
+                except Empty:
+                    break
+                if frame is None:
+                    # Завершение - после отправки уже накопленного.
+                    finish = True
+                    break
+                frames.append(frame)
+                size += len(frame)
+            self.__write(b''.join(frames))
+
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+    def __connect(self) -> socket:
+        """ Соединение с получателем. Ждёт, пока получатель не начнёт слушать адрес канала. """
+        while True:
+            try:
+                if self.__is_unix():
+                    connection = socket(AF_UNIX, SOCK_STREAM)
+                    try:
+                        connection.connect(self.__address)
+                    except OSError:
+                        connection.close()
+                        raise
+                else:
+                    connection = create_connection(self.__address)
+                    connection.setsockopt(IPPROTO_TCP, TCP_NODELAY, 1)
+                return connection
+            except OSError:
+                Event().wait(SocketWire.__connect_period)
+
+    def __write(self, data: bytes) -> None:
+        """ Запись в соединение. Соединение используется повторно, при разрыве - открывается заново. """
+        while True:
+            if self.__connection is None:
+                self.__connection = self.__connect()
+            try:
+                self.__connection.sendall(data)
+                return
+            except OSError as error:
+                # Получатель отбрасывает недополученный кадр разорванного соединения, поэтому запись повторяется
+                # целиком. Кадры, полностью дошедшие до разрыва, получатель отбросит по их номерам.
+                logger.warning('Канал {}: разрыв соединения ({}), повторная отправка.'.format(self, error))
+                self.__connection.close()
+                self.__connection = None
+
+    #
+    # Сторона получателя.
+    #
+
+    def __listen(self) -> None:
+        """ Начать слушать адрес канала, если это ещё не сделано. """
+        with self.__start_lock:
+            if self.__listener is not None:
+                return
+            if self.__is_unix():
+                directory: str = os.path.dirname(self.__address)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                if os.path.exists(self.__address):
+                    # Файл сокета, оставшийся от предыдущего запуска.
+                    os.unlink(self.__address)
+                listener = socket(AF_UNIX, SOCK_STREAM)
+            else:
+                listener = socket(AF_INET, SOCK_STREAM)
+                listener.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
+            listener.bind(self.__address)
+            listener.listen()
+            self.__listener = listener
+            Thread(target=self.__accept_loop, args=(listener,), name='SocketWireListener', daemon=True).start()
+
+    def __accept_loop(self, listener: socket) -> None:
+        """ Цикл приёма соединений. У каждого соединения - своя нить чтения. """
+        while True:
+            try:
+                connection, _ = listener.accept()
+            except OSError:
+                # Слушающий сокет закрыт.
+                break
+            Thread(target=self.__read_loop, args=(connection,), name='SocketWireReader', daemon=True).start()
+
+    def __read_loop(self, connection: socket) -> None:
+        """ Цикл чтения кадров из соединения. """
+        stream: BinaryIO = connection.makefile('rb')
+        try:
+            while True:
+                header: bytes = stream.read(SocketWire.__header.size)
+                if len(header) < SocketWire.__header.size:
+                    break
+                length, session, sequence = SocketWire.__header.unpack(header)
+                # Изменяемый буфер: torch не предупреждает о создании тензоров из буфера только для чтения.
+                message: bytearray = bytearray(length)
+                if stream.readinto(message) < length:
+                    break
+                with self.__received_lock:
+                    if sequence <= self.__received.get(session, 0):
+                        # Кадр уже получен: повторная отправка после разрыва соединения.
+                        continue
+                    self.__received[session] = sequence
+                container: IContainer = decode(message)
+                if self.__stats is not None:
+                    self.__stats.stamp(container)
+                self.__incoming.put(container)
+                if self.__stats is not None:
+                    self.__stats.depth(self.__incoming.qsize())
+                with self.__events_lock:
+                    for event in self.__events:
+                        event.set()
+        except OSError:
+            pass
+        finally:
+            stream.close()
+            connection.close()
+
+    def receive(self, timeout: Optional[float] = None) -> Optional[IContainer]:
+        self.__listen()
+        start: float = perf_counter()
+        try:
+            container: IContainer = self.__incoming.get(timeout=timeout)
+        except Empty:
+            container = None
+        if self.__stats is not None:
+            if container is None:
+                self.__stats.waited(perf_counter() - start)
+            else:
+                self.__stats.received(container, self.__incoming.qsize(), perf_counter() - start)
+        return container
+
+    def subscribe(self, event: Event) -> None:
+        self.__listen()
+        with self.__events_lock:
+            self.__events.append(event)
+
+    def unsubscribe(self, event: Event) -> None:
+        with self.__events_lock:
+            self.__events.remove(event)
+
+    def has_incoming(self) -> bool:
+        self.__listen()
+        return not self.__incoming.empty()
+
+    #
+    # Общее.
+    #
+
+    def get_receiver(self) -> A:
+        return self.__receiver
+
+    def get_sending_type(self) -> D:
+        return self.__type
+
+    def get_sender(self) -> A:
+        return self.__sender
+
+    def get_receiving_type(self) -> D:
+        return self.__type
+
+    def close(self) -> None:
+        """ Отправить накопленные кадры, закрыть соединение и перестать слушать адрес канала. """
+        with self.__start_lock:
+            writer, self.__writer = self.__writer, None
+            listener, self.__listener = self.__listener, None
+        if writer is not None:
+            self.__outgoing.put(None)
+            writer.join()
+        if listener is not None:
+            try:
+                listener.shutdown(SHUT_RDWR)
+            except OSError:
+                pass
+            listener.close()
+            if self.__is_unix() and os.path.exists(self.__address):
+                os.unlink(self.__address)
+
+    def __str__(self) -> str:
+        return '{}->{} {} ({})'.format(self.__sender.name, self.__receiver.name, self.__type.name, self.__address)
+
+
+def _echo(address: Address, report_address: Address, count: int) -> None:
+    """ Процесс проверки канала: вернуть *count* принятых контейнеров обратно. """
+    inbound = SocketWire(AppModulesEnum.NEURO, AppModulesEnum.PHYSICS, DataTypeEnum.STEP_REQUEST, address)
+    outbound = SocketWire(AppModulesEnum.PHYSICS, AppModulesEnum.NEURO, DataTypeEnum.STEP_RESPONSE, report_address)
+    for _ in range(count):
+        outbound.send(inbound.receive(timeout=10))
+    outbound.close()
+    inbound.close()
+
+
+class SocketWireTest(unittest.TestCase):
+    def loopback(self, address: Address, report_address: Address):
+        """ Контейнеры уходят в другой процесс и возвращаются обратно: все, по одному разу и по порядку. """
+        forward = SocketWire(AppModulesEnum.NEURO, AppModulesEnum.PHYSICS, DataTypeEnum.STEP_REQUEST, address)
+        backward = SocketWire(AppModulesEnum.PHYSICS, AppModulesEnum.NEURO, DataTypeEnum.STEP_RESPONSE,
+                              report_address)
+        event = Event()
+        # Сторона получателя начинает слушать адрес.
+        backward.subscribe(event)
+        process = get_context('spawn').Process(target=_echo, args=(address, report_address, 50))
+        process.start()
+        try:
+            for index in range(50):
+                forward.send(Container(index, float(index)))
+            self.assertTrue(event.wait(30))
+            for index in range(50):
+                container = backward.receive(timeout=10)
+                self.assertEqual((index, float(index)), (container.get(), container.unpack()))
+            self.assertIsNone(backward.receive(timeout=0.1))
+        finally:
+            backward.unsubscribe(event)
+            process.join(10)
+            forward.close()
+            backward.close()
+        self.assertEqual(0, process.exitcode)
+
+    def test_unix(self):
+        with TemporaryDirectory() as directory:
+            self.loopback(os.path.join(directory, 'forward.sock'), os.path.join(directory, 'backward.sock'))
+
+    def test_tcp(self):
+        ports: List[int] = []
+        for _ in range(2):
+            with socket(AF_INET, SOCK_STREAM) as probe:
+                probe.bind(('127.0.0.1', 0))
+                ports.append(probe.getsockname()[1])
+        self.loopback(('127.0.0.1', ports[0]), ('127.0.0.1', ports[1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
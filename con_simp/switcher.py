@@ -6,8 +6,12 @@ from typing import List, Tuple, Dict, Optional
 
 class Switchboard(ISwitchboard):
     def __init__(self):
-        # Список с каналами передачи данных.
-        self.__wires: List[Wire] = list()
+        # Индексы каналов: по полному ключу (Отправитель, Получатель, Тип данных), по получателю и по отправителю.
+        self.__by_key: Dict[Tuple[A, A, D], Wire] = {}
+        self.__by_receiver: Dict[A, List[Wire]] = {}
+        self.__by_sender: Dict[A, List[Wire]] = {}
+        # Версия состава каналов.
+        self.__version: int = 0
 
     def _is_unique(self, new_wire: IWire) -> bool:
         if self.get_wire(new_wire.get_sender(), new_wire.get_receiver(), new_wire.get_sending_type()) is None:
@@ -18,29 +22,22 @@ class Switchboard(ISwitchboard):
     def add_wire(self, new_wire: Wire) -> None:
         assert self._is_unique(new_wire) is True, "Adding wire have a equal parameters (Sender, Receiver, Data Type) " \
                                                   "with wire added earlier. Adding wire should be a unique object."
-        self.__wires.append(new_wire)
+        self.__by_key[(new_wire.get_sender(), new_wire.get_receiver(), new_wire.get_sending_type())] = new_wire
+        self.__by_receiver.setdefault(new_wire.get_receiver(), []).append(new_wire)
+        self.__by_sender.setdefault(new_wire.get_sender(), []).append(new_wire)
+        self.__version += 1
 
     def get_wire(self, sender: A, receiver: A, data_type: D) -> Optional[Wire]:
-        for value in self.__wires:
-            if value.get_sender() == sender and value.get_receiver() == receiver \
-                    and value.get_receiving_type() == data_type:
-                return value
-
-        return None
+        return self.__by_key.get((sender, receiver, data_type))
 
     def get_all_in(self, receiver: A) -> Tuple[IReceiver]:
-        result: List[IReceiver] = list()
-        for value in self.__wires:
-            if value.get_receiver() == receiver:
-                result.append(value)
-        return tuple(result)
+        return tuple(self.__by_receiver.get(receiver, ()))
 
     def get_all_out(self, sender: A) -> Tuple[ISender]:
-        result: List[ISender] = list()
-        for value in self.__wires:
-            if value.get_sender() == sender:
-                result.append(value)
-        return tuple(result)
+        return tuple(self.__by_sender.get(sender, ()))
+
+    def get_version(self) -> int:
+        return self.__version
 
 
 class Socket(ISocket):
@@ -52,6 +49,10 @@ class Socket(ISocket):
         """
         self.__module = module
         self.__switchboard = switchboard
+        # Словари каналов, построенные при версии щита (*ISwitchboard.get_version()*), указанной рядом.
+        # При добавлении каналов в щит словари строятся заново.
+        self.__in_dict: Optional[Tuple[int, Dict[A, Dict[D, IReceiver]]]] = None
+        self.__out_dict: Optional[Tuple[int, Dict[A, Dict[D, ISender]]]] = None
 
     def get_all_in(self) -> Tuple[IReceiver]:
         return self.__switchboard.get_all_in(self.__module)
@@ -60,6 +61,19 @@ class Socket(ISocket):
         return self.__switchboard.get_all_out(self.__module)
 
     def get_in_dict(self) -> Dict[A, Dict[D, IReceiver]]:
+        version: int = self.__switchboard.get_version()
+        if self.__in_dict is None or self.__in_dict[0] != version:
+            self.__in_dict = (version, self.__build_in_dict())
+        return self.__in_dict[1]
+
+    def get_out_dict(self) -> Dict[A, Dict[D, ISender]]:
+        version: int = self.__switchboard.get_version()
+        if self.__out_dict is None or self.__out_dict[0] != version:
+            self.__out_dict = (version, self.__build_out_dict())
+        return self.__out_dict[1]
+
+    def __build_in_dict(self) -> Dict[A, Dict[D, IReceiver]]:
+        """ Построение словаря входящих каналов (см. *get_in_dict()*) """
         # итоговое отображение в виде словаря
         incoming: Dict[A, Dict[D, IReceiver]] = {}
         # перебор всех входящих каналов передачи данных
@@ -74,7 +88,8 @@ class Socket(ISocket):
             incoming[key][ireceiver.get_receiving_type()] = ireceiver
         return incoming
 
-    def get_out_dict(self) -> Dict[A, Dict[D, ISender]]:
+    def __build_out_dict(self) -> Dict[A, Dict[D, ISender]]:
+        """ Построение словаря исходящих каналов (см. *get_out_dict()*) """
         # итоговое отображение в виде словаря
         outgoing: Dict[A, Dict[D, ISender]] = {}
         # перебор всех исходящих каналов передачи данных
@@ -1,16 +1,257 @@
 """ Канал передачи данных с помощью носителей-вагонеток. """
-from con_intr.ifaces import IContainer, IReceiver, ISender, IWire, A, D
-from queue import Queue
+from con_intr.ifaces import IContainer, IReceiver, ISender, IWire, IReportWire, A, D, BioEnum, OverflowEnum, \
+    TransferredData
+from con_simp.contain import BioContainer
+from con_simp.metrics import WireStats, wire_metrics
+from app_type import TestId
+from collections import deque
+from queue import Queue, Empty, Full
+from threading import Event, Lock
+from time import perf_counter
+from typing import Callable, Deque, Dict, List, Optional, Set
+
+
+class LatestValueQueue(Queue):
+    """ Очередь последних значений: из промежуточных состояний испытания (*BioContainer* со статусом ALIVE)
+    в очереди ожидает только самое свежее. Новое состояние занимает место устаревшего, не дожидаясь получения
+    и не занимая места в очереди.
+
+    События INIT и FIN, а также прочие контейнеры, не отбрасываются (кроме вытеснения, см. ниже). FIN отбрасывает
+    ожидающее промежуточное состояние своего испытания: последнее состояние испытания - само FIN.
+
+    Медленный получатель (визуализация) при этом видит каждое испытание от начала до конца, но не копит
+    в очереди кадры, которые уже не будут показаны.
+
+    С вытеснением очередь не ждёт освобождения места никогда: при исчерпании ёмкости отбрасываются испытания,
+    которые получатель ещё не начинал получать (их INIT ожидает в очереди) - самые старые первыми, вместе со всеми
+    их ожидающими и последующими состояниями вплоть до FIN. Если таких нет - самые старые промежуточные
+    состояния. События FIN испытаний, начало которых получатель уже получил, не отбрасываются: ради них
+    очередь может превысить ёмкость (их не больше, чем испытаний в работе).
+    """
+    def __init__(self, window: int = 0, maxsize: int = 0, evict: bool = False):
+        """
+
+        :param window: Максимальное количество ожидающих в очереди контейнеров. При переполнении отбрасываются
+        самые старые промежуточные состояния. 0 - без ограничения (очередь ограничена количеством испытаний).
+        :param maxsize: Ёмкость очереди, как у *Queue*: при её исчерпании действует политика переполнения канала.
+        :param evict: Вытеснение вместо ожидания при исчерпании ёмкости (политика канала *OverflowEnum.EVICT*).
+        """
+        self.__window: int = window
+        self.__evict: bool = evict
+        # Кому сообщать об отброшенных контейнерах (статистика канала). None - никому.
+        self.__drop_listener: Optional[Callable[[int], None]] = None
+        super().__init__(maxsize)
+
+    def set_drop_listener(self, listener: Optional[Callable[[int], None]]) -> None:
+        """ Сообщать об отброшенных очередью контейнерах: заменённых свежими, отброшенных событием FIN,
+        ограничением длины очереди или вытеснением.
+
+        :param listener: Вызывается с количеством отброшенных контейнеров. None - не сообщать.
+        """
+        self.__drop_listener = listener
+
+    @property
+    def evicts(self) -> bool:
+        """ Очередь вытесняет контейнеры при исчерпании ёмкости, а не ждёт освобождения места. """
+        return self.__evict
+
+    def _init(self, maxsize: int) -> None:
+        # Ячейки очереди. Ячейка отброшенного контейнера остаётся в очереди пустой (None) до её прохождения.
+        self.__slots: Deque[List[Optional[IContainer]]] = deque()
+        # Ячейки ожидающих промежуточных состояний по идентификаторам испытаний.
+        self.__alive: Dict[TestId, List[Optional[IContainer]]] = {}
+        # Ячейки ожидающих событий INIT (получатель ещё не начинал получать эти испытания) и FIN этих же испытаний.
+        self.__init: Dict[TestId, List[Optional[IContainer]]] = {}
+        self.__fin: Dict[TestId, List[Optional[IContainer]]] = {}
+        # Вытесненные испытания, ещё не завершившиеся: их последующие состояния отбрасываются при постановке.
+        self.__evicted: Set[TestId] = set()
+        # Количество непустых ячеек.
+        self.__size: int = 0
+
+    def put(self, item: IContainer, block: bool = True, timeout: Optional[float] = None) -> None:
+        with self.not_full:
+            # Свежее промежуточное состояние на месте устаревшего места в очереди не занимает, а очередь
+            # с вытеснением места не ждёт: ни то, ни другое не проверяет ёмкость.
+            if self.__replace(item):
+                return
+            if self.__evict:
+                self._put(item)
+                self.unfinished_tasks += 1
+                self.not_empty.notify()
+                return
+        super().put(item, block, timeout)
+
+    def _qsize(self) -> int:
+        return self.__size
+
+    def __replace(self, item: IContainer) -> bool:
+        """ Поставить промежуточное состояние на место ожидающего состояния того же испытания.
+
+        :return: Если == False, ожидающего состояния нет (или это не промежуточное состояние), замены не было.
+        """
+        if not isinstance(item, BioContainer):
+            return False
+        test_id, bio = item.get()
+        if bio != BioEnum.ALIVE:
+            return False
+        slot: Optional[List[Optional[IContainer]]] = self.__alive.get(test_id)
+        if slot is None:
+            return False
+        slot[0] = item
+        self.__dropped(1)
+        return True
+
+    def _put(self, item: IContainer) -> None:
+        if isinstance(item, BioContainer):
+            test_id, bio = item.get()
+            if test_id in self.__evicted:
+                # Испытание вытеснено: получатель его уже не увидит.
+                if bio == BioEnum.FIN:
+                    self.__evicted.discard(test_id)
+                self.__dropped(1)
+                return
+            if self.__replace(item):
+                return
+            if bio == BioEnum.ALIVE:
+                slot: List[Optional[IContainer]] = [item]
+                self.__alive[test_id] = slot
+                self.__append(slot)
+                return
+            pending: Optional[List[Optional[IContainer]]] = self.__alive.pop(test_id, None)
+            if pending is not None and bio == BioEnum.FIN:
+                # После события следующее промежуточное состояние встаёт в очередь за ним.
+                self.__drop(pending)
+            slot = [item]
+            if bio == BioEnum.INIT:
+                self.__init[test_id] = slot
+            elif bio == BioEnum.FIN and test_id in self.__init:
+                self.__fin[test_id] = slot
+            self.__append(slot)
+            return
+        self.__append([item])
+
+    def _get(self) -> IContainer:
+        while True:
+            slot: List[Optional[IContainer]] = self.__slots.popleft()
+            item: Optional[IContainer] = slot[0]
+            if item is not None:
+                break
+        self.__size -= 1
+        if isinstance(item, BioContainer):
+            test_id, _ = item.get()
+            for cells in (self.__alive, self.__init, self.__fin):
+                if cells.get(test_id) is slot:
+                    del cells[test_id]
+        return item
+
+    def __append(self, slot: List[Optional[IContainer]]) -> None:
+        """ Поставить ячейку в конец очереди, соблюдая ограничение её длины и ёмкость (при вытеснении). """
+        self.__slots.append(slot)
+        self.__size += 1
+        if 0 < self.__window < self.__size:
+            self.__drop_oldest_alive()
+        if self.__evict and 0 < self.maxsize < self.__size:
+            if not self.__drop_oldest_test():
+                self.__drop_oldest_alive()
+
+    def __drop_oldest_alive(self) -> bool:
+        """ Отбросить самое старое ожидающее промежуточное состояние.
+
+        :return: Если == False, промежуточных состояний в очереди нет.
+        """
+        for oldest in self.__slots:
+            item: Optional[IContainer] = oldest[0]
+            if isinstance(item, BioContainer):
+                test_id, bio = item.get()
+                if bio == BioEnum.ALIVE:
+                    if self.__alive.get(test_id) is oldest:
+                        del self.__alive[test_id]
+                    self.__drop(oldest)
+                    return True
+        return False
+
+    def __drop_oldest_test(self) -> bool:
+        """ Вытеснить самое старое испытание, которое получатель ещё не начинал получать.
+
+        :return: Если == False, таких испытаний в очереди нет.
+        """
+        if len(self.__init) == 0:
+            return False
+        # Словарь упорядочен по постановке в очередь: первым идёт самое старое событие INIT.
+        test_id: TestId = next(iter(self.__init))
+        self.__drop(self.__init.pop(test_id))
+        alive: Optional[List[Optional[IContainer]]] = self.__alive.pop(test_id, None)
+        if alive is not None:
+            self.__drop(alive)
+        fin: Optional[List[Optional[IContainer]]] = self.__fin.pop(test_id, None)
+        if fin is not None:
+            self.__drop(fin)
+        else:
+            self.__evicted.add(test_id)
+        return True
+
+    def __drop(self, slot: List[Optional[IContainer]]) -> None:
+        """ Отбросить контейнер ячейки. """
+        slot[0] = None
+        self.__size -= 1
+        self.__dropped(1)
+        if len(self.__slots) > 2 * self.__size + 16:
+            # Пустых ячеек накопилось больше, чем непустых: очередь уплотняется.
+            self.__slots = deque(cell for cell in self.__slots if cell[0] is not None)
+
+    def __dropped(self, count: int) -> None:
+        """ Сообщить об отброшенных контейнерах. """
+        if self.__drop_listener is not None:
+            self.__drop_listener(count)
+
+
+def put(queue: Queue, item: TransferredData, overflow: OverflowEnum) -> int:
+    """ Поставить элемент (контейнер, кадр) в очередь ограниченной ёмкости согласно политике переполнения.
+
+    :param queue: Очередь канала.
+    :param item: Элемент очереди.
+    :param overflow: Политика переполнения.
+    :return: Количество отброшенных элементов. При DROP_NEWEST отбрасывается сам ставящийся в очередь элемент.
+    """
+    if overflow == OverflowEnum.BLOCK:
+        queue.put(item)
+        return 0
+    if overflow == OverflowEnum.EVICT:
+        # Очередь с вытеснением (или без ограничения ёмкости) места не ждёт.
+        queue.put_nowait(item)
+        return 0
+    dropped: int = 0
+    while True:
+        try:
+            queue.put_nowait(item)
+            return dropped
+        except Full:
+            if overflow == OverflowEnum.DROP_NEWEST:
+                return 1
+            if overflow == OverflowEnum.ERROR:
+                raise Full("Wire queue capacity {} is exhausted.".format(queue.maxsize))
+        try:
+            # DROP_OLDEST: освободить место под новый контейнер.
+            queue.get_nowait()
+            dropped += 1
+        except Empty:
+            # Получатель успел освободить место сам.
+            pass
 
 
 class Wire(IWire):
     """ Односторонний канал передачи данных. Внутри очередь передачи непосредственно объектов. """
-    def __init__(self, sender: A, receiver: A, data_type: D):
+    def __init__(self, sender: A, receiver: A, data_type: D, queue: Optional[Queue] = None, capacity: int = 0,
+                 overflow: OverflowEnum = OverflowEnum.BLOCK):
         """
 
         :param sender: Отправитель данных.
         :param receiver: Получатель данных.
         :param data_type: Тип передаваемых данных.
+        :param queue: Очередь передачи данных (например, *LatestValueQueue*), её ёмкость задаётся при её создании.
+        None - обычная очередь ёмкостью *capacity*
+        :param capacity: Ёмкость канала: сколько контейнеров может ожидать получения. 0 - без ограничения.
+        :param overflow: Что делать отправителю, если канал заполнен.
         """
         super().__init__(sender, receiver, data_type)
 
@@ -19,10 +260,34 @@ class Wire(IWire):
         self.__type: D = data_type
 
         # Очередь передачи данных.
-        self.__queue: Queue = Queue()
+        self.__queue: Queue = Queue(capacity) if queue is None else queue
+        assert overflow != OverflowEnum.EVICT or isinstance(self.__queue, LatestValueQueue) and self.__queue.evicts, \
+            "EVICT overflow policy requires a LatestValueQueue created with evict=True."
+        self.__overflow: OverflowEnum = overflow
+        # Статистика канала. None - сбор статистики выключен.
+        self.__stats: Optional[WireStats] = wire_metrics.attach(self, sender, receiver, data_type)
+        if self.__stats is not None and isinstance(self.__queue, LatestValueQueue):
+            # Контейнеры, отброшенные самой очередью, тоже потеряны для получателя.
+            self.__queue.set_drop_listener(self.__stats.discarded)
+        # События, подписанные на поступление данных в канал.
+        self.__events: List[Event] = []
+        self.__events_lock: Lock = Lock()
 
     def send(self, cargo: IContainer) -> None:
-        self.__queue.put(cargo)
+        if self.__stats is None:
+            if put(self.__queue, cargo, self.__overflow) > 0 and self.__overflow == OverflowEnum.DROP_NEWEST:
+                return
+        else:
+            start: float = perf_counter()
+            self.__stats.stamp(cargo)
+            dropped: int = put(self.__queue, cargo, self.__overflow)
+            self.__stats.sent(perf_counter() - start, dropped)
+            if dropped > 0 and self.__overflow == OverflowEnum.DROP_NEWEST:
+                return
+            self.__stats.depth(self.__queue.qsize())
+        with self.__events_lock:
+            for event in self.__events:
+                event.set()
 
     def get_receiver(self) -> A:
         return self.__receiver
@@ -30,8 +295,26 @@ class Wire(IWire):
     def get_sending_type(self) -> D:
         return self.__type
 
-    def receive(self) -> IContainer:
-        return self.__queue.get()
+    def receive(self, timeout: Optional[float] = None) -> Optional[IContainer]:
+        start: float = perf_counter()
+        try:
+            container: IContainer = self.__queue.get(timeout=timeout)
+        except Empty:
+            container = None
+        if self.__stats is not None:
+            if container is None:
+                self.__stats.waited(perf_counter() - start)
+            else:
+                self.__stats.received(container, self.__queue.qsize(), perf_counter() - start)
+        return container
+
+    def subscribe(self, event: Event) -> None:
+        with self.__events_lock:
+            self.__events.append(event)
+
+    def unsubscribe(self, event: Event) -> None:
+        with self.__events_lock:
+            self.__events.remove(event)
 
     def has_incoming(self) -> bool:
         return not self.__queue.empty()
@@ -43,20 +326,23 @@ class Wire(IWire):
         return self.__type
 
 
-class ReportWire(Wire):
+class ReportWire(Wire, IReportWire):
     """ Двусторонний канал передачи данных. """
-    def __init__(self, sender: A, receiver: A, data_type: D, report_type: D):
+    def __init__(self, sender: A, receiver: A, data_type: D, report_type: D, capacity: int = 0,
+                 overflow: OverflowEnum = OverflowEnum.BLOCK):
         """
 
         :param sender: Отправитель данных.
         :param receiver: Получатель данных.
         :param data_type: Тип передаваемых в прямом направлении данных.
         :param report_type: Тип передаваемых в обратном направлении данных.
+        :param capacity: Ёмкость каждого из направлений канала. 0 - без ограничения.
+        :param overflow: Политика переполнения каждого из направлений канала.
         """
-        super().__init__(sender, receiver, data_type)
+        super().__init__(sender, receiver, data_type, capacity=capacity, overflow=overflow)
 
         # Линия рапорта, для передачи данных в обратном направлении.
-        self.__report_wire = Wire(receiver, sender, report_type)
+        self.__report_wire = Wire(receiver, sender, report_type, capacity=capacity, overflow=overflow)
 
     def get_report_sender(self) -> ISender:
         """ Получить интерфейс отправителя рапортов. """
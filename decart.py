@@ -2,6 +2,8 @@
 from point import VectorComplex
 from cmath import rect
 from typing import List
+from torch import Tensor, tensor, complex as torch_complex, view_as_real
+from app_type import PHYSICS_DTYPE
 
 
 def complexChangeSystemCoordinatesUniversal(vectorInOldCoordinates: VectorComplex,
@@ -50,7 +52,69 @@ def pointsListToNewCoordinateSystem(pointsListInOldSystem: List[VectorComplex],
     :param isDiffType: если из левой в левую или из правой в правую = False. Иначе = True
     :return: список точек в новой системе координат
     """
+    # Сдвиг, отражение и поворот - на комплексных числах, без промежуточных векторов на каждую точку.
+    origin: complex = newSystemOrigin.cardanus
+    rotation: complex = 1 / rect(1., angleRadians)
     result: List[VectorComplex] = []
-    for _, vector in enumerate(pointsListInOldSystem):
-        result.append(complexChangeSystemCoordinatesUniversal(vector, newSystemOrigin, angleRadians, isDiffType))
+    for vector in pointsListInOldSystem:
+        shifted: complex = vector.cardanus - origin
+        if isDiffType:
+            shifted = shifted.conjugate()
+        result.append(VectorComplex.get_instance_c(shifted * rotation))
     return result
+
+
+def complexArrayToNewCoordinateSystem(pointsInOldSystem: Tensor, newSystemOrigin: complex,
+                                      angleRadians=0., isDiffType=False) -> Tensor:
+    """
+    Перевод массива точек из одной системы координат в другую одной операцией над всем массивом
+    (см. *complexChangeSystemCoordinatesUniversal()*).
+
+    :param pointsInOldSystem: комплексный тензор координат точек в старой системе координат (real - x, imag - y)
+    :param newSystemOrigin: начало новой системы координат в старой
+    :param angleRadians: угол, на который повёрнута новая система координат относительно старой
+    :param isDiffType: если из левой в левую или из правой в правую = False. Иначе = True
+    :return: комплексный тензор координат точек в новой системе координат, той же формы
+    """
+    result: Tensor = pointsInOldSystem - newSystemOrigin
+    if isDiffType:
+        # При смене типа системы координат меняется знак ординаты - комплексное сопряжение.
+        result = result.conj().resolve_conj()
+    return result / rect(1., angleRadians)
+
+
+def decartArrayToNewCoordinateSystem(pointsInOldSystem: Tensor, newSystemOrigin: complex,
+                                     angleRadians=0., isDiffType=False) -> Tensor:
+    """
+    Перевод массива точек, заданных парами декартовых координат, из одной системы координат в другую
+    (см. *complexArrayToNewCoordinateSystem()*).
+
+    :param pointsInOldSystem: тензор координат точек в старой системе координат (..., 2), последнее измерение - x, y
+    :param newSystemOrigin: начало новой системы координат в старой
+    :param angleRadians: угол, на который повёрнута новая система координат относительно старой
+    :param isDiffType: если из левой в левую или из правой в правую = False. Иначе = True
+    :return: тензор координат точек в новой системе координат (..., 2)
+    """
+    points: Tensor = torch_complex(pointsInOldSystem[..., 0], pointsInOldSystem[..., 1])
+    return view_as_real(complexArrayToNewCoordinateSystem(points, newSystemOrigin, angleRadians, isDiffType))
+
+
+def flatListToComplexArray(coords: List[float]) -> Tensor:
+    """
+    Перевод сплошного списка координат точек (вида канвы: [x0, y0, x1, y1, ...]) в комплексный тензор.
+
+    :param coords: сплошной список координат
+    :return: комплексный тензор точек (len(coords) // 2)
+    """
+    pairs: Tensor = tensor(coords, dtype=PHYSICS_DTYPE).view(-1, 2)
+    return torch_complex(pairs[:, 0], pairs[:, 1])
+
+
+def complexArrayToFlatList(points: Tensor) -> List[float]:
+    """
+    Перевод комплексного тензора точек в сплошной список координат (вида канвы: [x0, y0, x1, y1, ...]).
+
+    :param points: комплексный тензор точек (N)
+    :return: сплошной список координат
+    """
+    return view_as_real(points).reshape(-1).tolist()
@@ -0,0 +1,149 @@
+""" Численные методы интегрирования уравнений движения для пакетной физической модели.
+
+Интегрирование идёт внутри интервала между считываниями показаний датчиков, который задаёт планировщик
+(*CheckPeriodBatch*): в конце каждого интервала нейросеть получает состояние и выдаёт новые команды. Поэтому
+методы высокого порядка повышают точность шага, но не укрупняют его - шаг модели не длиннее интервала
+считывания. Укрупнение шага при выключенных двигателях - перемотка баллистического полёта (*CoastBatch*).
+"""
+from abc import ABC, abstractmethod
+from typing import Callable, Tuple
+from torch import Tensor, where, zeros_like, nonzero, full_like, minimum
+
+# Вектор состояния интегрирования - строка матрицы (одно испытание):
+# сначала обобщённые координаты, затем (в том же порядке) их производные по времени.
+# Для ступени: [x, y, theta, vx, vy, w], где theta - угол поворота от начала интервала.
+# Производная вектора состояния по времени. Аргументы: матрица векторов состояния (M, 2K)
+# и номера строк батча (M), для которых она посчитана (нужны, чтобы взять команды и ориентацию этих испытаний).
+Derivative = Callable[[Tensor, Tensor], Tensor]
+
+
+class IIntegrator(ABC):
+    """ Интерфейс метода интегрирования на интервале между считываниями показаний датчиков. """
+    @abstractmethod
+    def integrate(self, derivative: Derivative, y: Tensor, h: Tensor) -> Tensor:
+        """ Состояния в конце интервала.
+
+        :param derivative: Производная вектора состояния.
+        :param y: Матрица векторов состояния в начале интервала (N, 2K)
+        :param h: Длительность интервала для каждого испытания, секунды (N)
+        :return: Матрица векторов состояния в конце интервала (N, 2K)
+        """
+        ...
+
+
+class SemiImplicitEuler(IIntegrator):
+    """ Полунеявный (симплектический) метод Эйлера: сначала скорости, затем координаты по новым скоростям.
+    Один шаг на весь интервал. Этим методом физическая модель считала изначально. """
+    def integrate(self, derivative: Derivative, y: Tensor, h: Tensor) -> Tensor:
+        half: int = y.size(dim=1) // 2
+        rows: Tensor = nonzero(full_like(h, True, dtype=bool)).squeeze(1)
+        h = h.unsqueeze(1)
+
+        velocity: Tensor = y[:, half:] + derivative(y, rows)[:, half:] * h
+        position: Tensor = y[:, :half] + velocity * h
+
+        result: Tensor = y.clone()
+        result[:, :half] = position
+        result[:, half:] = velocity
+        return result
+
+
+class RK4(IIntegrator):
+    """ Классический метод Рунге-Кутты 4-го порядка. Один шаг на весь интервал. """
+    def integrate(self, derivative: Derivative, y: Tensor, h: Tensor) -> Tensor:
+        rows: Tensor = nonzero(full_like(h, True, dtype=bool)).squeeze(1)
+        h = h.unsqueeze(1)
+
+        k1: Tensor = derivative(y, rows)
+        k2: Tensor = derivative(y + k1 * (h / 2), rows)
+        k3: Tensor = derivative(y + k2 * (h / 2), rows)
+        k4: Tensor = derivative(y + k3 * h, rows)
+
+        return y + (k1 + 2 * k2 + 2 * k3 + k4) * (h / 6)
+
+
+class RK45(IIntegrator):
+    """ Метод Дормана-Принса 5(4) с автоматическим выбором шага. Шаг выбирается отдельно для каждого испытания так,
+    чтобы оценка локальной ошибки не превышала заданную точность. Первая попытка - весь интервал целиком,
+    длиннее интервала шаг не бывает: автоматический выбор только дробит интервал, где точности не хватает. """
+    # Коэффициенты таблицы Бутчера.
+    __A = ((1 / 5,),
+           (3 / 40, 9 / 40),
+           (44 / 45, -56 / 15, 32 / 9),
+           (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+           (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+           (35 / 384, 0., 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84))
+    # Разность весов решений 5-го и 4-го порядка (для оценки ошибки).
+    __E = (71 / 57600, 0., -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40)
+
+    def __init__(self, tolerance: float = 1e-6, max_steps: int = 10000):
+        """
+
+        :param tolerance: Допустимая локальная ошибка (абсолютная и относительная) на одном шаге.
+        :param max_steps: Максимальное количество попыток шага на интервал (защита от зацикливания).
+        """
+        self.__tolerance: float = tolerance
+        self.__max_steps: int = max_steps
+        # Количество попыток шага в последнем вызове *integrate()*
+        self.__last_steps: int = 0
+
+    @property
+    def last_steps(self) -> int:
+        """ Количество попыток шага (общих для батча) в последнем вызове *integrate()* """
+        return self.__last_steps
+
+    def __step(self, derivative: Derivative, y: Tensor, rows: Tensor, h: Tensor) -> Tuple[Tensor, Tensor]:
+        """ Один шаг Дормана-Принса.
+
+        :return: Решение 5-го порядка и нормированная оценка ошибки для каждой строки (<= 1 - шаг принимается).
+        """
+        k = [derivative(y, rows)]
+        for a_row in RK45.__A:
+            increment: Tensor = zeros_like(y)
+            for a, ki in zip(a_row, k):
+                if a != 0.:
+                    increment = increment + ki * a
+            k.append(derivative(y + increment * h, rows))
+
+        # Последняя стадия вычислена в точке решения 5-го порядка (свойство FSAL метода).
+        result: Tensor = y + increment * h
+
+        error: Tensor = zeros_like(y)
+        for e, ki in zip(RK45.__E, k):
+            if e != 0.:
+                error = error + ki * e
+        error = error * h
+
+        scale: Tensor = self.__tolerance * (1 + y.abs().maximum(result.abs()))
+        return result, (error.abs() / scale).amax(dim=1)
+
+    def integrate(self, derivative: Derivative, y: Tensor, h: Tensor) -> Tensor:
+        result: Tensor = y.clone()
+        # Оставшееся до конца интервала время и текущий шаг для каждого испытания.
+        remaining: Tensor = h.clone()
+        step: Tensor = h.clone()
+
+        self.__last_steps = 0
+        rows: Tensor = nonzero(remaining > 0).squeeze(1)
+        while rows.numel() > 0:
+            self.__last_steps += 1
+            if self.__last_steps > self.__max_steps:
+                raise RuntimeError("RK45 step count exceeds {}. Tolerance {} is unreachable?"
+                                   .format(self.__max_steps, self.__tolerance))
+
+            h_rows: Tensor = minimum(step[rows], remaining[rows])
+            candidate, error = self.__step(derivative, result[rows], rows, h_rows.unsqueeze(1))
+
+            accepted: Tensor = error <= 1.
+            result[rows[accepted]] = candidate[accepted]
+            # Шаг, закончившийся на конце интервала, обнуляет остаток точно (без накопления ошибки округления).
+            remaining[rows] = where(accepted, where(h_rows >= remaining[rows], zeros_like(h_rows),
+                                                    remaining[rows] - h_rows), remaining[rows])
+
+            # Новый шаг: стандартная оценка по ошибке с запасом 0.9 и ограничением изменения в 0.2 .. 5 раз.
+            factor: Tensor = where(error > 0, 0.9 * error.clamp(min=1e-10).pow(-0.2), full_like(error, 5.))
+            step[rows] = h_rows * factor.clamp(0.2, 5.)
+
+            rows = nonzero(remaining > 0).squeeze(1)
+
+        return result
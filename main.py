@@ -1,5 +1,6 @@
 """ Главный файл. Диспетчер. Здесь создаются нити для параллельного исполнения """
 import app_cons
+import signal
 import sys
 
 from app_cons import log_file_name, logger_name
@@ -8,12 +9,17 @@ from stage import Sizes, BigMap
 from tkview.tkview import TkinterView
 from view import ViewInterface
 from con_simp.switcher import Switchboard, Socket
-from con_simp.wire import Wire, ReportWire
-from con_intr.ifaces import AppModulesEnum, DataTypeEnum, RoadEnum
+from con_simp.wire import Wire, ReportWire, LatestValueQueue
+from con_simp.sock_wire import SocketWire, Address
+from con_simp.shm_wire import SharedMemoryWire
+from con_simp.metrics import wire_metrics
+from con_intr.ifaces import AppModulesEnum, DataTypeEnum, RoadEnum, IWire, OverflowEnum
 from thrds_tk.neuronet import NeuronetThread
 from thrds_tk.physics import PhysicsThread
 import importlib
-from app_cfg import PROJECT_DIRECTORY_NAME, PROJECT_CONFIG_NAME
+from app_cfg import PROJECT_DIRECTORY_NAME, PROJECT_CONFIG_NAME, WIRE_TRANSPORT, WIRE_HOST, WIRE_PORT, WIRE_SOCKET_DIR
+from app_cfg import VIEW_WIRE_WINDOW, VIEW_WIRE_CAPACITY, WIRE_METRICS, WIRE_SHM_SLOTS, WIRE_SHM_SLOT_SIZE
+from functools import partial
 from tools import KeyPressCheck
 
 def get_log_handler(out: str):
@@ -55,34 +61,108 @@ def log_init(output: str) -> None:
     handler.setFormatter(formatter)
     logger.addHandler(handler)
 
+class WireFactory:
+    """ Создание каналов передачи данных с транспортом, выбранным в настройках приложения (app_cfg.WIRE_TRANSPORT) """
+    def __init__(self, transport: str = WIRE_TRANSPORT):
+        """
+
+        :param transport: 'queue', 'tcp', 'unix' или 'shm'
+        """
+        assert transport in ('queue', 'tcp', 'unix', 'shm'), "Unknown wire transport: {}".format(transport)
+        self.__transport: str = transport
+        # Количество выданных адресов: номер порта очередного канала транспорта 'tcp'.
+        self.__addresses: int = 0
+
+    def __address(self, sender: AppModulesEnum, receiver: AppModulesEnum, data_type: DataTypeEnum) -> Address:
+        """ Адрес очередного канала. Одинаков на всех узлах, если каналы создаются в одном порядке. """
+        if self.__transport == 'tcp':
+            self.__addresses += 1
+            return WIRE_HOST, WIRE_PORT + self.__addresses - 1
+        return '{}/{}-{}-{}.sock'.format(WIRE_SOCKET_DIR, sender.name, receiver.name, data_type.name).lower()
+
+    @staticmethod
+    def __slots(capacity: int) -> int:
+        """ Количество ячеек буфера канала транспорта 'shm' ёмкостью *capacity* (0 - без ограничения). """
+        return WIRE_SHM_SLOTS if capacity == 0 else min(capacity, WIRE_SHM_SLOTS)
+
+    def wire(self, sender: AppModulesEnum, receiver: AppModulesEnum, data_type: DataTypeEnum, capacity: int = 0,
+             overflow: OverflowEnum = OverflowEnum.BLOCK) -> IWire:
+        """ Односторонний канал.
+
+        :param capacity: Ёмкость канала. 0 - без ограничения.
+        :param overflow: Что делать отправителю, если канал заполнен.
+        """
+        if self.__transport == 'queue':
+            return Wire(sender, receiver, data_type, capacity=capacity, overflow=overflow)
+        if self.__transport == 'shm':
+            return SharedMemoryWire(sender, receiver, data_type, WireFactory.__slots(capacity), WIRE_SHM_SLOT_SIZE,
+                                    overflow)
+        return SocketWire(sender, receiver, data_type, self.__address(sender, receiver, data_type),
+                          capacity=capacity, overflow=overflow)
+
+    def latest_wire(self, sender: AppModulesEnum, receiver: AppModulesEnum, data_type: DataTypeEnum,
+                    window: int = VIEW_WIRE_WINDOW, capacity: int = 0,
+                    overflow: OverflowEnum = OverflowEnum.BLOCK) -> IWire:
+        """ Односторонний канал последних значений: ожидает получения только самое свежее промежуточное состояние
+        каждого испытания (см. *LatestValueQueue*)
+
+        :param window: Ограничение очереди промежуточных состояний.
+        :param capacity: Ёмкость канала. 0 - без ограничения.
+        :param overflow: Что делать отправителю, если канал заполнен. EVICT - очередь канала вытесняет испытания,
+        которые получатель ещё не начинал получать.
+        """
+        # Вытесняет очередь на стороне получателя.
+        evict: bool = overflow == OverflowEnum.EVICT
+        if self.__transport == 'queue':
+            return Wire(sender, receiver, data_type, LatestValueQueue(window, capacity, evict), overflow=overflow)
+        if self.__transport == 'shm':
+            # Буфер вычитывается получателем целиком, устаревшие состояния отбрасывает его очередь.
+            return SharedMemoryWire(sender, receiver, data_type, WireFactory.__slots(capacity), WIRE_SHM_SLOT_SIZE,
+                                    overflow, incoming=partial(LatestValueQueue, window, capacity, evict))
+        return SocketWire(sender, receiver, data_type, self.__address(sender, receiver, data_type),
+                          incoming=LatestValueQueue(window, capacity, evict), capacity=capacity, overflow=overflow)
+
+
 def wires() -> Switchboard:
     """ Реализация сообщений через распределительный щит. """
 
+    # Статистика ведётся каналами, созданными после её включения.
+    wire_metrics.enable(WIRE_METRICS)
+
     switchboard = Switchboard()
-    switchboard.add_wire(Wire(AppModulesEnum.PHYSICS, AppModulesEnum.NEURO, DataTypeEnum.STAGE_STATUS))
-    switchboard.add_wire(Wire(AppModulesEnum.PHYSICS, AppModulesEnum.VIEW, DataTypeEnum.STAGE_STATUS))
-    switchboard.add_wire(Wire(AppModulesEnum.PHYSICS, AppModulesEnum.NEURO, DataTypeEnum.REINFORCEMENT))
-    switchboard.add_wire(ReportWire(AppModulesEnum.PHYSICS, AppModulesEnum.NEURO,
-                                    DataTypeEnum.REMANING_TESTS, DataTypeEnum.REQUESTED_TESTS))
-    switchboard.add_wire(Wire(AppModulesEnum.NEURO, AppModulesEnum.PHYSICS, DataTypeEnum.JETS_COMMAND))
+    factory = WireFactory()
+    # Ёмкость каждого канала ограничена, чтобы расход памяти при долгой работе был предсказуем.
+
+    # Визуализация не должна тормозить обучение или копить кадры: в канале ожидает только последнее состояние
+    # каждого испытания, события начала и окончания испытаний сохраняются. Визуализация следит за одним испытанием
+    # от его INIT до FIN, поэтому при исчерпании ёмкости (визуализация отстала или закрыта) вытесняются испытания,
+    # начало которых она ещё не получила. БФМ не ждёт визуализацию никогда.
+    switchboard.add_wire(factory.latest_wire(AppModulesEnum.PHYSICS, AppModulesEnum.VIEW, DataTypeEnum.STAGE_STATUS,
+                                             capacity=VIEW_WIRE_CAPACITY, overflow=OverflowEnum.EVICT))
+
+    # Шаг обучения: запрос из БНС (команды на двигатели и управляющие флаги)
+    # и ответ БФМ (подкрепления, завершение испытаний и следующий батч состояний).
+    # Запрос и ответ чередуются, поэтому в каждом канале ожидает не больше одного сообщения.
+    switchboard.add_wire(factory.wire(AppModulesEnum.NEURO, AppModulesEnum.PHYSICS, DataTypeEnum.STEP_REQUEST,
+                                      capacity=1, overflow=OverflowEnum.BLOCK))
+    switchboard.add_wire(factory.wire(AppModulesEnum.PHYSICS, AppModulesEnum.NEURO, DataTypeEnum.STEP_RESPONSE,
+                                      capacity=1, overflow=OverflowEnum.BLOCK))
 
     # Команды на завершение вычислительных блоков приложения (по закрытия главного окна, например)н
     # из блока визуализации во все остальные блоки приложения.
-    switchboard.add_wire(Wire(AppModulesEnum.VIEW, AppModulesEnum.PHYSICS, DataTypeEnum.APP_FINISH))
-    switchboard.add_wire(Wire(AppModulesEnum.VIEW, AppModulesEnum.NEURO, DataTypeEnum.APP_FINISH))
+    # Повторная команда ничего не добавляет к ожидающей получения, поэтому отбрасывается.
+    switchboard.add_wire(factory.wire(AppModulesEnum.VIEW, AppModulesEnum.PHYSICS, DataTypeEnum.APP_FINISH,
+                                      capacity=1, overflow=OverflowEnum.DROP_NEWEST))
+    switchboard.add_wire(factory.wire(AppModulesEnum.VIEW, AppModulesEnum.NEURO, DataTypeEnum.APP_FINISH,
+                                      capacity=1, overflow=OverflowEnum.DROP_NEWEST))
 
     # Если какой-либо блок приложение желает закрыть приложение,
     # то он должен отправить запрос на это в блок визуализации.
     # В свою очередь, блок визуализации отправит команду на завершение приложения
     # во ВСЕ блоки приложения (включая и тот, который отправлял запрос.) для завершения их работы.
     # Каналы для запросов закрытия приложения (получатель - модуль визуализации)
-    switchboard.add_wire(Wire(AppModulesEnum.NEURO, AppModulesEnum.VIEW, DataTypeEnum.APP_FINISH_REQUEST))
-
-    # Сигнальная линия для передачи команд-семафоров из БНС в БФМ.
-    switchboard.add_wire(Wire(AppModulesEnum.NEURO, AppModulesEnum.PHYSICS, DataTypeEnum.ENV_ROAD))
-
-    # Команда на сохранение состояния процесса обучения.
-    switchboard.add_wire(Wire(AppModulesEnum.NEURO, AppModulesEnum.PHYSICS, DataTypeEnum.ENV_SAVE))
+    switchboard.add_wire(factory.wire(AppModulesEnum.NEURO, AppModulesEnum.VIEW, DataTypeEnum.APP_FINISH_REQUEST,
+                                      capacity=1, overflow=OverflowEnum.DROP_NEWEST))
 
     return switchboard
 
@@ -112,6 +192,11 @@ if __name__ == "__main__":
 
     switchboard = wires()
 
+    if WIRE_METRICS and hasattr(signal, 'SIGUSR1'):
+        # Статистика каналов по требованию, не прерывая обучения.
+        signal.signal(signal.SIGUSR1,
+                      lambda signum, frame: logger.info("Wire metrics:\n{}".format(wire_metrics.dump())))
+
     # Нить модели реального мира
     # todo Абстрагировать тип нити, ибо структура вычислительных модулей может быть и не нитевой.
     realWorldThread: PhysicsThread = PhysicsThread('realWorldThread',
@@ -145,6 +230,9 @@ if __name__ == "__main__":
     realWorldThread.join()
     neuroNetThread.join()
 
+    if WIRE_METRICS:
+        logger.info("Wire metrics:\n{}".format(wire_metrics.dump()))
+
     # Вывод результирующего сообщения по завершению приложения.
     if hasattr(project_cfg, 'project_report'):
         # Если сообщение определено в файле настроек проекта.
@@ -6,6 +6,7 @@ from decart import complexChangeSystemCoordinatesUniversal
 from structures import StageControlCommands, RealWorldStageStatusN
 from tools import math_int
 from app_cons import GRAVITY_ACCELERATION_ABS
+from typing import List, Tuple, Optional
 
 # Физическая модель ступени представляет из себя три жёстко связанные точки (лежат на оси ступени)
 # массой m1 (центр дна ракеты), m2 (средняя точка, центр масс), m3 (верх ступени)
@@ -131,6 +132,70 @@ class CheckPeriod:
         return math_int(CheckPeriod.to_sec(value) * 1000)
 
 
+class JetsTable:
+    """
+    Суммарные сила (в СКС) и момент силы реактивных двигателей для всех 2**5 комбинаций команд. Считается один раз
+    из параметров *stage.Sizes* и *stage.Engine*, далее только выбирается по номеру комбинации.
+    Номер комбинации - число из битов команд в порядке *tools.action_variants()*
+    (верхний левый, верхний правый, нижний левый, нижний правый, маршевый), первый бит - старший.
+    """
+    # Точки приложения (в СКС) и силы (в СКС, ньютоны) двигателей в порядке битов номера комбинации.
+    # Левые рулевые двигатели толкают ступень вправо (по оси абцисс СКС), правые - влево.
+    engines: List[Tuple[complex, complex]] = [
+        # верхний левый
+        (complex(0., stage.Sizes.topEnginesLeverage), complex(stage.Engine.steeringEngineForce, 0.)),
+        # верхний правый
+        (complex(0., stage.Sizes.topEnginesLeverage), complex(- stage.Engine.steeringEngineForce, 0.)),
+        # нижний левый
+        (complex(0., - stage.Sizes.downEnginesLeverage), complex(stage.Engine.steeringEngineForce, 0.)),
+        # нижний правый
+        (complex(0., - stage.Sizes.downEnginesLeverage), complex(- stage.Engine.steeringEngineForce, 0.)),
+        # маршевый
+        (complex(0., - stage.Sizes.massCenterFromLandingPlaneDistance), complex(0., stage.Engine.mainEngineForce))
+    ]
+
+    # Суммарные силы двигателей в СКС по номеру комбинации.
+    __forces: Optional[List[complex]] = None
+    # Суммарные моменты сил двигателей относительно центра масс по номеру комбинации (против часовой стрелки - плюс).
+    __torques: Optional[List[float]] = None
+
+    @classmethod
+    def __build(cls) -> None:
+        """ Расчёт таблицы. """
+        cls.__forces, cls.__torques = [], []
+        for index in range(2 ** len(cls.engines)):
+            force: complex = 0j
+            torque: float = 0.
+            for bit, (point, engine_force) in enumerate(cls.engines):
+                if index >> (len(cls.engines) - 1 - bit) & 1:
+                    force += engine_force
+                    # Момент силы - векторное произведение плеча на силу.
+                    torque += point.real * engine_force.imag - point.imag * engine_force.real
+            cls.__forces.append(force)
+            cls.__torques.append(torque)
+
+    @classmethod
+    def forces(cls) -> List[complex]:
+        """ Суммарные силы двигателей в СКС, ньютоны, по номеру комбинации. """
+        if cls.__forces is None:
+            cls.__build()
+        return cls.__forces
+
+    @classmethod
+    def torques(cls) -> List[float]:
+        """ Суммарные моменты сил двигателей, ньютон-метры, по номеру комбинации. """
+        if cls.__torques is None:
+            cls.__build()
+        return cls.__torques
+
+    @classmethod
+    def index(cls, control_commands: StageControlCommands) -> int:
+        """ Номер комбинации команд на двигатели. """
+        return (bool(control_commands.top_left) << 4) | (bool(control_commands.top_right) << 3) \
+            | (bool(control_commands.down_left) << 2) | (bool(control_commands.down_right) << 1) \
+            | bool(control_commands.main)
+
+
 class Action:
     """
     Класс всех сил действующих на ступень. Необходим для компактной их передачи в методах.
@@ -211,8 +276,17 @@ class Moving:
         # Если время действия сил равно нулю, то ускорение от этих сил заведомо равно нулю
         # if t == 0.: return 0.
 
-        # pass
-        return 0.
+        # Точки приложения сил двигателей в СКС (см. JetsTable.engines) и сами силы в СКС.
+        points_forces = [(JetsTable.engines[0][0], forces.FtopLeft), (JetsTable.engines[1][0], forces.FtopRight),
+                         (JetsTable.engines[2][0], forces.FdownLeft), (JetsTable.engines[3][0], forces.FdownRight),
+                         (JetsTable.engines[4][0], forces.FdownUp)]
+        # Суммарный момент сил относительно центра масс (векторное произведение плеча на силу).
+        # Силы тяжести приложены к точкам на продольной оси, их суммарный момент относительно центра масс равен нулю.
+        torque = 0.
+        for point, force in points_forces:
+            torque += point.real * force.y - point.imag * force.x
+        # Второй закон Ньютона для вращательного движения.
+        return torque / stage.Stage.InertionMoment
 
     @classmethod
     def get_new_status(cls, control_commands: StageControlCommands,
@@ -222,19 +296,25 @@ class Moving:
         :param control_commands: управляющие команды на двигатели изделия
         :param previous_status: предыдущее состояние изделия
         """
-        if control_commands.all_off():
-            # Если все двигатели выключены, все силы от двигателей сделать нулевыми
-            pass
+        # Если все двигатели выключены, сила от двигателей по таблице нулевая.
+        index: int = JetsTable.index(control_commands)
 
         duration = CheckPeriod.set_duration(previous_status.position)
         sec_duration = CheckPeriod.to_sec(duration)
 
-        line_axeleration = Moving.get_a(Action(fdownup=VectorComplex.get_instance(0., stage.Engine.mainEngineForce)))
-        line_velocity = previous_status.velocity + line_axeleration * sec_duration
-        line_position = previous_status.position + line_velocity * sec_duration
+        # Сила двигателей из СКС в СКЦМ: ось ординат СКС - вектор ориентации, ось абцисс - он же, повёрнутый на -90°.
+        force = JetsTable.forces()[index] * previous_status.orientation.cardanus * -1j
+        mass = stage.Stage.topMass + stage.Stage.centerMass + stage.Stage.downMass
+        # Промежуточные векторы - новые объекты без внешних ссылок, поэтому складываются на месте.
+        line_axeleration = VectorComplex.get_instance_c(force / mass)
+        line_axeleration += GravitationalAcceleration
+        line_velocity = line_axeleration * sec_duration
+        line_velocity += previous_status.velocity
+        line_position = line_velocity * sec_duration
+        line_position += previous_status.position
 
         # угловое ускорение
-        angular_axeleration = 0.
+        angular_axeleration = JetsTable.torques()[index] / stage.Stage.InertionMoment
         # угловая скорость, рад/сек
         angular_velocity = previous_status.angular_velocity + angular_axeleration * sec_duration
         # поворот на угол, рад.
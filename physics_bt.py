@@ -0,0 +1,481 @@
+""" Пакетный расчёт движения ступени: состояния N испытаний пересчитываются за один вызов над тензорами. """
+from typing import List, Tuple, Optional
+from torch import Tensor, tensor, stack, where, zeros_like, unique, nonzero, cat, arange, full_like, empty, ones_like
+from app_type import PHYSICS_DTYPE
+from batch import StatesBatch, FREQUENCY, BORDER_COUNTER, JETS_WIDTH
+from integrators import IIntegrator, SemiImplicitEuler
+from physics import CheckPeriod, GravitationalAcceleration, JetsTable
+import stage
+
+# Пакетный аналог physics.Moving.
+# Все величины батча - столбцы одной матрицы (см. batch.py), поэтому за один шаг
+# создаётся одна новая матрица состояний, вместо нескольких VectorComplex на каждое испытание.
+
+# Номера столбцов вектора состояния интегрирования (см. integrators.py): [x, y, theta, vx, vy, w]
+Y, THETA, VX, VY, W = 1, 2, 3, 4, 5
+
+# Высота центра масс над точкой приземления в момент касания поверхности, метров (как в tools.Finish).
+CONTACT_Y: float = stage.Sizes.massCenterFromLandingPlaneDistance
+
+
+class CheckPeriodBatch:
+    """
+    Интервалы считывания показаний датчиков для батча испытаний. В отличие от *CheckPeriod*, состояние гистерезиса
+    (текущий интервал и счётчик нахождения в диапазоне) хранится отдельно для каждого испытания - в служебных столбцах
+    матрицы состояний, и потому переезжает вместе с испытанием из батча в хранилище и обратно.
+    """
+    # Границы диапазонов (те же, что и в CheckPeriod.set_duration): диапазон выбирается по первой границе,
+    # которую не достигает дальность до точки приземления или высота.
+    # Границы по дальности до точки приземления, метров
+    __module_borders: Tensor = tensor([1., 10., 100., 10000., 100000.], dtype=PHYSICS_DTYPE)
+    # Границы по высоте, метров
+    __altitude_borders: Tensor = tensor([1., 5., 50., 5000., 50000.], dtype=PHYSICS_DTYPE)
+    # Интервалы считывания показаний в диапазонах, миллисекунды. Последний - один раз в минуту.
+    __frequencies: Tensor = tensor([1., 10., 100., 1000., 10000., 60000.], dtype=PHYSICS_DTYPE)
+
+    @classmethod
+    def default_durations(cls, position: Tensor) -> Tensor:
+        """ Интервалы считывания показаний по умолчанию (без учёта гистерезиса).
+
+        :param position: Матрица векторов расстояния от точки приземления до центра масс изделий (N, 2)
+        :return: Интервалы, миллисекунды (N)
+        """
+        # дальность до точки приземления, метров
+        module: Tensor = position.norm(dim=1) + stage.Sizes.massCenterFromLandingPlaneDistance
+        # высота до поверхности, метров
+        altitude: Tensor = position[:, 1] + stage.Sizes.massCenterFromLandingPlaneDistance
+
+        # Матрица (N, 5): граница диапазона не достигнута по дальности или по высоте.
+        below: Tensor = (module.unsqueeze(1) < cls.__module_borders) | (altitude.unsqueeze(1) < cls.__altitude_borders)
+        # Номер диапазона: первая недостигнутая граница, если все границы пройдены - самый верхний диапазон.
+        band: Tensor = where(below.any(dim=1), below.int().argmax(dim=1), len(cls.__frequencies) - 1)
+
+        return cls.__frequencies[band]
+
+    @classmethod
+    def set_duration(cls, states: StatesBatch, border_max=10) -> Tensor:
+        """
+        Периодичность считывания показаний датчиков для каждого испытания батча. Вызывать только при установке нового
+        состояния изделий: обновляет состояние гистерезиса в служебных столбцах *states*.
+
+        :param states: Текущие состояния изделий.
+        :param border_max: порог нахождения в диапазоне, после которого считается, что нахождение в нём устойчиво
+        :return: периодичность считывания показаний датчиков, миллисекунды (N)
+        """
+        default_frequency: Tensor = cls.default_durations(states.position)
+        current_frequency: Tensor = states.data[:, FREQUENCY]
+        border_counter: Tensor = states.data[:, BORDER_COUNTER]
+
+        # Переход в диапазон сверху (по высоте/дистанции) или нахождение в нём:
+        # сразу переходим на периодичность диапазона.
+        from_above: Tensor = current_frequency >= default_frequency
+        # Оказались в диапазоне после посещения нижнего и уже устойчиво в нём находимся.
+        settled: Tensor = border_counter > border_max
+        # Новая периодичность фиксируется в обоих случаях.
+        switch: Tensor = from_above | settled
+
+        states.data[:, FREQUENCY] = where(switch, default_frequency, current_frequency)
+        # В остальных случаях отмечаем длительность нахождения в верхнем диапазоне после нижнего,
+        # но сохраняем периодичность по нижнему диапазону высоты/дистанции.
+        states.data[:, BORDER_COUNTER] = where(switch, zeros_like(border_counter), border_counter + 1)
+
+        return states.data[:, FREQUENCY].clone()
+
+    @classmethod
+    def cohorts(cls, durations: Tensor) -> List[Tuple[int, Tensor]]:
+        """ Группировка испытаний батча по интервалу считывания показаний.
+
+        :param durations: Интервалы считывания показаний, миллисекунды (N)
+        :return: Список пар (интервал, номера строк батча с этим интервалом).
+        """
+        values, inverse = unique(durations, return_inverse=True)
+        return [(int(value), nonzero(inverse == i).squeeze(1)) for i, value in enumerate(values.tolist())]
+
+
+class CoastBatch:
+    """
+    Баллистический полёт изделия (все двигатели выключены): только сила тяжести и постоянная угловая скорость.
+    Для него есть решение в замкнутой форме, поэтому испытание можно сразу перемотать к ближайшему событию -
+    смене диапазона интервалов считывания показаний или касанию поверхности, не интегрируя по шагам.
+    """
+    # Ускорение свободного падения в СКИП
+    __g: Tensor = tensor([GravitationalAcceleration.x, GravitationalAcceleration.y], dtype=PHYSICS_DTYPE)
+    # Количество удвоений шага при поиске интервала, в котором меняется диапазон (2**40 мс - около 35 лет).
+    __doublings: int = 40
+    # Количество делений пополам при уточнении момента смены диапазона.
+    __bisections: int = 40
+
+    @classmethod
+    def coasting(cls, jets: Tensor) -> Tensor:
+        """ Испытания, в которых все двигатели выключены (аналог *StageControlCommands.all_off()*).
+
+        :param jets: Матрица команд на двигатели (N, JETS_WIDTH)
+        :return: Маска строк батча (N)
+        """
+        return ~(jets != 0).any(dim=1)
+
+    @classmethod
+    def position(cls, position: Tensor, velocity: Tensor, sec: Tensor) -> Tensor:
+        """ Положение центра масс через *sec* секунд баллистического полёта.
+
+        :param position: Матрица положений (N, 2)
+        :param velocity: Матрица скоростей (N, 2)
+        :param sec: Время, секунды. (N) или (N, K) - для K моментов времени каждого испытания.
+        :return: Матрица положений (N, 2) или (N, K, 2)
+        """
+        if sec.dim() == 2:
+            position, velocity, sec = position.unsqueeze(1), velocity.unsqueeze(1), sec.unsqueeze(2)
+        else:
+            sec = sec.unsqueeze(1)
+        return position + velocity * sec + cls.__g * (sec * sec / 2)
+
+    @classmethod
+    def integrate(cls, y: Tensor, sec: Tensor) -> Tensor:
+        """ Вектор состояния интегрирования [x, y, theta, vx, vy, w] через *sec* секунд баллистического полёта.
+
+        :param y: Матрица векторов состояния (N, 6)
+        :param sec: Время, секунды (N)
+        """
+        result: Tensor = y.clone()
+        result[:, :THETA] = cls.position(y[:, :THETA], y[:, VX:W], sec)
+        result[:, THETA] = y[:, THETA] + y[:, W] * sec
+        result[:, VX:W] = y[:, VX:W] + cls.__g * sec.unsqueeze(1)
+        return result
+
+    @classmethod
+    def acceleration(cls, amount: int) -> Tensor:
+        """ Ускорения [ax, ay, e] баллистического полёта для *amount* испытаний (N, 3) """
+        return cat((cls.__g, cls.__g.new_zeros(1))).expand(amount, 3)
+
+    @classmethod
+    def contact_time(cls, position: Tensor, velocity: Tensor) -> Tensor:
+        """ Время до касания поверхности (решение квадратного уравнения движения по вертикали).
+
+        :param position: Матрица положений (N, 2)
+        :param velocity: Матрица скоростей (N, 2)
+        :return: Время, секунды (N). Если изделие уже на высоте касания (в пределах погрешности
+        *TouchdownBatch.tolerance*) или ниже - бесконечность.
+        """
+        g: float = -float(cls.__g[1])
+        height: Tensor = position[:, 1] - CONTACT_Y
+        vy: Tensor = velocity[:, 1]
+        # height + vy * t - g * t**2 / 2 = 0, нужен больший (единственный неотрицательный) корень.
+        root: Tensor = (vy + (vy * vy + 2 * g * height.clamp(min=0.)).sqrt()) / g
+        # Изделие, уже стоящее на высоте касания, касания не пересекает - иначе перемотка на нулевое время.
+        return where(height > TouchdownBatch.tolerance, root, full_like(root, float("inf")))
+
+    @classmethod
+    def band_time(cls, position: Tensor, velocity: Tensor, durations: Tensor) -> Tensor:
+        """ Время до смены диапазона интервалов считывания показаний датчиков.
+        Сначала время удваивается (начиная с интервала *durations*), пока диапазон не сменится,
+        затем момент смены уточняется делением отрезка пополам.
+
+        :param position: Матрица положений (N, 2)
+        :param velocity: Матрица скоростей (N, 2)
+        :param durations: Текущие интервалы считывания показаний, миллисекунды (N)
+        :return: Время, миллисекунды (N) - первый момент, когда изделие уже в другом диапазоне.
+        Если смены не найдено - бесконечность.
+        """
+        band: Tensor = CheckPeriodBatch.default_durations(position)
+
+        def changed(ms: Tensor) -> Tensor:
+            """ Диапазон в моменты *ms* (N, K) отличается от начального. """
+            points: Tensor = cls.position(position, velocity, CheckPeriod.to_sec(ms))
+            bands: Tensor = CheckPeriodBatch.default_durations(points.reshape(-1, 2)).reshape(ms.shape)
+            return bands != band.unsqueeze(1)
+
+        grid: Tensor = durations.unsqueeze(1) * (2 ** arange(cls.__doublings + 1, dtype=PHYSICS_DTYPE))
+        crossed: Tensor = changed(grid)
+        found: Tensor = crossed.any(dim=1)
+        # Отрезок [low, high], на котором диапазон сменился впервые на сетке.
+        first: Tensor = crossed.int().argmax(dim=1)
+        high: Tensor = grid.gather(1, first.unsqueeze(1)).squeeze(1)
+        low: Tensor = where(first > 0, high / 2, zeros_like(high))
+
+        for _ in range(cls.__bisections):
+            middle: Tensor = (low + high) / 2
+            middle_changed: Tensor = changed(middle.unsqueeze(1)).squeeze(1)
+            high = where(middle_changed, middle, high)
+            low = where(middle_changed, low, middle)
+
+        return where(found, high, full_like(high, float("inf")))
+
+    @classmethod
+    def fast_forward(cls, jets: Tensor, states: StatesBatch, durations: Tensor) -> Tensor:
+        """
+        Интервалы до следующего считывания показаний с перемоткой баллистического полёта: испытание без работающих
+        двигателей переходит сразу к смене диапазона интервалов считывания или к касанию поверхности
+        (но не меньше, чем на текущий интервал, если до касания дальше).
+
+        :param jets: Матрица команд на двигатели (N, JETS_WIDTH)
+        :param states: Текущие состояния изделий.
+        :param durations: Интервалы считывания показаний (см. *CheckPeriodBatch.set_duration()*), миллисекунды (N)
+        :return: Интервалы, миллисекунды (N)
+        """
+        coast: Tensor = cls.coasting(jets)
+        if not coast.any():
+            return durations
+
+        rows: Tensor = nonzero(coast).squeeze(1)
+        position, velocity = states.position[rows], states.velocity[rows]
+        contact: Tensor = cls.contact_time(position, velocity) * 1000
+        jump: Tensor = cls.band_time(position, velocity, durations[rows]).maximum(durations[rows]).minimum(contact)
+        # Изделие уже на высоте касания или ниже (испытание будет завершено) - перемотка не нужна.
+        jump = where(contact.isinf(), durations[rows], jump)
+
+        result: Tensor = durations.clone()
+        result[rows] = jump
+        return result
+
+
+class TouchdownBatch:
+    """
+    Поиск момента касания поверхности внутри интервала между считываниями показаний датчиков. Момент находится
+    делением пополам на кубическом интерполянте Эрмита (по высотам и вертикальным скоростям на концах интервала),
+    затем уточняется методом ложного положения (в модификации "Иллинойс") на траектории самого метода
+    интегрирования.
+
+    Касанием считается высота центра масс в полосе (CONTACT_Y, CONTACT_Y + *tolerance*]: нижняя граница полосы -
+    нижняя граница высоты удачной посадки (см. *tools_bt.FinishBatch*), поэтому шаг с касанием всегда
+    заканчивается над поверхностью, на конце отрезка уточнения со стороны "выше".
+    """
+    # Погрешность высоты касания, метров (меньше допуска tools.Finish).
+    tolerance: float = 0.001
+    # Количество делений пополам на интерполянте.
+    bisections: int = 50
+    # Наибольшее количество итераций уточнения по методу ложного положения.
+    refinements: int = 8
+
+    @classmethod
+    def hermite_time(cls, y0: Tensor, vy0: Tensor, y1: Tensor, vy1: Tensor, sec: Tensor) -> Tensor:
+        """ Момент касания по кубическому интерполянту Эрмита высоты на интервале.
+
+        :param y0: Высоты в начале интервала (выше высоты касания), (N)
+        :param vy0: Вертикальные скорости в начале интервала (N)
+        :param y1: Высоты в конце интервала (ниже высоты касания), (N)
+        :param vy1: Вертикальные скорости в конце интервала (N)
+        :param sec: Длительности интервалов, секунды (N)
+        :return: Время от начала интервала до касания, секунды (N)
+        """
+        def height(s: Tensor) -> Tensor:
+            """ Интерполированная высота в долях *s* интервала. """
+            s2, s3 = s * s, s * s * s
+            return (2 * s3 - 3 * s2 + 1) * y0 + (s3 - 2 * s2 + s) * sec * vy0 \
+                + (-2 * s3 + 3 * s2) * y1 + (s3 - s2) * sec * vy1
+
+        low: Tensor = zeros_like(sec)
+        high: Tensor = ones_like(sec)
+        for _ in range(cls.bisections):
+            middle: Tensor = (low + high) / 2
+            above: Tensor = height(middle) > CONTACT_Y
+            low = where(above, middle, low)
+            high = where(above, high, middle)
+
+        return high * sec
+
+    @classmethod
+    def level(cls) -> float:
+        """ Высота, к которой сходится уточнение момента касания: середина полосы касания. """
+        return CONTACT_Y + cls.tolerance / 2
+
+    @classmethod
+    def secant_time(cls, low: Tensor, y_low: Tensor, high: Tensor, y_high: Tensor) -> Tensor:
+        """ Момент прохождения высоты *level()* по секущей (метод ложного положения) на отрезке, где высота через неё
+        переходит.
+
+        :param low: Начало отрезка, секунды (N)
+        :param y_low: Высоты в начале отрезка (выше *level()*), (N)
+        :param high: Конец отрезка, секунды (N)
+        :param y_high: Высоты в конце отрезка (не выше *level()*), (N)
+        :return: Время от начала интервала, секунды (N)
+        """
+        return low + (y_low - cls.level()) * (high - low) / (y_low - y_high)
+
+    @classmethod
+    def landed(cls, y: Tensor) -> Tensor:
+        """ Маска высот в полосе касания (CONTACT_Y, CONTACT_Y + *tolerance*]
+
+        :param y: Высоты центра масс (N)
+        """
+        return (y > CONTACT_Y) & (y <= CONTACT_Y + cls.tolerance)
+
+
+class MovingBatch:
+    """
+    Расчёт динамических параметров ступени для батча испытаний в СКИП. Результаты совпадают с *Moving.get_new_status*
+    (с точностью до погрешности вычислений с плавающей точкой) при методе интегрирования по умолчанию. Исключения:
+    баллистический полёт считается точно (см. *CoastBatch*), а шаг с касанием поверхности обрывается в момент касания.
+    """
+    # Метод интегрирования по умолчанию.
+    integrator: IIntegrator = SemiImplicitEuler()
+    # Суммарные силы двигателей в СКС по номеру комбинации команд (см. JetsTable), матрица (32, 2)
+    __forces: Tensor = tensor([[force.real, force.imag] for force in JetsTable.forces()], dtype=PHYSICS_DTYPE)
+    # Суммарные моменты сил двигателей по номеру комбинации команд (см. JetsTable), вектор (32)
+    __torques: Tensor = tensor(JetsTable.torques(), dtype=PHYSICS_DTYPE)
+    # Веса битов команд в номере комбинации.
+    __bits: Tensor = tensor([2 ** (JETS_WIDTH - 1 - bit) for bit in range(JETS_WIDTH)], dtype=PHYSICS_DTYPE)
+    # Масса ступени
+    __mass: float = stage.Stage.topMass + stage.Stage.centerMass + stage.Stage.downMass
+    # Ускорение свободного падения в СКИП
+    __g: Tensor = tensor([GravitationalAcceleration.x, GravitationalAcceleration.y], dtype=PHYSICS_DTYPE)
+
+    @classmethod
+    def jets_index(cls, jets: Tensor) -> Tensor:
+        """ Номера комбинаций команд на двигатели (см. *JetsTable*).
+
+        :param jets: Матрица команд на двигатели (N, JETS_WIDTH)
+        :return: Вектор номеров (N)
+        """
+        return ((jets != 0).to(PHYSICS_DTYPE) @ cls.__bits).long()
+
+    @classmethod
+    def get_a(cls, jets: Tensor, orientation: Tensor) -> Tensor:
+        """
+        Мгновенные линейные ускорения как векторы в СКЦМ.
+
+        :param jets: Матрица команд на двигатели (N, JETS_WIDTH)
+        :param orientation: Матрица ориентаций изделий (N, 2)
+        :return: Матрица ускорений (N, 2)
+        """
+        # Суммарные силы двигателей в СКС из таблицы по номерам комбинаций команд.
+        force: Tensor = cls.__forces[cls.jets_index(jets)]
+        fx, fy = force[:, 0], force[:, 1]
+        ox, oy = orientation[:, 0], orientation[:, 1]
+        # Перевод в СКЦМ: умножение на вектор ориентации, повёрнутый на -90° (как в Moving.get_new_status).
+        force = stack((fx * oy + fy * ox, fy * oy - fx * ox), dim=1)
+        return force / cls.__mass + cls.__g
+
+    @classmethod
+    def get_e(cls, jets: Tensor, orientation: Tensor) -> Tensor:
+        """
+        Мгновенные угловые ускорения в СКС.
+
+        :param jets: Матрица команд на двигатели (N, JETS_WIDTH)
+        :param orientation: Матрица ориентаций изделий (N, 2)
+        :return: Вектор угловых ускорений (N)
+        """
+        # Момент сил двигателей (из таблицы по номерам комбинаций команд) делится на момент инерции ступени.
+        # Момент сил тяжести относительно центра масс равен нулю, поэтому от ориентации ускорение не зависит.
+        return cls.__torques[cls.jets_index(jets)] / stage.Stage.InertionMoment
+
+    @classmethod
+    def get_new_status(cls, jets: Tensor, previous_status: StatesBatch, durations: Tensor,
+                       integrator: Optional[IIntegrator] = None) -> StatesBatch:
+        """ Возвращает новые состояния ступени для всего батча.
+
+        :param jets: Матрица команд на двигатели изделий (N, JETS_WIDTH), строки в порядке строк батча.
+        :param previous_status: Предыдущие состояния изделий.
+        :param durations: Длительности интервалов до следующего считывания показаний, миллисекунды (N)
+        :param integrator: Метод интегрирования. Если не задан - полунеявный метод Эйлера (как в *Moving*).
+        """
+        integrator = cls.integrator if integrator is None else integrator
+        sec_duration: Tensor = CheckPeriod.to_sec(durations)
+        orientation_start: Tensor = previous_status.orientation
+
+        def derivative(y: Tensor, rows: Tensor) -> Tensor:
+            """ Производная вектора состояния [x, y, theta, vx, vy, w] -> [vx, vy, w, ax, ay, e] """
+            orientation: Tensor = cls.__rotate(orientation_start[rows], y[:, THETA])
+            return cat((y[:, VX:], cls.get_a(jets[rows], orientation),
+                        cls.get_e(jets[rows], orientation).unsqueeze(1)), dim=1)
+
+        # Вектор состояния интегрирования. Поворот отсчитывается от ориентации в начале интервала.
+        y_start: Tensor = cat((previous_status.position, orientation_start.new_zeros(len(previous_status), 1),
+                               previous_status.velocity, previous_status.angular_velocity.unsqueeze(1)), dim=1)
+        coast: Tensor = CoastBatch.coasting(jets)
+
+        def advance(rows: Tensor, sec: Tensor) -> Tensor:
+            """ Векторы состояния испытаний *rows* через *sec* секунд от начала интервала. Баллистический полёт
+            считается по решению в замкнутой форме, остальные испытания - методом интегрирования. """
+            result: Tensor = empty((rows.numel(), y_start.size(dim=1)), dtype=PHYSICS_DTYPE)
+            subset: Tensor = nonzero(coast[rows]).squeeze(1)
+            if subset.numel() > 0:
+                result[subset] = CoastBatch.integrate(y_start[rows[subset]], sec[subset])
+            subset = nonzero(~coast[rows]).squeeze(1)
+            if subset.numel() > 0:
+                integrated: Tensor = rows[subset]
+                result[subset] = integrator.integrate(lambda y, sub: derivative(y, integrated[sub]),
+                                                      y_start[integrated], sec[subset])
+            return result
+
+        all_rows: Tensor = arange(len(previous_status))
+        y_end: Tensor = advance(all_rows, sec_duration)
+
+        # Испытания, в которых изделие за интервал опустилось до высоты касания поверхности или ниже: интервал
+        # укорачивается до момента касания, чтобы состояние на поверхности было точным при любой длине шага.
+        # Изделие, начавшее интервал в полосе касания, уже коснулось поверхности (и удачной посадкой это не стало) -
+        # шаг не укорачивается, иначе он нулевой.
+        rows: Tensor = nonzero((y_start[:, Y] > CONTACT_Y + TouchdownBatch.tolerance)
+                               & (y_end[:, Y] <= CONTACT_Y)).squeeze(1)
+        if rows.numel() > 0:
+            sec_contact: Tensor = TouchdownBatch.hermite_time(y_start[rows, Y], y_start[rows, VY],
+                                                              y_end[rows, Y], y_end[rows, VY], sec_duration[rows])
+            # Отрезок, на котором высота переходит через середину полосы касания: начало - выше, конец - не выше.
+            level: float = TouchdownBatch.level()
+            low, y_low, state_low = zeros_like(sec_contact), y_start[rows, Y], y_start[rows]
+            high, y_high = sec_duration[rows], y_end[rows, Y]
+            # Высоты концов отрезка для секущей: у конца, остающегося на месте второй раз подряд, отклонение от
+            # середины полосы делится пополам (модификация "Иллинойс"), иначе сходимость с одной стороны медленная.
+            weight_low, weight_high = y_low, y_high
+            previous: Tensor = zeros_like(y_low, dtype=bool)
+            # Первые найденные состояния в полосе касания и их моменты.
+            landed: Tensor = zeros_like(y_low, dtype=bool)
+            sec_landed, state_landed = zeros_like(sec_contact), empty(state_low.shape, dtype=PHYSICS_DTYPE)
+            for iteration in range(TouchdownBatch.refinements):
+                # Уточнение по секущей на траектории самого метода интегрирования.
+                state_contact: Tensor = advance(rows, sec_contact)
+                y_contact: Tensor = state_contact[:, Y]
+                found: Tensor = ~landed & TouchdownBatch.landed(y_contact)
+                sec_landed = where(found, sec_contact, sec_landed)
+                state_landed = where(found.unsqueeze(1), state_contact, state_landed)
+                landed = landed | found
+                if landed.all():
+                    break
+                above: Tensor = y_contact > level
+                low, y_low = where(above, sec_contact, low), where(above, y_contact, y_low)
+                state_low = where(above.unsqueeze(1), state_contact, state_low)
+                high, y_high = where(above, high, sec_contact), where(above, y_high, y_contact)
+                repeated: Tensor = (above == previous) & (iteration > 0)
+                weight_low = where(above, y_low, where(repeated, (weight_low + level) / 2, weight_low))
+                weight_high = where(above, where(repeated, (weight_high + level) / 2, weight_high), y_high)
+                previous = above
+                sec_contact = TouchdownBatch.secant_time(low, weight_low, high, weight_high)
+            # Шаг заканчивается в полосе касания, а если она не достигнута - на конце отрезка со стороны "выше":
+            # изделие всё ещё над полосой, и касание уточняется на следующем шаге.
+            sec_contact = where(landed, sec_landed, low)
+            y_end[rows] = where(landed.unsqueeze(1), state_landed, state_low)
+            durations = durations.clone()
+            durations[rows] = sec_contact * 1000
+
+        # Ускорения, действовавшие в начале интервала.
+        axeleration: Tensor = empty(y_start.shape, dtype=PHYSICS_DTYPE)
+        rows = nonzero(coast).squeeze(1)
+        axeleration[rows, VX:] = CoastBatch.acceleration(rows.numel())
+        rows = nonzero(~coast).squeeze(1)
+        axeleration[rows] = derivative(y_start[rows], rows)
+
+        new_state: StatesBatch = StatesBatch.empty(previous_status.ids)
+
+        new_state.position[:] = y_end[:, :THETA]
+        new_state.velocity[:] = y_end[:, VX:W]
+        new_state.acceleration[:] = axeleration[:, VX:W]
+        new_state.orientation[:] = cls.__rotate(orientation_start, y_end[:, THETA])
+        new_state.angular_velocity[:] = y_end[:, W]
+        new_state.angular_acceleration[:] = axeleration[:, W]
+        new_state.time_stamp[:] = previous_status.time_stamp + durations
+        # Служебные столбцы (состояние планировщика интервалов) переходят в новое состояние без изменений.
+        new_state.service[:] = previous_status.service
+
+        return new_state
+
+    @classmethod
+    def __rotate(cls, orientation: Tensor, angle: Tensor) -> Tensor:
+        """ Поворот векторов ориентации на угол (аналог умножения комплексных чисел) с приведением к единичным.
+
+        :param orientation: Матрица ориентаций (N, 2)
+        :param angle: Углы поворота, рад. (N)
+        :return: Матрица ориентаций (N, 2)
+        """
+        cos, sin = angle.cos(), angle.sin()
+        ox, oy = orientation[:, 0], orientation[:, 1]
+        result: Tensor = stack((ox * cos - oy * sin, ox * sin + oy * cos), dim=1)
+        return result / result.norm(dim=1, keepdim=True)
@@ -4,6 +4,8 @@ from cmath import rect
 from typing import Union, Tuple
 # from torch import float as torch_float
 import unittest
+import pickle
+from copy import deepcopy
 
 # Тип, означающий число
 NumberType = Union[complex, int, float]
@@ -11,19 +13,22 @@ NumberType = Union[complex, int, float]
 
 class VectorComplex:
     """ Вектор. Объект данного класса создавать только методами *get_instance* или *get_instance_c* """
+    # Объекты класса создаются на каждом шаге физической модели во множестве, поэтому атрибуты фиксированы (без
+    # __dict__ у каждого объекта).
+    __slots__ = ('_x', '_y')
 
     # ключ, необходимый, для контроля того, что объекты данного класса создаются только разрешёнными методами
     # Значение создаётся при инициализации модуля
     # https://stackoverflow.com/questions/8212053/private-constructor-in-python
     __create_key = object()
 
-    def __init__(self, create_key: object, x: float, y: float, origin=None):
+    def __init__(self, create_key: object, x: float, y: float):
         """
         Объект данного класса создавать только методами *get_instance* или *get_instance_c*
 
         :param create_key: ключ для контроля того, что объекты данного класса создаются только разрешёнными методами
-        :param tensor_view: Тензор вида [[0, 0]], Все параметры входного тензора сохраняются
-        :param origin: координаты начала координат системы вектора в родительской системе координат
+        :param x: абцисса конечной точки вектора.
+        :param y: ордината конечной точки вектора.
         """
         # Если ключ в вызывающем методе не совпадает с установленным во время инициализации, то инициируется ошибка.
         # И правильно. Объекты данного класса создаются только разрешёнными методами.
@@ -33,43 +38,29 @@ class VectorComplex:
         self._x = x
         self._y = y
 
-        # тензорное представление вида [[0, 0]]
-        # self.__tensor = tensor_view
-        # отдельно сохраняем данные тензора в родительском классе, ибо только они будут актуальными
-        # self.__setPoint()
-        # Есть система координат (А), в которой и лежит вектор
-        # Сама система координат А, находится в рамках более глобальной системы Б.
-        # Ниже указаны координаты начала координат системы А в рамках системы Б
-        # todo этот атрибут, как мне кажется, нигде не используется. Удалить?
-        self.__origin: VectorComplex = origin
-        # Если это поле равно None, то этот вектор находится в рамках самой глобальной системы координат.
-
     @classmethod
-    def get_instance(cls, x=0., y=0., origin=None) -> 'VectorComplex':
+    def get_instance(cls, x=0., y=0.) -> 'VectorComplex':
         """ Создать экземпляр класса. По умолчанию - нулевой вектор.
 
         :param x: абцисса конечной точки вектора.
         :param y: ордината конечной точки вектора.
         """
-
-        # lst = [[x, y]]
-        # tensor = torch_tensor(lst, dtype=torch_float)
-        # result = VectorComplex(VectorComplex.__create_key, tensor)
-        # self._x = x
-        # self._y = y
-        # result.__origin = origin
-        return VectorComplex(VectorComplex.__create_key, x, y, origin)
+        # Разрешённый метод создания: объект создаётся в обход конструктора, без проверки ключа.
+        result = object.__new__(VectorComplex)
+        result._x = x
+        result._y = y
+        return result
 
     @classmethod
-    def get_instance_c(cls, complex_number: complex, origin=None) -> 'VectorComplex':
+    def get_instance_c(cls, complex_number: complex) -> 'VectorComplex':
         """ Создать экземпляр класса на основе комплексного числа.
 
         :param complex_number: комплексное число, представляющее компоненты вектора (real - x, img - y)
         """
-        # result = VectorComplex(VectorComplex.__create_key, torch_tensor([[complex_number.real, complex_number.imag]],
-        #                                                                 dtype=torch_float))
-        # result.__origin = origin
-        return VectorComplex(VectorComplex.__create_key, complex_number.real, complex_number.imag, origin)
+        result = object.__new__(VectorComplex)
+        result._x = complex_number.real
+        result._y = complex_number.imag
+        return result
 
     @property
     def decart(self) -> Tuple[float, float]:
@@ -120,24 +111,6 @@ class VectorComplex:
         # self.__set_pair(cmx.real, cmx.imag)
         self._x, self._y = cmx.real, cmx.imag
 
-    @property
-    def origin(self):
-        """ Вектор начала координат дочерней системы в рамках родительской """
-        # thisClass = self.__class__
-        # todo убрать метод и атрибут?
-        return VectorComplex.get_instance(self.__origin.x, self.__origin.y)
-
-    @origin.setter
-    def origin(self, vector):
-        """
-
-        :param vector:
-        :type vector: VectorComplex
-        :return:
-        """
-        # todo убрать метод и атрибут?
-        self.__origin = vector
-
     def rotate(self, angle: float) -> 'VectorComplex':
         """
         Возвращает новый вектор, повёрнутый относительно изначального на заданный угол
@@ -151,28 +124,30 @@ class VectorComplex:
     def lazy_copy(self) -> 'VectorComplex':
         """ Ленивая копия объекта: копируются только координаты """
         # todo заменить на deepcopy?
-        return VectorComplex.get_instance(self.x, self.y)
+        return VectorComplex.get_instance(self._x, self._y)
 
     def __add__(self, other: 'VectorComplex') -> 'VectorComplex':
         """
         Сложение векторов.
 
         """
-        return VectorComplex.get_instance_c(self.cardanus + other.cardanus)
+        return VectorComplex.get_instance(self._x + other._x, self._y + other._y)
 
     def __sub__(self, other: 'VectorComplex') -> 'VectorComplex':
         """
         Вычитание векторов.
 
         """
-        return VectorComplex.get_instance_c(self.cardanus - other.cardanus)
+        return VectorComplex.get_instance(self._x - other._x, self._y - other._y)
 
     def __mul__(self, other: NumberType) -> 'VectorComplex':
         """
         Умножение на число.
 
         """
-        if isinstance(other, (complex, int, float)):
+        if isinstance(other, (int, float)):
+            return VectorComplex.get_instance(self._x * other, self._y * other)
+        elif isinstance(other, complex):
             return VectorComplex.get_instance_c(self.cardanus * other)
         else:
             raise TypeError("The 'other' argument is not a number-type")
@@ -200,14 +175,62 @@ class VectorComplex:
             other = other
         else:
             # если получилось привести other к int, значит это либо float, либо int и можно на него делить
-            return VectorComplex.get_instance_c(self.cardanus / other)
+            return VectorComplex.get_instance(self._x / other, self._y / other)
+
+    # Операции на месте меняют сам объект, а не создают новый. Применять только к векторам,
+    # на которые нет других ссылок (например, к только что полученному результату операции или к lazy_copy()).
+    def __iadd__(self, other: 'VectorComplex') -> 'VectorComplex':
+        """
+        Сложение векторов на месте.
+
+        """
+        self._x += other._x
+        self._y += other._y
+        return self
+
+    def __isub__(self, other: 'VectorComplex') -> 'VectorComplex':
+        """
+        Вычитание векторов на месте.
+
+        """
+        self._x -= other._x
+        self._y -= other._y
+        return self
+
+    def __imul__(self, other: NumberType) -> 'VectorComplex':
+        """
+        Умножение на число на месте.
+
+        """
+        if isinstance(other, (int, float)):
+            self._x *= other
+            self._y *= other
+        elif isinstance(other, complex):
+            self.cardanus = self.cardanus * other
+        else:
+            raise TypeError("The 'other' argument is not a number-type")
+        return self
+
+    def __itruediv__(self, other: NumberType) -> 'VectorComplex':
+        """
+        Деление на число на месте.
+
+        """
+        if isinstance(other, complex):
+            self.cardanus = self.cardanus / other
+        elif isinstance(other, (int, float)):
+            self._x /= other
+            self._y /= other
+        else:
+            raise TypeError("The 'other' argument is not a number-type")
+        return self
 
     def __neg__(self) -> 'VectorComplex':
         """
         Унарный минус.
 
         """
-        return VectorComplex.get_instance(-self.x, -self.y)
+        return VectorComplex.get_instance(-self._x, -self._y)
 
     def __str__(self) -> str:
         """ Строковое представление """
@@ -219,13 +242,68 @@ class VectorComplex:
 
     def __eq__(self, other):
         """ Проверка на равенство двух векторов. """
-        return self.x == other.x and self.y == other.y
+        return self._x == other.x and self._y == other.y
+
+
+class FrozenVectorComplex(VectorComplex):
+    """ Неизменяемый вектор. Может одновременно читаться несколькими нитями, поэтому при передаче не копируется.
+    Объект данного класса создавать только методом *freeze* """
+    __slots__ = ()
+
+    @classmethod
+    def freeze(cls, vector: VectorComplex) -> 'FrozenVectorComplex':
+        """ Неизменяемая копия вектора. Неизменяемый вектор возвращается как есть.
+
+        :param vector: исходный вектор.
+        """
+        if isinstance(vector, FrozenVectorComplex):
+            return vector
+        result = object.__new__(FrozenVectorComplex)
+        object.__setattr__(result, '_x', vector.x)
+        object.__setattr__(result, '_y', vector.y)
+        return result
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError("FrozenVectorComplex object is immutable.")
+
+    # Восстановление (pickle, copy) идёт не через запрещённый __setattr__, а через *freeze*.
+    def __reduce__(self):
+        return FrozenVectorComplex.freeze, (VectorComplex.get_instance(self._x, self._y),)
+
+    # Неизменяемый вектор копировать незачем.
+    def __copy__(self) -> 'FrozenVectorComplex':
+        return self
+
+    def __deepcopy__(self, memo) -> 'FrozenVectorComplex':
+        return self
+
+    # Операции "на месте" у неизменяемого вектора создают новый (изменяемый) вектор, как у неизменяемых типов Python.
+    def __iadd__(self, other: VectorComplex) -> VectorComplex:
+        return self + other
+
+    def __isub__(self, other: VectorComplex) -> VectorComplex:
+        return self - other
+
+    def __imul__(self, other: NumberType) -> VectorComplex:
+        return self * other
+
+    def __itruediv__(self, other: NumberType) -> VectorComplex:
+        return self / other
 
 
 class VectorTest(unittest.TestCase):
     def test_equal(self):
         self.assertTrue(VectorComplex.get_instance(112, 13) == VectorComplex.get_instance(112, 13))
 
+    def test_frozen_copy(self):
+        frozen = FrozenVectorComplex.freeze(VectorComplex.get_instance(112, 13))
+        self.assertIs(deepcopy(frozen), frozen)
+        restored = pickle.loads(pickle.dumps(frozen))
+        self.assertIsInstance(restored, FrozenVectorComplex)
+        self.assertTrue(restored == frozen)
+        with self.assertRaises(AttributeError):
+            restored.x = 0.
+
 
 if __name__ == '_main_':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,198 @@
+""" Реализация хранилища испытаний в виде непрерывной матрицы состояний (struct-of-arrays). """
+from typing import Optional, Dict, List, Mapping
+import unittest
+from torch import Tensor, empty, cat, tensor, int64, arange, equal
+from states.i_states import IStatesStore
+from app_type import TestId, PHYSICS_DTYPE
+from structures import RealWorldStageStatusN
+from batch import StatesBatch, StatesView, STATE_WIDTH, PHYSICS_WIDTH, TIME_STAMP, row_to_state
+
+
+class ArrayStore(IStatesStore):
+    """ Хранилище состояний испытаний в виде матрицы: одна строка - одно испытание.
+    Удаление испытания переносит последнюю строку на место удалённой, поэтому занятые строки всегда идут подряд. """
+    # Начальная ёмкость матрицы (строк).
+    __INITIAL_CAPACITY: int = 64
+
+    def __init__(self):
+        # Матрица состояний. Заняты строки 0 .. self.__count - 1
+        self.__data: Tensor = empty((ArrayStore.__INITIAL_CAPACITY, STATE_WIDTH), dtype=PHYSICS_DTYPE)
+        # Количество занятых строк.
+        self.__count: int = 0
+        # Идентификатор испытания по номеру строки.
+        self.__ids: List[TestId] = []
+        # Номер строки по идентификатору испытания.
+        self.__index: Dict[TestId, int] = {}
+
+    def __reserve(self, amount: int) -> None:
+        """ Увеличение ёмкости матрицы (удвоением), чтобы в неё поместилось ещё *amount* строк. """
+        capacity: int = self.__data.size(dim=0)
+        if self.__count + amount <= capacity:
+            return
+
+        while capacity < self.__count + amount:
+            capacity *= 2
+
+        self.__data = cat((self.__data[:self.__count],
+                           empty((capacity - self.__count, STATE_WIDTH), dtype=PHYSICS_DTYPE)))
+
+    def __append(self, test_id: TestId, row: Tensor) -> None:
+        """ Добавить строку в конец занятой части матрицы. """
+        self.__data[self.__count] = row
+        self.__index[test_id] = self.__count
+        self.__ids.append(test_id)
+        self.__count += 1
+
+    def get_state(self, test_id: TestId) -> Optional[RealWorldStageStatusN]:
+        try:
+            row: int = self.__index[test_id]
+        except KeyError:
+            return None
+        else:
+            return row_to_state(self.__data[row].tolist())
+
+    def update_state(self, test_id: TestId, state: RealWorldStageStatusN) -> bool:
+        try:
+            row: int = self.__index[test_id]
+        except KeyError:
+            return False
+        else:
+            # Служебные столбцы (состояние планировщика интервалов) объект-состояние не содержит, их не трогаем.
+            self.__data[row, :PHYSICS_WIDTH] = StatesBatch.from_states({test_id: state}).data[0, :PHYSICS_WIDTH]
+            return True
+
+    def add_state(self, states: Dict[TestId, RealWorldStageStatusN] = None, test_id: TestId = None,
+                  state: RealWorldStageStatusN = None) -> bool:
+        # Реализация @overload методов родительского интерфейса.
+        if states is not None and test_id is None and state is None:
+            # Добавление набора состояний в виде словаря.
+            set_ongoing = set(self.__index.keys()).intersection(set(states.keys()))
+            if len(set_ongoing) != 0:
+                # В хранилище есть данные по какому-то добавляемому испытанию - ошибка.
+                # Возможна несанкционированная перезапись.
+                assert len(set_ongoing) == 0, "Keys is already in storage: {}".format(set_ongoing)
+                return False
+            else:
+                return self.add_batch(StatesBatch.from_states(states))
+        elif states is None and test_id is not None and state is not None:
+            # Добавление состояния по его ключу.
+            if test_id in self.__index:
+                # Ключ уже присутствует в хранилище - ошибка.
+                # Возможна несанкционированная перезапись.
+                assert test_id not in self.__index, "Key is already in storage: {}".format(test_id)
+                return False
+            else:
+                self.__reserve(1)
+                self.__append(test_id, StatesBatch.from_states({test_id: state}).data[0])
+                return True
+        else:
+            raise TypeError("Bad arguments of overload method.")
+
+    def add_batch(self, states: StatesBatch) -> bool:
+        """ Добавить в хранилище батч новых состояний.
+
+        :param states: Батч состояний.
+        :return: Если == False, значит добавляемые состояния уже есть в хранилище - ошибка!
+        """
+        set_ongoing = set(self.__index.keys()).intersection(set(states.ids))
+        if len(set_ongoing) != 0:
+            assert len(set_ongoing) == 0, "Keys is already in storage: {}".format(set_ongoing)
+            return False
+
+        self.__reserve(len(states))
+        self.__data[self.__count:self.__count + len(states)] = states.data
+        for test_id in states.ids:
+            self.__index[test_id] = self.__count
+            self.__ids.append(test_id)
+            self.__count += 1
+        return True
+
+    def del_state(self, test_id: TestId) -> bool:
+        try:
+            row: int = self.__index.pop(test_id)
+        except KeyError:
+            return False
+        else:
+            # Последняя занятая строка переносится на место удаляемой.
+            last: int = self.__count - 1
+            if row != last:
+                self.__data[row] = self.__data[last]
+                self.__ids[row] = self.__ids[last]
+                self.__index[self.__ids[row]] = row
+            self.__ids.pop()
+            self.__count -= 1
+            return True
+
+    def get_amount(self) -> int:
+        return self.__count
+
+    def all_states(self) -> Mapping[TestId, RealWorldStageStatusN]:
+        # Снимок занятой части матрицы одной операцией копирования, без создания объектов-состояний.
+        return StatesView(StatesBatch(list(self.__ids), self.__data[:self.__count].clone()))
+
+    def get_batch(self, test_ids: List[TestId]) -> StatesBatch:
+        rows: List[int] = [self.__index[test_id] for test_id in test_ids]
+        return StatesBatch(list(test_ids), self.__data[tensor(rows, dtype=int64)])
+
+    def update_batch(self, states: StatesBatch) -> bool:
+        for test_id in states.ids:
+            if test_id not in self.__index:
+                return False
+        rows: List[int] = [self.__index[test_id] for test_id in states.ids]
+        self.__data[tensor(rows, dtype=int64)] = states.data
+        return True
+
+
+class ArrayStoreTest(unittest.TestCase):
+    @staticmethod
+    def batch(ids: List[TestId]) -> StatesBatch:
+        """ Батч, в котором каждая ячейка строки равна идентификатору испытания. """
+        return StatesBatch(ids, tensor(ids, dtype=PHYSICS_DTYPE).unsqueeze(1).expand(len(ids), STATE_WIDTH).clone())
+
+    def test_swap_remove(self):
+        store = ArrayStore()
+        store.add_batch(self.batch([10, 11, 12, 13]))
+        self.assertTrue(store.del_state(11))
+        self.assertFalse(store.del_state(11))
+        # Последняя строка переехала на место удалённой.
+        self.assertEqual([10, 13, 12], list(store.all_states().keys()))
+        self.assertEqual(3, store.get_amount())
+        # Удаление последней строки ничего не переносит.
+        self.assertTrue(store.del_state(12))
+        self.assertEqual([10, 13], list(store.all_states().keys()))
+
+    def test_reindex(self):
+        store = ArrayStore()
+        store.add_batch(self.batch(list(range(100))))
+        for test_id in range(0, 100, 3):
+            store.del_state(test_id)
+        ids = [test_id for test_id in range(100) if test_id % 3 != 0]
+        # После удалений каждый идентификатор указывает на свою строку, служебные столбцы не потеряны.
+        self.assertTrue(equal(store.get_batch(ids).data[:, 0], tensor(ids, dtype=PHYSICS_DTYPE)))
+        self.assertTrue(equal(store.get_batch(ids).data[:, PHYSICS_WIDTH:],
+                              self.batch(ids).data[:, PHYSICS_WIDTH:]))
+        updated = self.batch(ids[::-1])
+        updated.data[:, TIME_STAMP] = arange(len(ids), dtype=PHYSICS_DTYPE)
+        self.assertTrue(store.update_batch(updated))
+        self.assertEqual(len(ids) - 1, store.get_state(ids[0]).time_stamp)
+        self.assertFalse(store.update_batch(self.batch([0])))
+        with self.assertRaises(KeyError):
+            store.get_batch([0])
+
+    def test_view(self):
+        store = ArrayStore()
+        store.add_batch(self.batch([7, 8]))
+        view = store.all_states()
+        self.assertIsInstance(view, StatesView)
+        self.assertEqual(2, len(view))
+        self.assertEqual(8., view[8].position.y)
+        with self.assertRaises(KeyError):
+            view[9]
+        # Представление - снимок: изменения хранилища его не затрагивают.
+        store.del_state(7)
+        self.assertEqual([7, 8], list(view.keys()))
+        self.assertEqual(7., view[7].velocity.x)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,14 @@
 """ Интерфейсы инициализируемых состояний и хранилища текущих состояний. """
 from abc import ABC, abstractmethod
-from typing import Optional, Tuple, Dict, overload
+from typing import Optional, Tuple, Dict, List, Mapping, overload
 from app_type import TestId
 from structures import RealWorldStageStatusN
+from batch import StatesBatch
 
 # IIninitStates -> InitGanerator
 #           └> another interaface realization
 # IStatesStore -> DictStore
+#           ├> ArrayStore
 #           └> another interface realization
 
 
@@ -97,6 +99,37 @@ class IStatesStore(ABC):
         ...
 
     @abstractmethod
-    def all_states(self) -> Dict[TestId, RealWorldStageStatusN]:
+    def all_states(self) -> Mapping[TestId, RealWorldStageStatusN]:
         """ Получить словарь всех текущих испытаний. """
         ...
+
+    @abstractmethod
+    def get_batch(self, test_ids: List[TestId]) -> StatesBatch:
+        """ Получить текущие состояния нескольких испытаний одним батчем.
+
+        Батч несёт служебные столбцы (планировщик интервалов считывания, наименьшее расстояние до точки посадки),
+        которых нет в объектах-состояниях. Хранилище обязано сохранять их между *update_batch()* и *get_batch()*,
+        иначе они сбрасывались бы на каждом шаге пакетной физической модели.
+
+        :param test_ids: Идентификаторы испытаний (порядок строк батча).
+        :return: Батч состояний. Если хотя бы одного испытания нет в хранилище - KeyError.
+        """
+        ...
+
+    @abstractmethod
+    def update_batch(self, states: StatesBatch) -> bool:
+        """ Обновить состояния нескольких испытаний из батча, включая служебные столбцы (см. *get_batch()*)
+
+        :param states: Батч новых состояний.
+        :return: Если == False, значит какого-то испытания из батча в хранилище нет, и обновить его не получилось.
+        """
+        ...
+
+    @abstractmethod
+    def add_batch(self, states: StatesBatch) -> bool:
+        """ Добавить в хранилище батч новых состояний вместе со служебными столбцами (см. *get_batch()*)
+
+        :param states: Батч состояний.
+        :return: Если == False, значит добавляемые состояния уже есть в хранилище - ошибка!
+        """
+        ...
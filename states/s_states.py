@@ -1,10 +1,12 @@
 """ Реализация хранилища испытаний в виде словаря. """
 from typing import Optional, Tuple, Dict, List, overload
+import unittest
+from torch import tensor, int64, equal
 from states.i_states import IStatesStore, IInitStates
-from app_type import TestId
+from app_type import TestId, PHYSICS_DTYPE
 from structures import RealWorldStageStatusN
+from batch import StatesBatch, PHYSICS_WIDTH, STATE_WIDTH
 # from typing import Dict
-from copy import deepcopy
 from states.iterable import InitialStatusAbstract, InitialStatus
 
 
@@ -12,6 +14,9 @@ class DictStore(IStatesStore):
     """ Хранилище состояний испытаний в виде словаря. """
     def __init__(self):
         self.__ongoing_states: Dict[TestId, RealWorldStageStatusN] = {}
+        # Служебные столбцы батча по идентификатору испытания (см. *IStatesStore.get_batch()*). Для испытаний,
+        # добавленных объектами-состояниями, их нет - в батче будут значения нового испытания.
+        self.__service: Dict[TestId, List[float]] = {}
 
     def get_state(self, test_id: TestId) -> Optional[RealWorldStageStatusN]:
         try:
@@ -69,13 +74,43 @@ class DictStore(IStatesStore):
         else:
             # Если ключ уже есть, то всё хорошо
             self.__ongoing_states.pop(test_id)
+            self.__service.pop(test_id, None)
             return True
 
     def get_amount(self) -> int:
         return len(self.__ongoing_states)
 
     def all_states(self) -> Dict[TestId, RealWorldStageStatusN]:
-        return deepcopy(self.__ongoing_states)
+        return {test_id: state.clone() for test_id, state in self.__ongoing_states.items()}
+
+    def get_batch(self, test_ids: List[TestId]) -> StatesBatch:
+        batch: StatesBatch = StatesBatch.from_states({test_id: self.__ongoing_states[test_id] for test_id in test_ids})
+        rows: List[int] = [row for row, test_id in enumerate(test_ids) if test_id in self.__service]
+        if len(rows) > 0:
+            batch.service[tensor(rows, dtype=int64)] = tensor([self.__service[test_ids[row]] for row in rows],
+                                                              dtype=PHYSICS_DTYPE)
+        return batch
+
+    def update_batch(self, states: StatesBatch) -> bool:
+        for test_id in states.ids:
+            if test_id not in self.__ongoing_states:
+                return False
+        self.__put_batch(states)
+        return True
+
+    def add_batch(self, states: StatesBatch) -> bool:
+        set_ongoing = set(self.__ongoing_states.keys()).intersection(set(states.ids))
+        if len(set_ongoing) != 0:
+            # В хранилище есть данные по какому-то добавляемому испытанию - ошибка.
+            assert len(set_ongoing) == 0, "Keys is already in storage: {}".format(set_ongoing)
+            return False
+        self.__put_batch(states)
+        return True
+
+    def __put_batch(self, states: StatesBatch) -> None:
+        """ Записать состояния батча в словарь, служебные столбцы - отдельно. """
+        self.__ongoing_states.update(states.to_states())
+        self.__service.update(zip(states.ids, states.data[:, PHYSICS_WIDTH:].tolist()))
 
 
 class InitGenerator(IInitStates):
@@ -89,4 +124,28 @@ class InitGenerator(IInitStates):
         return next(self.__iter)
 
     def get_amount(self) -> int:
-        return self._initial.remaining_count()
\ No newline at end of file
+        return self._initial.remaining_count()
+
+
+class DictStoreTest(unittest.TestCase):
+    def test_batch(self):
+        store = DictStore()
+        ids = [3, 1, 2]
+        batch = StatesBatch(ids, tensor(ids, dtype=PHYSICS_DTYPE).unsqueeze(1).expand(len(ids), STATE_WIDTH).clone())
+        self.assertTrue(store.add_batch(batch))
+        self.assertFalse(store.update_batch(StatesBatch([4], batch.data[:1])))
+        # Служебные столбцы переживают цикл update_batch() -> get_batch().
+        batch.data[:, PHYSICS_WIDTH:] += 10
+        self.assertTrue(store.update_batch(batch))
+        self.assertTrue(equal(store.get_batch([2, 3]).data, batch.data[[2, 0]]))
+        self.assertTrue(store.del_state(3))
+        with self.assertRaises(KeyError):
+            store.get_batch([3])
+        # У испытания, добавленного объектом-состоянием, служебные столбцы - как у нового.
+        store.add_state(test_id=5, state=store.get_state(1))
+        self.assertTrue(equal(store.get_batch([5]).service,
+                              StatesBatch.from_states({5: store.get_state(5)}).service))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,5 @@
-from point import VectorComplex
+from point import VectorComplex, FrozenVectorComplex
 from abc import ABC, abstractmethod
-from copy import deepcopy
 from typing import Union, Any, TypeVar, Dict
 
 
@@ -70,7 +69,8 @@ class StageControlCommands(CloneInterface, ValueCopyInterface):
         return not (self.top_left or self.top_right or self.down_left or self.down_right or self.main)
 
     def clone(self):
-        return deepcopy(self)
+        return StageControlCommands(self.time_stamp, self.duration, self.top_left, self.top_right,
+                                    self.down_left, self.down_right, self.main)
 
     def data_copy(self, to_object: 'StageControlCommands'):
         to_object.time_stamp = self.time_stamp
@@ -129,7 +129,14 @@ class RealWorldStageStatusN(CloneInterface, ValueCopyInterface):
         # self.duration = duration
 
     def clone(self):
-        return deepcopy(self)
+        # Копируются только значения: атрибуты-векторы не содержат вложенных объектов.
+        return RealWorldStageStatusN(self.position.lazy_copy(), self.velocity.lazy_copy(),
+                                     self.acceleration.lazy_copy(), self.orientation.lazy_copy(),
+                                     self.angular_velocity, self.angular_acceleration, self.time_stamp)
+
+    def snapshot(self) -> 'StageStatusSnapshot':
+        """ Неизменяемый снимок состояния для рассылки потребителям без копирования. """
+        return StageStatusSnapshot(self)
 
     def data_copy(self, target_object: 'RealWorldStageStatusN'):
         target_object.position.decart = self.position.decart
@@ -140,6 +147,50 @@ class RealWorldStageStatusN(CloneInterface, ValueCopyInterface):
         target_object.angular_acceleration = self.angular_acceleration
         target_object.time_stamp = self.time_stamp
 
+
+class StageStatusSnapshot(RealWorldStageStatusN):
+    """ Неизменяемый снимок состояния ступени. Один и тот же объект можно отдать нескольким нитям-потребителям
+    (блоку нейросети, блоку вида) без копирования. Создавать методом *RealWorldStageStatusN.snapshot()* """
+    def __init__(self, state: RealWorldStageStatusN):
+        """
+
+        :param state: состояние ступени, значения которого фиксируются в снимке.
+        """
+        # Атрибуты устанавливаются в обход запрета на изменение.
+        for name, value in (("position", FrozenVectorComplex.freeze(state.position)),
+                            ("velocity", FrozenVectorComplex.freeze(state.velocity)),
+                            ("acceleration", FrozenVectorComplex.freeze(state.acceleration)),
+                            ("orientation", FrozenVectorComplex.freeze(state.orientation)),
+                            ("angular_velocity", state.angular_velocity),
+                            ("angular_acceleration", state.angular_acceleration),
+                            ("time_stamp", state.time_stamp)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("StageStatusSnapshot object is immutable.")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("StageStatusSnapshot object is immutable.")
+
+    # Восстановление (pickle, copy) идёт не через запрещённый __setattr__, а через конструктор снимка.
+    def __reduce__(self):
+        return StageStatusSnapshot, (self.clone(),)
+
+    # Неизменяемый снимок копировать незачем.
+    def __copy__(self) -> 'StageStatusSnapshot':
+        return self
+
+    def __deepcopy__(self, memo) -> 'StageStatusSnapshot':
+        return self
+
+    def clone(self):
+        # Изменяемая копия.
+        return RealWorldStageStatusN.clone(self)
+
+    def snapshot(self) -> 'StageStatusSnapshot':
+        return self
+
+
 class ReinforcementValue(CloneInterface, ValueCopyInterface):
     """
     Класс величины подкрепления для передачи через очередь между нитями
@@ -153,7 +204,7 @@ class ReinforcementValue(CloneInterface, ValueCopyInterface):
         return self.time_stamp, self.reinforcement
 
     def clone(self):
-        return deepcopy(self)
+        return ReinforcementValue(self.time_stamp, self.reinforcement)
 
     def data_copy(self, target_object: 'ReinforcementValue'):
         target_object.time_stamp = self.time_stamp
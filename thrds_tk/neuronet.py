@@ -1,25 +1,50 @@
 from types import ModuleType
 import importlib
 from logging import getLogger
-from app_cons import logger_name, SLEEP_TIME
+from app_cons import logger_name, WAIT_TIME
 from app_type import TestId, ZeroOne
 from ifc_flow.i_flow import INeuronet
 from thrds_tk.threads import AYarn
-from structures import StageControlCommands, RealWorldStageStatusN, ReinforcementValue
-from torch import device, float, Tensor
-from typing import Dict, Callable, List
-from time import sleep
-from con_intr.ifaces import ISocket, ISender, AppModulesEnum, DataTypeEnum, \
+from structures import StageControlCommands, RealWorldStageStatusN
+from torch import device, float, Tensor, set_grad_enabled
+from typing import Dict, Callable, List, Optional, Deque
+from collections import deque
+from con_intr.ifaces import ISocket, IReceiver, AppModulesEnum, DataTypeEnum, \
     Inbound, Outbound, RoadEnum, EnvSaveEnum
-from con_simp.contain import Container, BioContainer, EnumContainer
-from con_simp.wire import ReportWire
+from con_simp.contain import Container, StepRequestContainer, StepResponseContainer
+from batch import StatesBatch, jets_tensor
 from nn_iface.ifaces import ProjectInterface, LossCriticInterface, LossActorInterface
-from tools import q_est_init, FinishAppBoolWrapper, finish_app_checking
+from tools import q_est_init, FinishAppBoolWrapper, finish_app_checking, wait_incoming
 from app_cfg import PROJECT_MAIN_CLASS, PROJECT_DIRECTORY_NAME, PROJECT_PY_FILE, BATCH_PER_SAVING, EPOCH_PER_SAVING
 
 logger = getLogger(logger_name + '.neuronet')
 
 
+class DelayedStep:
+    """ Шаг, обучение по которому отложено (конвейерный режим): входы прямого прохода без графа вычислений,
+    выбранные действия и полученные за них подкрепления. """
+    def __init__(self, batch_dict: Dict[TestId, RealWorldStageStatusN], s_order: List[TestId], actor_input: Tensor,
+                 max_q_est_index: Dict[TestId, int], commands: Dict[TestId, Tensor],
+                 reinforcement: Dict[TestId, ZeroOne], q_est: Dict[TestId, ZeroOne]):
+        """
+
+        :param batch_dict: Словарь состояний батча.
+        :param s_order: Порядок испытаний в батче.
+        :param actor_input: Вход актора.
+        :param max_q_est_index: Индексы выбранных (максимальных) оценок функции ценности.
+        :param commands: Выбранные действия.
+        :param reinforcement: Подкрепления за выбранные действия.
+        :param q_est: Оценки функции ценности предыдущего прохода.
+        """
+        self.batch_dict = batch_dict
+        self.s_order = s_order
+        self.actor_input = actor_input
+        self.max_q_est_index = max_q_est_index
+        self.commands = commands
+        self.reinforcement = reinforcement
+        self.q_est = q_est
+
+
 class NeuronetThread(INeuronet, AYarn):
     """ Нить нейросети. """
 
@@ -52,64 +77,46 @@ class NeuronetThread(INeuronet, AYarn):
         # Оценки функции ценности предыдущего прохода
         self.__q_est: Dict[TestId, ZeroOne] = {}
 
+        # Конвейерный режим: на сколько шагов обучение может отставать от выбора действий. Пока БФМ считает шаг,
+        # нейросеть обучается по предыдущим. 0 (по умолчанию) - обучение сразу после каждого шага, без отставания.
+        self.__pipeline_lag: int = project_cfg.PIPELINE_LAG if hasattr(project_cfg, 'PIPELINE_LAG') else 0
+        # Шаги, обучение по которым отложено.
+        self.__delayed: Deque[DelayedStep] = deque()
+
     def initialization(self) -> None:
         pass
 
     def run(self) -> None:
         pass
 
-    def __get_remaining_tests(self, inbound: Inbound, sleep_time: float,
-                              finish_app_checking: Callable[[Inbound], bool], is_fin_app: FinishAppBoolWrapper) -> int:
-        """ Получить оставшееся количество запланированных испытаний.
+    def __step(self, request: StepRequestContainer, inbound: Inbound, wait_time: float,
+               finish_app_checking: Callable[[Inbound], bool], is_fin_app: FinishAppBoolWrapper,
+               overlap: Optional[Callable[[], None]] = None) -> Optional[StepResponseContainer]:
+        """ Запрос шага в блок физической модели и ожидание ответа на него.
 
+        :param request: Запрос шага: команды на двигатели и управляющие флаги.
         :param inbound: Входные очереди блока нейросети.
-        :param sleep_time: Время ожидания данных из очереди.
+        :param wait_time: Максимальное время ожидания данных в очереди до повторной проверки.
         :param finish_app_checking: Функция проверки на появление команды завершения приложения.
         :param is_fin_app: Выходной параметр. Команда на завершение приложения есть?
-        :return: Оставшееся количество запланированных испытаний.
+        :param overlap: Работа, выполняемая после отправки запроса, пока блок физической модели считает шаг.
+        :return: Ответ на запрос. None - если ответа не дождались, так как поступила команда на завершение приложения.
         """
-        while not inbound[AppModulesEnum.PHYSICS][DataTypeEnum.REMANING_TESTS].has_incoming():
-            # Пока в канале нет сообщений, крутимся в цикле ожидания.
-            sleep(sleep_time)
-            is_fin_app(finish_app_checking(inbound))
-
-        # Дождались сообщения
-        container = inbound[AppModulesEnum.PHYSICS][DataTypeEnum.REMANING_TESTS].receive()
-        remaining_tests: int = container.unpack()
-        return remaining_tests
-
-    def __collect_batch(self, inbound: Inbound, sleep_time: float,
-                        finish_app_checking: Callable[[Inbound], bool], batch_size: int, is_fin_app: FinishAppBoolWrapper) \
-            -> Dict[TestId, RealWorldStageStatusN]:
-        """ Собрать словарь-контейнер-накопитель для состояний изделия в разных испытаниях для создания батча.
-
-        :param inbound: Входные очереди блока нейросети.
-        :param sleep_time: Время ожидания данных из очереди.
-        :param finish_app_checking: Функция проверки на появление команды завершения приложения.
-        :param batch_size: Планируемый размер батча.
-        :param is_fin_app: Выходной параметр. Команда на завершение приложения есть?
-        :return: Словарь состояний планируемых к обработке испытаний.
-        """
-        # Результирующий словарь
-        batch_dict: Dict[TestId, RealWorldStageStatusN] = {}
-        for i in range(batch_size):
-            # Отсчитываем количество, в зависимости от планируемого размера батча
-            while not inbound[AppModulesEnum.PHYSICS][DataTypeEnum.STAGE_STATUS].has_incoming():
-                # Крутимся в цикле в ожидании данных в канале.
-                sleep(sleep_time)
-                is_fin_app(finish_app_checking(inbound))
-
-            # Есть порция данных
-            container = inbound[AppModulesEnum.PHYSICS][DataTypeEnum.STAGE_STATUS].receive()
-            assert isinstance(container, BioContainer), \
-                "Container class should be a BioContainer. But now is {}".format(container.__class__)
-            test_id, _ = container.get()
-            stage_status = container.unpack()
-
-            # Пополняем словарь
-            batch_dict[test_id] = stage_status
-
-        return batch_dict
+        self.__outbound[AppModulesEnum.PHYSICS][DataTypeEnum.STEP_REQUEST].send(request)
+        if overlap is not None:
+            overlap()
+
+        response_line: IReceiver = inbound[AppModulesEnum.PHYSICS][DataTypeEnum.STEP_RESPONSE]
+        while not response_line.has_incoming():
+            # Пока в канале нет ответа, ждём его (или команду на завершение приложения).
+            if is_fin_app(finish_app_checking(inbound)):
+                return None
+            wait_incoming(inbound, response_line, wait_time)
+
+        container = response_line.receive()
+        assert isinstance(container, StepResponseContainer), \
+            "Container class should be a StepResponseContainer. But now is {}".format(container.__class__)
+        return container
 
     def _q_est_actual(self, s: Dict[TestId, RealWorldStageStatusN], q_est: Dict[TestId, ZeroOne]) \
             -> Dict[TestId, ZeroOne]:
@@ -153,40 +160,72 @@ class NeuronetThread(INeuronet, AYarn):
         # Возвращаем словарь очищенный от ненужных оценок.
         return q
 
-    def __get_reinforcement(self, inbound: Inbound, waiting_count: int, sleep_time: float,
-                            finish_app_checking: Callable[[Inbound], bool], is_fin_app: FinishAppBoolWrapper) \
-            -> Dict[TestId, ZeroOne]:
-        """ Получить подкрепления.
+    def __learn(self, s_order: List[TestId], commands: Dict[TestId, Tensor], reinforcement: Dict[TestId, ZeroOne],
+                q_est: Dict[TestId, ZeroOne], medium: Tensor, max_q_est_next: Tensor) -> None:
+        """ Обратный проход и оптимизация критика и актора по результатам шага.
 
-        :param inbound: Входные очереди блока нейросети.
-        :param waiting_count: Сколько подкреплений необходимо получить.
-        :param sleep_time: Время ожидания данных из очереди.
-        :param finish_app_checking: Функция проверки на появление команды завершения приложения.
-        :param is_fin_app: Выходной параметр. Команда на завершение приложения есть?
-        :return: Словарь подкреплений для обрабатываемых испытаний.
+        :param s_order: Порядок испытаний в батче.
+        :param commands: Выбранные действия.
+        :param reinforcement: Подкрепления за выбранные действия.
+        :param q_est: Оценки функции ценности предыдущего прохода.
+        :param medium: Выход актора.
+        :param max_q_est_next: Тензор максимальных оценок функции ценности (выход критика).
         """
-        result: Dict[TestId, ZeroOne] = {}
-        for i in range(waiting_count):
-            while not inbound[AppModulesEnum.PHYSICS][DataTypeEnum.REINFORCEMENT].has_incoming():
-                # Пока в канале нет сообщений, крутимся в цикле ожидания.
-                sleep(sleep_time)
-                is_fin_app(finish_app_checking(inbound))
+        # Объект функции потерь критика.
+        critic_loss_fn: LossCriticInterface = self.__project.critic_loss
+        # todo протестировать работу
+        # Ошибка критика
+        crititc_loss: Tensor = critic_loss_fn(s_order, reinforcement, q_est, max_q_est_next)
 
-            # Дождались сообщения
-            container = inbound[AppModulesEnum.PHYSICS][DataTypeEnum.REINFORCEMENT].receive()
+        # Произвести обратный проход по критику
+        crititc_loss.backward()
 
-            reinforcement: ReinforcementValue = container.unpack()
+        # Объект функции потерь актора
+        actor_loss_fn: LossActorInterface = self.__project.actor_loss
 
-            _, reinf = reinforcement.get_reinforcement()
-            result[container.get()] = reinf
+        # Целевой тензор актора.
+        actor_target: Tensor = self.__project.actor_target(s_order, commands)
 
-        return result
+        # Ошибка актора
+        actor_loss: Tensor = actor_loss_fn(medium, actor_target)
+
+        # Обратный проход по актору.
+        actor_loss.backward()
+
+        # Оптимизировать критика и актора.
+        self.__project.actor_optimizer.step()
+        self.__project.critic_optimizer.step()
+
+    def __learn_delayed(self, step: DelayedStep) -> None:
+        """ Обучение по отложенному шагу. Параметры сетей с момента выбора действий могли измениться (и граф
+        вычислений того прохода не сохранялся), поэтому прямой проход повторяется по сохранённым входам. Выбор
+        действий не повторяется: учитываются те действия, которые были отправлены в блок физической модели.
+
+        :param step: Отложенный шаг.
+        """
+        medium: Tensor = self.__project.actor_forward(step.actor_input)
+        medium_in_critic: Tensor = self.__project.critic_input_preparation(step.actor_input, medium,
+                                                                           step.batch_dict, step.s_order)
+        q_est_next: Tensor = self.__project.critic_forward(medium_in_critic)
+        max_q_est_next: Tensor = self.__project.critic_output_transformation(q_est_next, step.s_order,
+                                                                             step.max_q_est_index)
+        self.__learn(step.s_order, step.commands, step.reinforcement, step.q_est, medium, max_q_est_next)
+
+    def __learn_delayed_until(self, lag: int) -> None:
+        """ Обучение по отложенным шагам (от старых к новым), пока их больше *lag*
+
+        :param lag: Сколько отложенных шагов может остаться.
+        """
+        while len(self.__delayed) > lag:
+            self.__learn_delayed(self.__delayed.popleft())
 
     def __finalize(self, project: ProjectInterface):
         """ Сохранения состояния процесса тренировки.
 
         :param project: Текущий рабочий проект.
         """
+        # Сохраняется сеть, обученная по всем уже выполненным шагам, в том числе отложенным.
+        self.__learn_delayed_until(0)
         project.save_nn()
         project.save_state()
         # logger.info('Нейросеть. Поступила команда на завершение приложения. Завершаем нить.')
@@ -198,20 +237,18 @@ class NeuronetThread(INeuronet, AYarn):
         batch_counter: int = BATCH_PER_SAVING
         # Счётчик эпох
         epoch_counter: int = EPOCH_PER_SAVING
-        # Проверка линии связи, на наличие встречной линии репорта.
-        assert isinstance(self.__inbound[AppModulesEnum.PHYSICS][DataTypeEnum.REMANING_TESTS], ReportWire), \
-            'Data wire for remaining tests info should be a ReportWire class. But now is {}'. \
-                format(self.__inbound[AppModulesEnum.PHYSICS][DataTypeEnum.REMANING_TESTS].__class__)
-        # Ответная линия, по которой блок нейросети отправляет в блок физ. модели количество испытаний,
-        # которые он готов принять и обработать.
-        report_wire: ISender = self.__inbound[AppModulesEnum.PHYSICS][DataTypeEnum.REMANING_TESTS] \
-            .get_report_sender()
-
         start_epoch: int = self.__project.state.epoch_current
         it_debug = range(start_epoch, self.__project.state.epoch_stop + 1)
 
         logger.debug("Epoch iterable: {}".format(it_debug))
 
+        # Первый запрос шага: команд ещё нет, запрашивается только батч состояний.
+        response: Optional[StepResponseContainer] = \
+            self.__step(StepRequestContainer(batch_size=self.__cfg.START_VALUES['batch_size']), self.__inbound,
+                        WAIT_TIME, finish_app_checking, is_fin_app)
+        # Флаг избежания двойного подряд бессмысленного сохранения состояния.
+        is_training_state_already_saved: bool = False
+
         # Цикл по эпохам
         # for current_epoch in range(start_epoch, self.__project.state.epoch_stop + 1):
         for current_epoch in it_debug:
@@ -219,38 +256,25 @@ class NeuronetThread(INeuronet, AYarn):
             # is_training_state_already_saved: bool = False
             # Цикл по испытаниям в рамках одной эпохи.
             while True:
-                # Флаг избежания двойного подряд бессмысленного сохранения состояния окр. среды.
-                is_training_state_already_saved = False
-
                 if is_fin_app():
                     self.__finalize(self.__project)
                     logger.info('Поступила команда на завершение приложения. Завершаем нить.')
                     return
 
-                # Оставшееся количество запланированных испытаний.
-                remaining_tests: int = self.__get_remaining_tests(self.__inbound, SLEEP_TIME,
-                                                                  finish_app_checking, is_fin_app)
+                # Оставшееся количество запланированных испытаний и батч состояний из ответа на предыдущий запрос.
+                remaining_tests, _, _, _ = response.get()
 
                 if remaining_tests == 0:
                     # Завершение одной эпохи, так как больше нет запланированных испытаний.
                     break
 
-                # БФМ ожидает от нас сигнала на продолжение.
-                self.__outbound[AppModulesEnum.PHYSICS][DataTypeEnum.ENV_ROAD].send(EnumContainer(RoadEnum.CONTINUE))
-
-                # Если размер планируемого батча на входе актора больше полного планируемого количества испытаний,
-                # то будем формировать
-                # батч размером в полное планируемое количество испытаний.
-                self.__project.state.batch_size = self.__cfg.START_VALUES['batch_size'] \
-                    if self.__cfg.START_VALUES['batch_size'] <= remaining_tests else remaining_tests
-
-                # Отправляем в модуль физической модели число испытаний, которое хочет получить модуль нейросети.
-                report_wire.send(Container(cargo=self.__project.state.batch_size))
+                # БФМ присылает не больше испытаний, чем осталось в плане: размер батча - по факту.
+                ids, _ = response.unpack().get()
+                self.__project.state.batch_size = len(ids)
 
                 # Сформировать словарь состояний изделия в различных испытаниях.
                 batch_dict: Dict[TestId, RealWorldStageStatusN] = \
-                    self.__collect_batch(self.__inbound, SLEEP_TIME,
-                                         finish_app_checking, self.__project.state.batch_size, is_fin_app)
+                    StatesBatch(ids, response.unpack().unpack()).to_states()
 
                 # Фиксируем порядок испытаний.
                 s_order: List[TestId] = []
@@ -263,123 +287,100 @@ class NeuronetThread(INeuronet, AYarn):
                 # debug = self._q_est_actual({0: RealWorldStageStatusN(), 1: RealWorldStageStatusN()},
                 #                             {0: 12.0, 2: 13.0, 3: 14.0})
 
-                # сформировать батч-тензор для ввода в актора состояний N испытаний
-                # стейк слабой прожарки (предыдущая прожарка производится в вызываемом методе)
-                medium_rare: Tensor = self.__project.actor_input_preparation(batch_dict, s_order)
-
-                # получить тензор выхода (действий/команд) актора для каждого из N испытаний
-                # стейк средней прожарки
-                medium: Tensor = self.__project.actor_forward(medium_rare)
-
-                # сформировать батч-тензор для ввода в критика из NхV вариантов, где N-количество испытаний/состояний
-                # на входе в актора, V - количество вариантов действий актора
-                # (количество вариантов включений двигателей)
-                # Если батч-тензор на входе в актора состоит из 10 испытаний, количество вариантов
-                # включения двигателей - 32 (2^5), то на вход в критика пойдёт тензор размером 10 х 32,
-                # т. е. 320 векторов
-
-                medium_in_critic: Tensor = self.__project.critic_input_preparation(medium_rare, medium,
-                                                                                   batch_dict, s_order)
-
-                # debug = self.__project.critic_input_preparation(
-                #     tensor([[0.1, 0.2, 0.3, 0.4], [0.5, 0.6, 0.7, 0.8]]),
-                #     tensor([[0, 0, 0, 0, 0], [0, 0, 0, 0, 0]]),
-                #     {0: RealWorldStageStatusN(), 1: RealWorldStageStatusN()},
-                #     [1, 0])
-
-                # Получить тензор значений функции ценности на выходе из критика размерностью NхV
-                # Нужно понимать, что первые V оценок в выходном тензоре критика относяться к первому испытанию.
-                # Вторые V оценок относятся ко второму испытанию.
-                # Третьи V оценок к третьему.
-                # И т. д.
-                q_est_next: Tensor = self.__project.critic_forward(medium_in_critic)
-
-                # Для каждого из N испытаний на выходе из критика
-                # выбрать максимальное значение функции ценности из соответствующих V вариантов.
-                # То есть, из первых V оценок надо выбрать максимальную,
-                # и это будет максимальная оценка для первого испытания.
-                # Из вторых V оценок надо выбрать максимальную, и это будет максимальная оценка для второго испытания.
-                # Из третьих V оценок надо выбрать максимальную, и это будет максимальная оценка для третьего.
-                # И т. д.
-
-                # Индексы максимальных значений оценки функции ценности.
-                max_q_est_next_index: Dict[TestId, int] = self.__project.max_in_q_est(q_est_next, s_order)
-
-                # Тензор максимальных оценок функции ценности.
-                max_q_est_next: Tensor = self.__project.critic_output_transformation(q_est_next, s_order,
-                                                                                     max_q_est_next_index)
-
-                # Выбрать варианты действий актора,
-                # которые соответствуют выбранным максимальным N значениям функции ценности.
-                commands: Dict[TestId, Tensor] = self.__project.choose_max_q_action(s_order, max_q_est_next_index)
-
-                # Отправка команд (планируемых действий), согласно максимального значения функции ценности
-                for test_id, command_t in commands.items():
-                    # Проходимся по словарю команд
-
-                    # Преобразование данных тензора в список
-                    command: List = command_t.tolist()[0]
-
-                    # Отправка желаемых действий для каждого испытания в модуль физической модели.
-                    self.__outbound[AppModulesEnum.PHYSICS][DataTypeEnum.JETS_COMMAND].send(
-                        Container(test_id, StageControlCommands(0, 0, *command))
-                    )
-
-                # Для каждого из N испытаний получить подкрепления, соответствующие выбранным вариантам действий.
-                reinforcement: Dict[TestId, ZeroOne] = self.__get_reinforcement(self.__inbound,
-                                                                                len(commands),
-                                                                                SLEEP_TIME,
-                                                                                finish_app_checking, is_fin_app)
-
-                # Объект функции потерь критика.
-                critic_loss_fn: LossCriticInterface = self.__project.critic_loss
-                # todo протестировать работу
-                # Ошибка критика
-                crititc_loss: Tensor = critic_loss_fn(s_order, reinforcement, self.__q_est, max_q_est_next)
-
-                # Произвести обратный проход по критику
-                crititc_loss.backward()
-
-                # Объект функции потерь актора
-                actor_loss_fn: LossActorInterface = self.__project.actor_loss
-
-                # Целевой тензор актора.
-                actor_target: Tensor = self.__project.actor_target(s_order, commands)
-
-                # Ошибка актора
-                actor_loss: Tensor = actor_loss_fn(medium, actor_target)
-
-                # Обратный проход по актору.
-                actor_loss.backward()
-
-                # Оптимизировать критика и актора.
-                self.__project.actor_optimizer.step()
-                self.__project.critic_optimizer.step()
-
-                # # Сохранение по новым интерфейсам.
-                # # todo после каждого батча сохранять не стоит. Надо реже.
-                # self.__finalize(self.__project)
+                # В конвейерном режиме граф вычислений этого прохода не нужен: при обучении проход повторяется.
+                with set_grad_enabled(self.__pipeline_lag == 0):
+                    # сформировать батч-тензор для ввода в актора состояний N испытаний
+                    # стейк слабой прожарки (предыдущая прожарка производится в вызываемом методе)
+                    medium_rare: Tensor = self.__project.actor_input_preparation(batch_dict, s_order)
+
+                    # получить тензор выхода (действий/команд) актора для каждого из N испытаний
+                    # стейк средней прожарки
+                    medium: Tensor = self.__project.actor_forward(medium_rare)
+
+                    # сформировать батч-тензор для ввода в критика из NхV вариантов,
+                    # где N-количество испытаний/состояний на входе в актора, V - количество вариантов действий актора
+                    # (количество вариантов включений двигателей)
+                    # Если батч-тензор на входе в актора состоит из 10 испытаний, количество вариантов
+                    # включения двигателей - 32 (2^5), то на вход в критика пойдёт тензор размером 10 х 32,
+                    # т. е. 320 векторов
+
+                    medium_in_critic: Tensor = self.__project.critic_input_preparation(medium_rare, medium,
+                                                                                       batch_dict, s_order)
+
+                    # debug = self.__project.critic_input_preparation(
+                    #     tensor([[0.1, 0.2, 0.3, 0.4], [0.5, 0.6, 0.7, 0.8]]),
+                    #     tensor([[0, 0, 0, 0, 0], [0, 0, 0, 0, 0]]),
+                    #     {0: RealWorldStageStatusN(), 1: RealWorldStageStatusN()},
+                    #     [1, 0])
+
+                    # Получить тензор значений функции ценности на выходе из критика размерностью NхV
+                    # Нужно понимать, что первые V оценок в выходном тензоре критика относяться к первому испытанию.
+                    # Вторые V оценок относятся ко второму испытанию.
+                    # Третьи V оценок к третьему.
+                    # И т. д.
+                    q_est_next: Tensor = self.__project.critic_forward(medium_in_critic)
+
+                    # Для каждого из N испытаний на выходе из критика
+                    # выбрать максимальное значение функции ценности из соответствующих V вариантов.
+                    # То есть, из первых V оценок надо выбрать максимальную,
+                    # и это будет максимальная оценка для первого испытания.
+                    # Из вторых V оценок надо выбрать максимальную,
+                    # и это будет максимальная оценка для второго испытания.
+                    # Из третьих V оценок надо выбрать максимальную, и это будет максимальная оценка для третьего.
+                    # И т. д.
+
+                    # Индексы максимальных значений оценки функции ценности.
+                    max_q_est_next_index: Dict[TestId, int] = self.__project.max_in_q_est(q_est_next, s_order)
+
+                    # Тензор максимальных оценок функции ценности.
+                    max_q_est_next: Tensor = self.__project.critic_output_transformation(q_est_next, s_order,
+                                                                                         max_q_est_next_index)
+
+                    # Выбрать варианты действий актора,
+                    # которые соответствуют выбранным максимальным N значениям функции ценности.
+                    commands: Dict[TestId, Tensor] = self.__project.choose_max_q_action(s_order, max_q_est_next_index)
 
                 # Сохранение состояний в рамках потока батчей.
                 # Декремент счётчика батчей.
                 batch_counter -= 1
-                if batch_counter == 0:
-                    # Если количество батчей между сохранениями пройдено.
-                    # Отправление в БФМ сигнала на сохранение состояния.
-                    self.__outbound[AppModulesEnum.PHYSICS][DataTypeEnum.ENV_SAVE].send(EnumContainer(EnvSaveEnum.SAVE_PROCESS_STATE))
+                # Если количество батчей между сохранениями пройдено - БФМ сохранит состояние после выполнения команд.
+                save: EnvSaveEnum = EnvSaveEnum.SAVE_PROCESS_STATE if batch_counter == 0 else EnvSaveEnum.CONTINUE
+
+                # Команды (планируемые действия) согласно максимального значения функции ценности, флаг сохранения
+                # и размер следующего батча - одним запросом. В ответе - подкрепления, соответствующие выбранным
+                # вариантам действий, и следующий батч состояний.
+                jets: Tensor = jets_tensor(StageControlCommands(0, 0, *command_t.tolist()[0])
+                                           for command_t in commands.values())
+                # В конвейерном режиме, пока БФМ считает шаг, нейросеть обучается по отложенным шагам (оставляя
+                # не больше lag - 1: с учётом этого шага отставание обучения от выбора действий не превысит lag).
+                response = self.__step(StepRequestContainer(list(commands.keys()), jets,
+                                                            self.__cfg.START_VALUES['batch_size'], save=save),
+                                       self.__inbound, WAIT_TIME, finish_app_checking, is_fin_app,
+                                       (lambda: self.__learn_delayed_until(self.__pipeline_lag - 1))
+                                       if self.__pipeline_lag > 0 else None)
+                if response is None:
+                    # Поступила команда на завершение приложения (обработка - в начале цикла).
+                    continue
+
+                _, reward_ids, rewards, _ = response.get()
+                reinforcement: Dict[TestId, ZeroOne] = dict(zip(reward_ids, rewards.tolist()))
+
+                if self.__pipeline_lag == 0:
+                    self.__learn(s_order, commands, reinforcement, self.__q_est, medium, max_q_est_next)
+                else:
+                    self.__delayed.append(DelayedStep(batch_dict, s_order, medium_rare.detach(), max_q_est_next_index,
+                                                      commands, reinforcement, self.__q_est))
+
+                is_training_state_already_saved = False
+                if save == EnvSaveEnum.SAVE_PROCESS_STATE:
                     # Восстановление счётчика батчей
                     batch_counter = BATCH_PER_SAVING
                     # Сохранение состояния процесса.
                     self.__finalize(self.__project)
                     is_training_state_already_saved = True
-                else:
-                    # Сохранение не требуется.
-                    # is_training_state_already_saved is _False_!
-                    # _Внутри_эпоховая_ команда продолжать процесс.
-                    self.__outbound[AppModulesEnum.PHYSICS][DataTypeEnum.ENV_SAVE].send(EnumContainer(EnvSaveEnum.CONTINUE))
 
-            # Команды EnvSaveEnum.CONTINUE внутри этого блока не сдублируют такую же _внутри_эпоховую_ команду,
-            # так как будут поданы (и будут получены) уже на следующем проходе в БНС и БФМ.
+            # На границе эпох флаг сохранения уходит в БФМ вместе с указанием, куда двигаться дальше.
+            save = EnvSaveEnum.CONTINUE
             if current_epoch < self.__project.state.epoch_stop:
                 # Запоминание факта перехода к новой эпохе
                 self.__project.state.epoch_current = current_epoch + 1
@@ -392,29 +393,25 @@ class NeuronetThread(INeuronet, AYarn):
                     epoch_counter = EPOCH_PER_SAVING
                     if not is_training_state_already_saved:
                         # Двух сохранений подряд не будет.
-                        # Отправляем в БФМ сигнал на сохранение состояния.
-                        self.__outbound[AppModulesEnum.PHYSICS][DataTypeEnum.ENV_SAVE].send(EnumContainer(EnvSaveEnum.SAVE_PROCESS_STATE))
+                        save = EnvSaveEnum.SAVE_PROCESS_STATE
                         # Сохраняем состояние процесса.
                         self.__finalize(self.__project)
-                    else:
-                        # Сохранение не требуется.
-                        self.__outbound[AppModulesEnum.PHYSICS][DataTypeEnum.ENV_SAVE].send(EnumContainer(EnvSaveEnum.CONTINUE))
-                    # Отправка в блок физ. модели указания на начало новой эпохи.
-                    self.__outbound[AppModulesEnum.PHYSICS][DataTypeEnum.ENV_ROAD].send(EnumContainer(RoadEnum.START_NEW_AGE))
+                # Указание блоку физ. модели на начало новой эпохи. В ответе - первый батч новой эпохи.
+                response = self.__step(StepRequestContainer(batch_size=self.__cfg.START_VALUES['batch_size'],
+                                                            road=RoadEnum.START_NEW_AGE, save=save),
+                                       self.__inbound, WAIT_TIME, finish_app_checking, is_fin_app)
             elif current_epoch == self.__project.state.epoch_stop:
                 if not is_training_state_already_saved:
                     # Двух сохранений подряд не будет.
                     # Сохранение состояния в хранилище на естественном завершении процесса обучения.
                     self.__finalize(self.__project)
-                    self.__outbound[AppModulesEnum.PHYSICS][DataTypeEnum.ENV_SAVE].send(EnumContainer(EnvSaveEnum.SAVE_PROCESS_STATE))
-                else:
-                    # Сохранение не требуется.
-                    self.__outbound[AppModulesEnum.PHYSICS][DataTypeEnum.ENV_ROAD].send(EnumContainer(EnvSaveEnum.CONTINUE))
+                    save = EnvSaveEnum.SAVE_PROCESS_STATE
                 # Запоминание факта завершения прохода по эпохам.
                 self.__project.state.epoch_current = current_epoch
                 # Запланированное количество эпох исполнено.
-                # Отправка в БФМ предупреждающего сигнала о грядущем завершение процесса обучения.
-                self.__outbound[AppModulesEnum.PHYSICS][DataTypeEnum.ENV_ROAD].send(EnumContainer(RoadEnum.ALL_AGES_FINISHED))
+                # Отправка в БФМ предупреждающего сигнала о грядущем завершение процесса обучения. Ответа на него нет.
+                self.__outbound[AppModulesEnum.PHYSICS][DataTypeEnum.STEP_REQUEST].send(
+                    StepRequestContainer(road=RoadEnum.ALL_AGES_FINISHED, save=save))
                 # Отправка в блок визуализации ЗАПРОСА на завершение приложения.
                 logger.info("Отправка в блок визуализации ЗАПРОСА на завершение приложения.")
                 self.__outbound[AppModulesEnum.VIEW][DataTypeEnum.APP_FINISH_REQUEST].send(Container())
@@ -5,16 +5,18 @@ from logging import getLogger
 from ifc_flow.i_flow import IPhysics
 from thrds_tk.threads import AYarn
 import tools
-from tools import FinishAppBoolWrapper, finish_app_checking
-from structures import RealWorldStageStatusN, ReinforcementValue, StageControlCommands
-from typing import Dict, Callable, Any, Optional
-from time import sleep
+from tools import FinishAppBoolWrapper, finish_app_checking, wait_incoming
+from structures import RealWorldStageStatusN
+from typing import Dict, Callable, Any, Optional, Mapping, Tuple, List
+from itertools import islice
 from con_intr.ifaces import ISocket, ISender, IReceiver, AppModulesEnum, DataTypeEnum, IContainer, BioEnum, \
     Inbound, Outbound, RoadEnum, EnvSaveEnum, A, D
-from con_simp.contain import Container, BioContainer
-from con_simp.wire import ReportWire
-from physics import Moving
-from copy import deepcopy
+from con_simp.contain import BioContainer, BatchContainer, StepRequestContainer, StepResponseContainer
+from torch import Tensor, tensor, int8
+from tools_bt import FinishBatch
+from integrators import IIntegrator
+from thrds_tk.workers import IPhysicsShard, PhysicsShard, PhysicsWorkers
+from batch import StatesBatch, StatesView
 from states.i_states import IStatesStore
 from states.s_states import IInitStates
 from nn_iface.if_state import InterfaceStorage
@@ -81,8 +83,20 @@ class PhysicsThread(IPhysics, AYarn):
 
         self.__birth: bool = birth
 
-        # Условие окончания одного конкретного испытания.
-        self.__finish_criterion = project_cfg.FINISH
+        # Условие окончания испытаний батча.
+        self.__finish_criterion: FinishBatch = project_cfg.FINISH
+
+        # Метод интегрирования уравнений движения. Может отсутствовать в настройках, тогда - метод по умолчанию.
+        self.__integrator: Optional[IIntegrator] = project_cfg.INTEGRATOR if hasattr(project_cfg, 'INTEGRATOR') \
+            else None
+        # Перемотка баллистического полёта (все двигатели выключены) к смене интервала считывания или к касанию.
+        self.__coast_fast_forward: bool = project_cfg.COAST_FAST_FORWARD \
+            if hasattr(project_cfg, 'COAST_FAST_FORWARD') else False
+        # Количество процессов физической модели. Если не больше одного - расчёт в самой нити.
+        self.__workers_count: int = project_cfg.PHYSICS_WORKERS if hasattr(project_cfg, 'PHYSICS_WORKERS') else 0
+        # Испытания в работе и расчёт их шагов: в самой нити над хранилищем или в пуле процессов,
+        # каждый со своим хранилищем. Создаётся в нити.
+        self.__physics: Optional[IPhysicsShard] = None
 
         self.__environment_storage: InterfaceStorage = \
             project_cfg.ENVIRONMENT_STORAGE(app_cfg.PROJECT_DIRECTORY_PATH
@@ -117,26 +131,27 @@ class PhysicsThread(IPhysics, AYarn):
     def run(self) -> None:
         pass
 
-    def __get_states_count(self, inbound: Inbound, report_line: IReceiver,
-                           sleep_time: float, finish_app_checking: Callable[[Inbound], bool], app_fin: FinishAppBoolWrapper) -> int:
-        """ Получить из нейросети количество испытаний, которое она готова обработать.
+    def __step_request(self, inbound: Inbound, wait_time: float,
+                       finish_app_checking: Callable[[Inbound], bool], app_fin: FinishAppBoolWrapper) \
+            -> Optional[StepRequestContainer]:
+        """ Ожидание и получение запроса шага из нейросети.
 
-        :param inbound: словарь исходящих каналов передачи данных
-        :param report_line: Канал передачи данной информации.
-        :param sleep_time: время сна нити, в ожидании появления очередной команды в канале.
+        :param inbound: словарь входящих каналов передачи данных
+        :param wait_time: максимальное время ожидания запроса в канале до повторной проверки.
         :param finish_app_checking: метод, перехватывающий команду на завершение нити и изменяющий app_fin
         :param app_fin: аргумент - возвращаемое значение, сигнализирующие о наличии команды на завершение приложения.
-        :return: Количество испытаний, которое готова обработать нейросеть.
+        :return: Запрос шага. None - если запроса не дождались, так как поступила команда на завершение приложения.
         """
-        while not report_line.has_incoming():
-            app_fin(finish_app_checking(inbound))
-            sleep(sleep_time)
+        request_line: IReceiver = inbound[AppModulesEnum.NEURO][DataTypeEnum.STEP_REQUEST]
+        while not request_line.has_incoming():
+            if app_fin(finish_app_checking(inbound)):
+                return None
+            wait_incoming(inbound, request_line, wait_time)
 
-        container: IContainer = report_line.receive()
-        assert isinstance(container, Container), "Receiving container should be a Container class, but now is: "\
-            .format(container.__class__)
-        count: int = container.unpack()
-        return count
+        container: IContainer = request_line.receive()
+        assert isinstance(container, StepRequestContainer), \
+            "Receiving container should be a StepRequestContainer class, but now is: {}".format(container.__class__)
+        return container
 
     def __set_initial_states(self, states_count: int) -> Dict[TestId, RealWorldStageStatusN]:
         """ Установка начальных положений изделия в испытаниях.
@@ -165,83 +180,81 @@ class PhysicsThread(IPhysics, AYarn):
 
         return result
 
-    def __command_waiting(self, waiting_count: int, inbound: Inbound,
-                          sleep_time: float, finish_app_checking: Callable[[Inbound], bool], app_fin: FinishAppBoolWrapper)\
-            -> Dict[TestId, StageControlCommands]:
-        """ Ожидание и получение команды из нейросети.
+    def __states_distribution(self, outbound: Outbound,
+                              groups: List[Tuple[Mapping[TestId, RealWorldStageStatusN], BioEnum]],
+                              quantity=-1) -> BatchContainer:
+        """ Рассылка состояний по потребителям информации. Блок вида получает состояния по одному, для блока
+        нейросети весь батч упаковывается в один контейнер (он уходит в ответе на запрос шага).
 
-        :param waiting_count: количество ожидаемых команд из блока нейросети.
-        :param inbound: словарь исходящих каналов передачи данных
-        :param sleep_time: время сна нити, в ожидании появления очередной команды в кана`ле.
-        :param finish_app_checking: метод, перехватывающий команду на завершение нити и изменяющий app_fin
-        :param app_fin: аргумент - возвращаемое значение, сигнализирующие о наличии команды на завершение приложения.
-        :return: Словарь управляющих команд, сгенерированных нейросетью.
+        :param outbound: Словарь выходных каналов передачи данных.
+        :param groups: Словари состояний вместе с состоянием для их испытаний. Словари могут быть пустыми {},
+        и если пусты все, то батч будет пустым.
+        :param quantity: Какое количество состояний (по всем словарям, в порядке их следования) надо распространить.
+        Если == -1 (по умолчанию), то все.
+        :type quantity: int
+        :return: Батч состояний для блока нейросети.
         """
+        available: int = sum(len(states) for states, _ in groups)
+        assert quantity <= available, \
+            "Ошибка! Запрошенное количество для передачи должно быть МЕНЬШЕ или РАВНО доступному."
 
-        result: Dict[TestId, StageControlCommands] = {}
-        for i in range(waiting_count):
-
-            while not inbound[AppModulesEnum.NEURO][DataTypeEnum.JETS_COMMAND].has_incoming():
-                app_fin(finish_app_checking(inbound))
-                sleep(sleep_time)
+        amount = quantity if quantity != -1 else available
 
-            container = inbound[AppModulesEnum.NEURO][DataTypeEnum.JETS_COMMAND].receive()
-            assert isinstance(container, Container), "Receiving container should be a Container class, but now is: " \
-                .format(container.__class__)
-            test_id, command = container.get(), container.unpack()
-            result[test_id] = command
+        selected: Dict[TestId, RealWorldStageStatusN] = {}
+        bio_values: List[int] = []
+        for states, bio in groups:
+            # При amount == 3, будут отправлены три первых состояния по всем словарям.
+            for key in islice(states.keys(), amount - len(selected)):
+                selected[key] = states[key]
+                bio_values.append(bio.value)
+                # Блок вида получает состояния по одному, в виде неизменяемых снимков (без копирования).
+                container: BioContainer = BioContainer(key, bio, states[key].snapshot())
+                outbound[AppModulesEnum.VIEW][DataTypeEnum.STAGE_STATUS].send(container)
 
-        return result
+        # Матрица состояний батча создаётся заново, поэтому копировать её перед отправкой не нужно.
+        batch: StatesBatch = StatesBatch.from_states(selected) if len(selected) > 0 else StatesBatch.empty([])
+        return BatchContainer(batch.ids, tensor(bio_values, dtype=int8), batch.data)
 
-    def __get_reinforcement(self, new_state: RealWorldStageStatusN, command: StageControlCommands) -> ReinforcementValue:
-        """ Подкрепление действий системы управления, которые привели к новому состоянию
+    def __next_batch(self, count: int) -> BatchContainer:
+        """ Следующий батч состояний для блока нейросети: сначала испытания в работе, недостающие - новые.
 
-        :param new_state: новое состояние изделия
-        :param command: команда нейросети, которая привела к этому состоянию.
-        :return: Подкрепление.
+        :param count: Сколько испытаний запрошено блоком нейросети.
+        :return: Батч состояний.
         """
-        return ReinforcementValue(new_state.time_stamp,
-                                           tools.Reinforcement.get_reinforcement(new_state, command)
-                                           )
-
-    def __test_end(self, state: RealWorldStageStatusN) -> bool:
-        """ Проверка на окончание этого конкретного испытания.
-
-        :param state: Новое состояние теста, проверяемое на то что он терминальный
-        :return: Испытание закончилось? """
-
-        if self.__finish_criterion.is_one_test_failed(state.position) \
-                or self.__finish_criterion.is_one_test_success(state, tools.Reinforcement.accuracy):
-            return True
-        else:
-            return False
-
-    def __states_distribution(self, outbound: Outbound, states: Dict[TestId, RealWorldStageStatusN],
-                              bio=BioEnum.ALIVE, quantity=-1) -> None:
-        """ Рассылка состояний по потребителям информации.
-
-        :param outbound: Словарь выходных каналов передачи данных.
-        :param states: Словарь состояний. Может быть пустой {}, и тогда никакие данные не будут рассылаться.
-        :param bio: Состояние для рассылаемых испытаний.
-        :param quantity: Какое количество состояний из словаря надо распространить. Если == -1 (по умолчанию), то все.
-        :type quantity: int
+        if count <= self.__physics.get_amount():
+            # Если запрошенное блоком нейросети количество состояний МЕНЬШЕ,
+            # чем оставшееся после предыдущего прохода по нейросети.
+            return self.__states_distribution(self.__outgoing, [(self.__physics.states(count), BioEnum.ALIVE)], count)
+
+        # Если запрошенное блоком нейросети количество состояний БОЛЬШЕ,
+        # чем оставшееся после предыдущего прохода по нейросети.
+        # Добиваем до нужного количества, генерацией новых состояний.
+        new_states = self.__set_initial_states(count - self.__physics.get_amount())
+        # Отправляем потребителям инициализированные состояния и все оставшиеся имеющиеся состояния.
+        batch: BatchContainer = self.__states_distribution(
+            self.__outgoing, [(new_states, BioEnum.INIT), (self.__physics.states(count), BioEnum.ALIVE)])
+        # добавляем новые состояния к испытаниям в работе
+        if len(new_states) > 0:
+            self.__physics.add(StatesBatch.from_states(new_states))
+        return batch
+
+    def __step(self, ids: List[TestId], jets: Tensor) -> Tuple[Tensor, Tensor]:
+        """ Применить команды нейросети к испытаниям: новые состояния, подкрепления, завершение испытаний.
+
+        :param ids: Идентификаторы испытаний в порядке строк матрицы команд. Если испытания нет в работе - KeyError.
+        :param jets: Матрица команд на двигатели (N, JETS_WIDTH)
+        :return: Подкрепления (N) и флаги завершения испытаний (N)
         """
-        assert quantity <= len(states), \
-            "Ошибка! Запрошенное количество для передачи должно быть МЕНЬШЕ или РАВНО доступному."
+        # Шаг целиком (новые состояния, окончание испытаний, подкрепления) считается в нити или в процессах пула.
+        reinforcement, done, finished = self.__physics.step(ids, jets, tools.Reinforcement.accuracy)
 
-        amount = quantity if quantity != -1 else len(states)
+        finished_states: Mapping[TestId, RealWorldStageStatusN] = StatesView(finished)
+        for key in finished.ids:
+            # Отправляем в модуль вида завершённое состояние для отображения.
+            container: BioContainer = BioContainer(key, BioEnum.FIN, finished_states[key].snapshot())
+            self.__outgoing[AppModulesEnum.VIEW][DataTypeEnum.STAGE_STATUS].send(container)
 
-        i = 0
-        for key in states.keys():
-            # Если на входе был пустой словарь, то мы сразу же выходим из цикла.
-            # При amount == 3, будут отправки при i == 0, 1, 2 (то есть - три штуки)
-            if i == amount: break
-
-            container: BioContainer = BioContainer(key, bio, states[key])
-            outbound[AppModulesEnum.NEURO][DataTypeEnum.STAGE_STATUS].send(deepcopy(container))
-            outbound[AppModulesEnum.VIEW][DataTypeEnum.STAGE_STATUS].send(deepcopy(container))
-            i += 1
-            # logger.debug("В НС и Вид отправятся {} испытаний.".format(i))
+        return reinforcement, done
 
     def __finalize(self, tests_left: int) -> None:
         """ Финализация работы блока. """
@@ -254,8 +267,8 @@ class PhysicsThread(IPhysics, AYarn):
         if tests_left > 0:
             # Сохраняем промежуточное состояние.
             #
-            # Сохранить состояния находящиеся в процессе испытаний self.__store
-            save_dict[app_cons.STATES_IN_WORK] = self.__store
+            # Сохранить состояния находящиеся в процессе испытаний
+            save_dict[app_cons.STATES_IN_WORK] = self.__physics.store()
             # Сохранить состояние источника элементов обучающей выборки self.__initial_states
             save_dict[app_cons.INITIAL_STATES] = self.__initial_states
             # Сохранить оставшееся число испытаний в обучающей выборке tests_left
@@ -270,13 +283,28 @@ class PhysicsThread(IPhysics, AYarn):
         self.__environment_storage.save(save_dict)
 
     def _yarn_run(self, *args, **kwargs) -> None:
+        if self.__workers_count > 1:
+            workers: PhysicsWorkers = PhysicsWorkers(self.__workers_count, type(self.__store), self.__finish_criterion,
+                                                     self.__integrator, self.__coast_fast_forward)
+            # Испытания, продолжающиеся после перерыва, делятся между процессами.
+            ongoing: List[TestId] = list(self.__store.all_states().keys())
+            if len(ongoing) > 0:
+                workers.add(self.__store.get_batch(ongoing))
+            self.__physics = workers
+        else:
+            self.__physics = PhysicsShard(self.__store, self.__finish_criterion, self.__integrator,
+                                          self.__coast_fast_forward)
+        try:
+            self.__yarn_loop()
+        finally:
+            if isinstance(self.__physics, PhysicsWorkers):
+                self.__physics.close()
+            self.__physics = None
+
+    def __yarn_loop(self) -> None:
+        """ Основной цикл нити. """
         logger.info('Вход в нить.')
 
-        # Канал для передачи в нейросеть количества запланированных испытаний
-        report_wire = self.__outgoing[AppModulesEnum.NEURO][DataTypeEnum.REMANING_TESTS]
-        # Канал должен быть двусторонним.
-        assert isinstance(report_wire, ReportWire), 'Data wire for remaining tests info should be a ReportWire class.'
-
         # Осталось провести запланированных испытаний.
         tests_left: int = self.__max_tests if self.__birth else self.__tests_left_before_break
 
@@ -284,36 +312,42 @@ class PhysicsThread(IPhysics, AYarn):
         is_env_state_already_saved: bool = False
 
         logger.info("Вход в цикл генерации и передачи состояний изделия.")
-        while tests_left >= 0:
-            # Один проход по этому циклу соответствует одному прогону батча в Блоке Нейросети.
-
-            # Флаг избежания двойного подряд бессмысленного сохранения состояния окр. среды.
-            # is_env_state_saved: bool = False
+        while True:
+            # Один проход по этому циклу соответствует одному запросу шага из Блока Нейросети:
+            # выполнить команды, сохраниться и сменить эпоху (по флагам запроса), ответить следующим батчем.
 
             # Пока ещё есть испытания в планах, цикл работает.
             logger.info("Испытаний в плане: {}".format(tests_left))
 
-            if self.__is_do_app_finish():
+            request: Optional[StepRequestContainer] = self.__step_request(self.__incoming, app_cons.WAIT_TIME,
+                                                                          finish_app_checking, self.__is_do_app_finish)
+            if request is None:
                 # Сохранить состояние и выйти.
                 logger.info("Из БВ поступила команда на завершение нити. Завершаем.")
                 if not is_env_state_already_saved:
                     # Либо проход по циклу первый
                     # Либо в конце предыдущего прохода сохранения НЕ БЫЛО.
                     self.__finalize(tests_left)
-                # self.__finalize(tests_left)
                 return
 
-            # отправляем в нейросеть количество оставшихся по программе испытаний
-            report_wire.send(Container(cargo=tests_left))
-
-            # logger.debug("Испытаний в плане: {}".format(tests_left))
+            ids, batch_size, road, save = request.get()
 
-            # Ждём обязательных распоряжений от БНС
-            while not self.__incoming[AppModulesEnum.NEURO][DataTypeEnum.ENV_ROAD].has_incoming():
-                sleep(app_cons.SLEEP_TIME)
+            # Применение команд нейросети к испытаниям предыдущего батча.
+            reinforcement, done = self.__step(ids, request.unpack())
+            # Завершившиеся испытания выбывают из плана.
+            # |----------------------------tests_left-------------------------------|
+            # |--ongoing_states--|-----------------future_tests---------------------|
+            tests_left -= int(done.sum())
 
-            # Распоряжение получено.
-            road = self.__incoming[AppModulesEnum.NEURO][DataTypeEnum.ENV_ROAD].receive().unpack()
+            is_env_state_already_saved = False
+            match save:
+                case EnvSaveEnum.SAVE_PROCESS_STATE:
+                    # Сохранение состояния.
+                    is_env_state_already_saved = True
+                    self.__finalize(tests_left)
+                case EnvSaveEnum.CONTINUE:
+                    # Сохранение не требуется.
+                    pass
 
             match road:
                 case RoadEnum.START_NEW_AGE:
@@ -322,9 +356,7 @@ class PhysicsThread(IPhysics, AYarn):
                     tests_left = self.__max_tests
                     # Инициализируем новый объект начальных состояний.
                     self.__initial_states = self.__initial_states.__class__(self.__max_tests)
-                    # Заходим на новую эпоху.
                     logger.info("БНС сообщает: Вход в новую эпоху.")
-                    continue
                 case RoadEnum.ALL_AGES_FINISHED:
                     # Команда из БНС: прекращаем обучение (запланированное количество эпох завершилось)
                     logger.info("БНС сообщает: План по эпохам выполнен.")
@@ -332,117 +364,17 @@ class PhysicsThread(IPhysics, AYarn):
                     while not finish_app_checking(self.__incoming):
                         # Ждём до упора команду на завершение приложения.
                         # todo Потенциально опасное место, так как выход из вечного цикла только по команде.
-                        sleep(app_cons.SLEEP_TIME)
+                        wait_incoming(self.__incoming, None, app_cons.WAIT_TIME)
                     logger.info("БВ приказывает: Завершить блок. Завершаем.")
                     break
                 case RoadEnum.CONTINUE:
                     # Продолжаем движение по алгоритму без изменений.
                     pass
 
-            # Просто так. Так как далее по алгоритму переменная не нужна.
-            del road
-
-            # Нейросеть сообщает, какое количество испытаний она готова обработать в этом проходе
-            # Когда осталось 0 испытаний, блок физ. модели либо получит указание на новую эпоху,
-            # либо зависнет в вызове этой функции в ожидании команды на завершение приложения.
-            requested_states_count = self.__get_states_count(self.__incoming, report_wire.get_report_receiver(),
-                                                             app_cons.SLEEP_TIME, finish_app_checking,
-                                                             self.__is_do_app_finish)
-            # logger.debug("НС готова принять состояний: {}".format(requested_states_count))
-
-            assert tests_left >= requested_states_count, \
-                "Ошибка! Количество запрошенных модулем нейросети состояний должно быть МЕНЬШЕ," \
-                "чем количество оставшихся доступных состояний (испытания в работе плюс испытания в генераторе)"
-
-            ga_debug = self.__store.get_amount()
-
-            if requested_states_count <= self.__store.get_amount():
-                # Если запрошенное блоком нейросети количество состояний МЕНЬШЕ,
-                # чем оставшееся после предыдущего прохода по нейросети.
-                self.__states_distribution(self.__outgoing, self.__store.all_states(), BioEnum.ALIVE, requested_states_count)
-                # logger.debug("Отправлено в НС {} испытаний.".format(requested_states_count))
-            else:
-                # Если запрошенное блоком нейросети количество состояний БОЛЬШЕ,
-                # чем оставшееся после предыдущего прохода по нейросети.
-                # Добиваем до нужного количества, генерацией новых состояний.
-                new_states = self.__set_initial_states(requested_states_count - self.__store.get_amount())
-                # Отправляем потребителям инициализированные состояния
-                self.__states_distribution(self.__outgoing, new_states, BioEnum.INIT)
-                as_debug = self.__store.all_states()
-                # И отправляем все оставшиеся имеющиеся состояния потребителям, в т. ч. и модулю нейросети.
-                self.__states_distribution(self.__outgoing, self.__store.all_states(), BioEnum.ALIVE)
-                # logger.debug("Отправлено в НС {} (новых) + {} (старых) испытаний.".
-                #              format(len(new_states), self.__store.get_amount()))
-                # добавляем новые состояния к общему словарю
-                if not self.__store.add_state(states=new_states):
-                    raise KeyError("Any adding test identificators is already in store.")
-
-            # Получение команд из блока нейросети.
-            commands: Dict[TestId, StageControlCommands] = \
-                self.__command_waiting(requested_states_count, self.__incoming,
-                                       app_cons.SLEEP_TIME, finish_app_checking, self.__is_do_app_finish)
-
-            assert len(commands) == requested_states_count, \
-                "Ошибка! Количество полученных из блока нейросети команд - {}, должно быть равно количеству " \
-                "отосланных туда ДЕЙСТВИТЕЛЬНЫХ испытаний - {}.". format(len(commands), requested_states_count)
-
-            # logger.debug("Словарь команд из нейросети: {}".format(commands))
-
-            # Вычитаем из запланированных испытаний те, которые уже в работе.
-            future_tests = tests_left - self.__store.get_amount()
-
-            fin_states: Dict[TestId, RealWorldStageStatusN] = {}
-            # Цикл получения новых состояний (после применения команд нейросети)
-            for key in commands:
-                if self.__store.get_state(key) is None:
-                    # В хранилище испытания с таким Id нет.
-                    raise KeyError("Requested test identificator is not present in store.")
-
-                # Меняем состояния изделия в словаре текущих испытаний на новые (после применения команд)
-                self.__store.update_state(key, Moving.get_new_status(commands[key], self.__store.get_state(key)))
-
-                state = self.__store.get_state(key)
-
-                reinf: ReinforcementValue = self.__get_reinforcement(state, commands[key])
-                container: Container = Container(key, reinf)
-                self.__outgoing[AppModulesEnum.NEURO][DataTypeEnum.REINFORCEMENT].send(deepcopy(container))
-
-                # Если данное испытание подошло к концу, исключаем его из общего словаря.
-                if state is not None and self.__test_end(state):
-                    # Словарь завершённых тестов.
-                    fin_states[key] = state
-                    # Словарь текущих испытаний, очищенный от завершённых испытаний.
-                    self.__store.del_state(key)
-
-            # Так как словарь с испытаниями подчистился от тех испытаний, которые уже завершились.
-            # То приплюсовываем к количеству незапущенных испытаний, количество "живых" испытаний в обработке.
-            # |----------------------------tests_left-------------------------------|
-            # |--ongoing_states--|-----------------future_tests---------------------|
-
-            tests_left = self.__store.get_amount() + future_tests
-
-            # Отправляем в модуль вида завершённые состояния для отображения.
-            for key in fin_states:
-                container: BioContainer = BioContainer(key, BioEnum.FIN, fin_states[key])
-                self.__outgoing[AppModulesEnum.VIEW][DataTypeEnum.STAGE_STATUS].\
-                    send(deepcopy(container))
-
-            # Ожидание команды на сохранение состояния окружающей среды.
-            while not self.__incoming[AppModulesEnum.NEURO][DataTypeEnum.ENV_SAVE].has_incoming():
-                sleep(app_cons.SLEEP_TIME)
-
-            is_env_state_already_saved = False
-
-            # Получение и распаковка команды на сохранение состояния окружающей среды.
-            save = self.__incoming[AppModulesEnum.NEURO][DataTypeEnum.ENV_SAVE].receive().unpack()
-            match save:
-                case EnvSaveEnum.SAVE_PROCESS_STATE:
-                    # Сохранение состояния.
-                    is_env_state_already_saved = True
-                    self.__finalize(tests_left)
-                case EnvSaveEnum.CONTINUE:
-                    # Сохранение не требуется.
-                    pass
+            # Нейросеть сообщает, какое количество испытаний она готова обработать в следующем проходе.
+            # Больше, чем осталось в плане, она получить не может. Когда в плане 0 испытаний - батч пуст, а нейросеть
+            # отвечает указанием на новую эпоху либо на окончание обучения.
+            batch: BatchContainer = self.__next_batch(min(batch_size, tests_left))
 
-            # # Просто так. Так как далее по алгоритму переменная не нужна.
-            # del save
+            self.__outgoing[AppModulesEnum.NEURO][DataTypeEnum.STEP_RESPONSE].send(
+                StepResponseContainer(tests_left, ids, reinforcement, done, batch))
@@ -0,0 +1,329 @@
+""" Физическая модель по частям: испытания делятся между частями, у каждой части своё хранилище, и шаг
+(интервал считывания показаний, перемотка баллистического полёта, интегрирование, окончание испытаний,
+подкрепления) каждая часть считает целиком. Части могут работать в отдельных процессах. """
+from abc import ABC, abstractmethod
+from enum import Enum
+from itertools import islice
+from multiprocessing import get_context
+from multiprocessing.connection import Connection
+from typing import Any, List, Optional, Tuple, Dict, Mapping, Type
+from logging import getLogger
+from torch import Tensor, zeros, cat, tensor, nonzero, int64, set_num_threads
+from app_cons import logger_name
+from app_type import TestId, PHYSICS_DTYPE
+from batch import StatesBatch, StatesView
+from physics_bt import MovingBatch, CheckPeriodBatch, CoastBatch
+from tools_bt import FinishBatch, ReinforcementBatch
+from integrators import IIntegrator
+from states.i_states import IStatesStore
+from structures import RealWorldStageStatusN
+
+logger = getLogger(logger_name + '.workers')
+
+
+class IPhysicsShard(ABC):
+    """ Интерфейс части испытаний физической модели. """
+    @abstractmethod
+    def step(self, ids: List[TestId], jets: Tensor, accuracy: int) -> Tuple[Tensor, Tensor, StatesBatch]:
+        """ Применить команды нейросети к испытаниям: новые состояния, окончание испытаний, подкрепления.
+        Завершившиеся испытания удаляются из хранилища.
+
+        :param ids: Идентификаторы испытаний в порядке строк матрицы команд. Если испытания нет - KeyError.
+        :param jets: Матрица команд на двигатели (N, JETS_WIDTH)
+        :param accuracy: Параметр точности посадки (см. *tools.Reinforcement.accuracy*)
+        :return: Подкрепления (N), флаги завершения испытаний (N) и последние состояния завершившихся испытаний.
+        """
+        ...
+
+    @abstractmethod
+    def add(self, states: StatesBatch) -> None:
+        """ Добавить новые испытания.
+
+        :param states: Батч начальных состояний. Если испытание уже есть - KeyError.
+        """
+        ...
+
+    @abstractmethod
+    def states(self, count: int) -> Mapping[TestId, RealWorldStageStatusN]:
+        """ Текущие состояния испытаний в работе для следующего батча.
+
+        :param count: Сколько испытаний нужно. Если в работе меньше - все.
+        """
+        ...
+
+    @abstractmethod
+    def get_amount(self) -> int:
+        """ Количество испытаний в работе. """
+        ...
+
+    @abstractmethod
+    def store(self) -> IStatesStore:
+        """ Хранилище всех испытаний в работе (для сохранения состояния). """
+        ...
+
+
+class PhysicsShard(IPhysicsShard):
+    """ Часть испытаний над своим хранилищем. Шаг считается в вызывающей нити (процессе). """
+    def __init__(self, store: IStatesStore, finish: FinishBatch, integrator: Optional[IIntegrator] = None,
+                 coast_fast_forward: bool = False):
+        """
+
+        :param store: Хранилище испытаний части.
+        :param finish: Условие окончания испытаний.
+        :param integrator: Метод интегрирования. Если не задан - метод по умолчанию физической модели.
+        :param coast_fast_forward: Перематывать баллистический полёт к ближайшему событию.
+        """
+        self.__store: IStatesStore = store
+        self.__finish: FinishBatch = finish
+        self.__integrator: Optional[IIntegrator] = integrator
+        self.__coast_fast_forward: bool = coast_fast_forward
+
+    def step(self, ids: List[TestId], jets: Tensor, accuracy: int) -> Tuple[Tensor, Tensor, StatesBatch]:
+        if len(ids) == 0:
+            return zeros(0, dtype=PHYSICS_DTYPE), zeros(0, dtype=bool), StatesBatch.empty([])
+
+        # Текущие состояния испытаний в порядке команд.
+        previous_batch: StatesBatch = self.__store.get_batch(ids)
+
+        # Новые состояния всех испытаний (после применения команд нейросети) рассчитываются за один проход.
+        durations: Tensor = CheckPeriodBatch.set_duration(previous_batch)
+        if self.__coast_fast_forward:
+            # Испытания в баллистическом полёте сразу перематываются к ближайшему событию.
+            durations = CoastBatch.fast_forward(jets, previous_batch, durations)
+        new_batch: StatesBatch = MovingBatch.get_new_status(jets, previous_batch, durations, self.__integrator)
+        # Окончание испытаний и подкрепления - для всех испытаний сразу.
+        failed, success = self.__finish.test_end(new_batch, accuracy)
+        reinforcement: Tensor = ReinforcementBatch.get_reinforcement(new_batch, jets, failed, success)
+        done: Tensor = failed | success
+        # Меняем состояния изделия в хранилище на новые (после применения команд)
+        self.__store.update_batch(new_batch)
+
+        # Завершившиеся испытания исключаются из хранилища.
+        rows: List[int] = nonzero(done).squeeze(1).tolist()
+        finished: StatesBatch = StatesBatch([new_batch.ids[row] for row in rows],
+                                            new_batch.data[tensor(rows, dtype=int64)])
+        for test_id in finished.ids:
+            self.__store.del_state(test_id)
+
+        return reinforcement, done, finished
+
+    def add(self, states: StatesBatch) -> None:
+        if not self.__store.add_batch(states):
+            raise KeyError("Any adding test identificators is already in store.")
+
+    def states(self, count: int) -> Mapping[TestId, RealWorldStageStatusN]:
+        return StatesView(self.batch(count))
+
+    def batch(self, count: int) -> StatesBatch:
+        """ Батч первых *count* испытаний в работе, вместе со служебными столбцами. """
+        states: Mapping[TestId, RealWorldStageStatusN] = self.__store.all_states()
+        if isinstance(states, StatesView) and count >= len(states):
+            return states.batch
+        return self.__store.get_batch(list(islice(states.keys(), count)))
+
+    def get_amount(self) -> int:
+        return self.__store.get_amount()
+
+    def store(self) -> IStatesStore:
+        return self.__store
+
+
+class TaskEnum(Enum):
+    """ Задания процессу физической модели. """
+    # Шаг испытаний процесса. Ответ - подкрепления, завершение и завершившиеся испытания.
+    STEP = 0
+    # Новые испытания процесса. Без ответа.
+    ADD = 1
+    # Состояния первых испытаний процесса (для следующего батча или сохранения). Ответ - батч состояний.
+    STATES = 2
+
+
+def worker_loop(connection: Connection, store: IStatesStore, finish: FinishBatch, integrator: Optional[IIntegrator],
+                coast_fast_forward: bool) -> None:
+    """ Цикл процесса физической модели: выполнять задания над своей частью испытаний. Выход - по получении None.
+
+    :param connection: Конец канала связи с основным процессом.
+    :param store: Пустое хранилище испытаний процесса.
+    :param finish: Условие окончания испытаний.
+    :param integrator: Метод интегрирования.
+    :param coast_fast_forward: Перематывать баллистический полёт к ближайшему событию.
+    """
+    # Каждый процесс занимает одно ядро: внутренняя многопоточность torch здесь только мешает.
+    set_num_threads(1)
+    shard: PhysicsShard = PhysicsShard(store, finish, integrator, coast_fast_forward)
+    while True:
+        task: Optional[Tuple] = connection.recv()
+        if task is None:
+            break
+        if task[0] == TaskEnum.STEP:
+            _, ids, jets, accuracy = task
+            connection.send(shard.step(ids, jets, accuracy))
+        elif task[0] == TaskEnum.ADD:
+            shard.add(task[1])
+        elif task[0] == TaskEnum.STATES:
+            connection.send(shard.batch(task[1]))
+    connection.close()
+
+
+class PhysicsWorkers(IPhysicsShard):
+    """ Пул процессов, каждый из которых ведёт свою часть испытаний в своём хранилище и считает её шаг целиком.
+    Состояния испытаний в работе хранятся только в процессах. В процессы уходят команды и начальные состояния
+    новых испытаний, обратно - результаты шага с завершившимися испытаниями и состояния только тех испытаний,
+    которые нужны следующему батчу (или сохранению).
+
+    Если процесс пула аварийно завершился, пул останавливается, а вызов завершается исключением ChildProcessError.
+    """
+    def __init__(self, workers: int, store_type: Type[IStatesStore], finish: FinishBatch,
+                 integrator: Optional[IIntegrator] = None, coast_fast_forward: bool = False):
+        """
+
+        :param workers: Количество процессов.
+        :param store_type: Класс хранилища испытаний (у каждого процесса своё).
+        :param finish: Условие окончания испытаний.
+        :param integrator: Метод интегрирования. Если не задан - метод по умолчанию физической модели.
+        :param coast_fast_forward: Перематывать баллистический полёт к ближайшему событию.
+        """
+        self.__store_type: Type[IStatesStore] = store_type
+        # Процессы запускаются "с нуля", а не копией текущего процесса: в нём работают нити приложения.
+        context = get_context('spawn')
+        self.__connections: List[Connection] = []
+        self.__processes = []
+        for index in range(workers):
+            parent_end, child_end = context.Pipe()
+            process = context.Process(target=worker_loop,
+                                      args=(child_end, store_type(), finish, integrator, coast_fast_forward),
+                                      name='PhysicsWorker-{}'.format(index), daemon=True)
+            process.start()
+            child_end.close()
+            self.__connections.append(parent_end)
+            self.__processes.append(process)
+        # Номер процесса по идентификатору испытания.
+        self.__owner: Dict[TestId, int] = {}
+        # Количество испытаний в работе каждого процесса.
+        self.__loads: List[int] = [0] * workers
+        logger.info('Запущено процессов физической модели: {}'.format(workers))
+
+    def step(self, ids: List[TestId], jets: Tensor, accuracy: int) -> Tuple[Tensor, Tensor, StatesBatch]:
+        # Номера строк команд каждого процесса.
+        positions: List[List[int]] = [[] for _ in self.__connections]
+        for position, test_id in enumerate(ids):
+            positions[self.__owner[test_id]].append(position)
+        involved: List[Tuple[int, Tensor]] = [(worker, tensor(rows, dtype=int64))
+                                              for worker, rows in enumerate(positions) if len(rows) > 0]
+
+        # Сначала раздаются все задания, затем собираются результаты: процессы считают одновременно.
+        for worker, rows in involved:
+            self.__send(worker, (TaskEnum.STEP, [ids[row] for row in rows.tolist()], jets[rows], accuracy))
+
+        reinforcement: Tensor = zeros(len(ids), dtype=PHYSICS_DTYPE)
+        done: Tensor = zeros(len(ids), dtype=bool)
+        finished: List[StatesBatch] = []
+        for worker, rows in involved:
+            part_reinforcement, part_done, part_finished = self.__receive(worker)
+            reinforcement[rows] = part_reinforcement
+            done[rows] = part_done
+            for test_id in part_finished.ids:
+                del self.__owner[test_id]
+            self.__loads[worker] -= len(part_finished)
+            finished.append(part_finished)
+
+        return reinforcement, done, PhysicsWorkers.__join(finished)
+
+    def add(self, states: StatesBatch) -> None:
+        for test_id in states.ids:
+            if test_id in self.__owner:
+                raise KeyError("Test identificator {} is already in store.".format(test_id))
+
+        # Новые испытания достаются наименее загруженным процессам.
+        positions: List[List[int]] = [[] for _ in self.__connections]
+        for position in range(len(states)):
+            worker: int = self.__loads.index(min(self.__loads))
+            positions[worker].append(position)
+            self.__loads[worker] += 1
+
+        for worker, rows in enumerate(positions):
+            if len(rows) == 0:
+                continue
+            part: StatesBatch = StatesBatch([states.ids[row] for row in rows], states.data[tensor(rows, dtype=int64)])
+            self.__send(worker, (TaskEnum.ADD, part))
+            for test_id in part.ids:
+                self.__owner[test_id] = worker
+
+    def states(self, count: int) -> Mapping[TestId, RealWorldStageStatusN]:
+        # Испытания следующего батча берутся у всех процессов поровну (насколько хватает испытаний у каждого),
+        # чтобы на следующем шаге работали все процессы.
+        shares: List[int] = [0] * len(self.__loads)
+        remaining: int = min(count, self.get_amount())
+        while remaining > 0:
+            spare: List[int] = [worker for worker, load in enumerate(self.__loads) if shares[worker] < load]
+            share: int = max(1, remaining // len(spare))
+            for worker in spare[:remaining]:
+                added: int = min(share, self.__loads[worker] - shares[worker], remaining)
+                shares[worker] += added
+                remaining -= added
+        return StatesView(self.__collect(shares))
+
+    def get_amount(self) -> int:
+        return len(self.__owner)
+
+    def store(self) -> IStatesStore:
+        store: IStatesStore = self.__store_type()
+        store.add_batch(self.__collect(self.__loads))
+        return store
+
+    def __collect(self, counts: List[int]) -> StatesBatch:
+        """ Собрать состояния испытаний из процессов.
+
+        :param counts: Сколько первых испытаний взять у каждого процесса.
+        :return: Батч состояний (строки - в порядке процессов).
+        """
+        involved: List[int] = [worker for worker, count in enumerate(counts) if count > 0]
+        for worker in involved:
+            self.__send(worker, (TaskEnum.STATES, counts[worker]))
+        return PhysicsWorkers.__join([self.__receive(worker) for worker in involved])
+
+    def __send(self, worker: int, task: Tuple) -> None:
+        """ Отправить задание процессу. Если процесс завершился аварийно - пул останавливается. """
+        try:
+            self.__connections[worker].send(task)
+        except (BrokenPipeError, EOFError, ConnectionResetError) as error:
+            self.__failed(worker, error)
+
+    def __receive(self, worker: int) -> Any:
+        """ Получить ответ процесса. Если процесс завершился аварийно - пул останавливается. """
+        try:
+            return self.__connections[worker].recv()
+        except (BrokenPipeError, EOFError, ConnectionResetError) as error:
+            self.__failed(worker, error)
+
+    def __failed(self, worker: int, error: Exception) -> None:
+        """ Аварийное завершение процесса пула: остановить пул и сообщить об ошибке вызывающему. """
+        name: str = self.__processes[worker].name
+        logger.error('Процесс физической модели {} завершился аварийно (код {}): {}'
+                     .format(name, self.__processes[worker].exitcode, repr(error)))
+        self.close()
+        raise ChildProcessError('Physics worker {} has died.'.format(name)) from error
+
+    @staticmethod
+    def __join(parts: List[StatesBatch]) -> StatesBatch:
+        """ Объединить батчи в один (строки - в порядке батчей). """
+        if len(parts) == 1:
+            return parts[0]
+        ids: List[TestId] = [test_id for part in parts for test_id in part.ids]
+        if len(ids) == 0:
+            return StatesBatch.empty([])
+        return StatesBatch(ids, cat([part.data for part in parts]))
+
+    def close(self) -> None:
+        """ Завершить процессы пула. """
+        for connection in self.__connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, EOFError, ConnectionResetError):
+                # Процесс уже завершился.
+                pass
+            connection.close()
+        for process in self.__processes:
+            process.join()
+        self.__connections, self.__processes = [], []
+        logger.info('Процессы физической модели завершены.')
@@ -11,7 +11,7 @@
 #           └-> PsevdoArcArrow
 from tkinter import Tk, Canvas, colorchooser, Toplevel, LAST, ARC, N
 from point import VectorComplex
-from decart import pointsListToNewCoordinateSystem
+from decart import complexArrayToNewCoordinateSystem, flatListToComplexArray, complexArrayToFlatList
 from abc import ABC, abstractmethod
 from cmath import rect, pi
 from math import radians
@@ -94,30 +94,18 @@ class AbstractPrimitive(ABC):
         """
         # получить координаты точек объекта в системе координат канвы
         current = self._canvas.coords(self._objOnCanvasId)
-        points = []
-        # Преобразовать координаты точек в объекты типа VectorComplex в СК канвы
-        for i in range(len(self._points)):
-            points.append(VectorComplex.get_instance(current[i * 2], current[i * 2 + 1]))
+        # Все точки примитива пересчитываются разом, как один комплексный массив.
+        points = flatListToComplexArray(current[:len(self._points) * 2])
         # Пересчитать координаты точек объектов из системы канвы в систему центра тяжести
         # (координатные оси сонаправлены)
-        points = pointsListToNewCoordinateSystem(points, self._center)
+        points = complexArrayToNewCoordinateSystem(points, self._center.cardanus)
         # Расчитать новые точки через поворот вокруг центра тяжести
         # Угол поворота из старого положения
-        alpha_complex = VectorComplex.get_instance_c(newAxisVector.cardanus / oldAxisVector.cardanus)
-        # print("Угол поворота: {}, {}".format(phi, alpha_complex.cardanus))
-        # новые координаты точек объекта в системе координат относительно точки поворота
-        new_points = []
-        for value in points:
-            newPoint = VectorComplex.get_instance_c(value.cardanus * alpha_complex.cardanus)
-            new_points.append(newPoint)
+        points = points * (newAxisVector.cardanus / oldAxisVector.cardanus)
         # Новые точки пересчитать обратно в систему координат канвы
-        new_points = pointsListToNewCoordinateSystem(new_points, VectorComplex.get_instance(- self._center.x, - self._center.y))
+        points = complexArrayToNewCoordinateSystem(points, - self._center.cardanus)
         # Обновить координаты точек в объекте (будет произведена автоматическое визуальное изменение)
-        canvas_points = []
-        for value in new_points:
-            canvas_points.append(value.x)
-            canvas_points.append(value.y)
-        self._canvas.coords(self._objOnCanvasId, canvas_points)
+        self._canvas.coords(self._objOnCanvasId, complexArrayToFlatList(points))
 
     @abstractmethod
     def create_on_canvas(self):
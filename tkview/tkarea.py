@@ -1,6 +1,6 @@
 """ Модуль визуализации происходящего с испытуемым объектом. """
 from logging import getLogger
-from app_cons import logger_name, SLEEP_TIME, START_TESTID_FOR_VIEW
+from app_cons import logger_name, SLEEP_TIME, WAIT_TIME, START_TESTID_FOR_VIEW
 from app_type import TestId
 from tkinter import Tk, Canvas
 from typing import Optional, Dict
@@ -10,13 +10,12 @@ from decart import complexChangeSystemCoordinatesUniversal, pointsListToNewCoord
 from tkview.primiteves import StageMark
 from tkview.tkiface import WindowsMSInterface
 from structures import RealWorldStageStatusN
-from time import sleep
 from point import VectorComplex
 from con_intr.ifaces import ISocket, IReceiver, ISender, \
     AppModulesEnum, DataTypeEnum, BioEnum, Inbound, Outbound
 from con_simp.contain import Container, BioContainer
+from con_simp.selector import WireSelector
 from tkview.view_chn import ViewParts, ViewData
-from copy import deepcopy
 from tools import FinishAppBoolWrapper
 
 
@@ -127,18 +126,22 @@ class PoligonWindow(WindowsMSInterface):
         bio: BioEnum = BioEnum.INIT
         while view_state is None:
             # пока не дошли до визуализируемого испытания
-            while not self.__inbound[AppModulesEnum.PHYSICS][DataTypeEnum.STAGE_STATUS].has_incoming():
-                # ожидаем данные из канала связи
-                sleep(SLEEP_TIME)
-                self.__fintest(self.__dispatcher_in, self.__inbound, is_fin_app, is_fin_request)
-                if is_fin_request():
-                    # Если есть запрос на окончание приложения.
-                    # Уменьшаем счётчик ожидания данных из очереди.
-                    dw -= 1
-                    if dw == 0:
-                        # Если счётчик обнулился, прерываем ожидание и завершаем функцию.
-                        # Иными словами, ожидание данных из очереди происходит в течение нескольких периодов сна.
-                        return
+            # ожидаем данные из канала связи (просыпаемся сразу по их поступлении или по запросу на завершение)
+            with WireSelector([self.__inbound[AppModulesEnum.PHYSICS][DataTypeEnum.STAGE_STATUS],
+                               self.__inbound[AppModulesEnum.NEURO][DataTypeEnum.APP_FINISH_REQUEST]]) as selector:
+                while not self.__inbound[AppModulesEnum.PHYSICS][DataTypeEnum.STAGE_STATUS].has_incoming():
+                    # До запроса на завершение спим долго: селектор разбудит по данным или по запросу.
+                    # После запроса ждём последние данные короткими периодами сна.
+                    if len(selector.wait(SLEEP_TIME if is_fin_request() else WAIT_TIME)) > 0:
+                        self.__fintest(self.__dispatcher_in, self.__inbound, is_fin_app, is_fin_request)
+                    if is_fin_request():
+                        # Если есть запрос на окончание приложения.
+                        # Уменьшаем счётчик ожидания данных из очереди.
+                        dw -= 1
+                        if dw == 0:
+                            # Если счётчик обнулился, прерываем ожидание и завершаем функцию.
+                            # Иными словами, ожидание данных из очереди происходит в течение нескольких периодов сна.
+                            return
 
             container = self.__inbound[AppModulesEnum.PHYSICS][DataTypeEnum.STAGE_STATUS].receive()
             assert isinstance(container, BioContainer), "Container class should be a BioContainer. " \
@@ -175,10 +178,11 @@ class PoligonWindow(WindowsMSInterface):
                              format(test_id, bio, state.time_stamp))
 
         # Отсылаем состояние ступени другим визуализаторам этого испытания.
-        container = BioContainer(test_id, bio, view_state)
-        self.__dispatcher_out[ViewParts.AREA][ViewData.STAGE_STATUS].send(deepcopy(container))
-        self.__dispatcher_out[ViewParts.STAGE][ViewData.STAGE_STATUS].send(deepcopy(container))
-        self.__dispatcher_out[ViewParts.INFO][ViewData.STAGE_STATUS].send(deepcopy(container))
+        # Неизменяемый снимок состояния у всех визуализаторов общий.
+        view_state = view_state.snapshot()
+        self.__dispatcher_out[ViewParts.AREA][ViewData.STAGE_STATUS].send(BioContainer(test_id, bio, view_state))
+        self.__dispatcher_out[ViewParts.STAGE][ViewData.STAGE_STATUS].send(BioContainer(test_id, bio, view_state))
+        self.__dispatcher_out[ViewParts.INFO][ViewData.STAGE_STATUS].send(BioContainer(test_id, bio, view_state))
 
     def _draw(self, args):
         # метод для периодического вызова и отрисовки на канве (точка траектории, данные по высоте, тангажу, крену и пр)
@@ -195,31 +199,31 @@ class PoligonWindow(WindowsMSInterface):
 
         # счётчик ожидания данных
         dw: int = data_waiting_max
-        while not self.__area_inbound[ViewParts.DISPATCHER][ViewData.STAGE_STATUS].has_incoming():
-            # Ожидание очередного состояния.
-            sleep(SLEEP_TIME)
-
-            self.__fintest(self.__area_inbound, self.__inbound, is_app_fin, fin_request)
-            if fin_request():
-                # Если есть запрос на завершение приложения
-                # Уменьшить счётчик ожидания данных из очереди.
-                dw -= 1
-                if dw == 0:
-                    # Если счётчик обнулился (то есть, данных из очереди не дождались)
-                    # Отправляем приказ на завершение в другие блоки приложения
-                    self.__send_fin_command()
-                    # Завершаем блок визуализации.
-                    self.__finish_view()
-                    # Выходим из функции отрисовки.
-                    return
-        else:
-            # todo обработать вариант, когда данные в очереди есть, но и запрос на завершение приложения тоже есть.
+        # Ожидание очередного состояния (или запроса на завершение приложения).
+        with WireSelector([self.__area_inbound[ViewParts.DISPATCHER][ViewData.STAGE_STATUS],
+                           self.__inbound[AppModulesEnum.NEURO][DataTypeEnum.APP_FINISH_REQUEST]]) as selector:
+            while not self.__area_inbound[ViewParts.DISPATCHER][ViewData.STAGE_STATUS].has_incoming():
+                if len(selector.wait(SLEEP_TIME if fin_request() else WAIT_TIME)) > 0:
+                    self.__fintest(self.__area_inbound, self.__inbound, is_app_fin, fin_request)
+                if fin_request():
+                    # Если есть запрос на завершение приложения
+                    # Уменьшить счётчик ожидания данных из очереди.
+                    dw -= 1
+                    if dw == 0:
+                        # Если счётчик обнулился (то есть, данных из очереди не дождались)
+                        # Отправляем приказ на завершение в другие блоки приложения
+                        self.__send_fin_command()
+                        # Завершаем блок визуализации.
+                        self.__finish_view()
+                        # Выходим из функции отрисовки.
+                        return
+        # todo обработать вариант, когда данные в очереди есть, но и запрос на завершение приложения тоже есть.
 
-            container = self.__area_inbound[ViewParts.DISPATCHER][ViewData.STAGE_STATUS].receive()
-            assert isinstance(container, BioContainer), "Container class should be a BioContainer. " \
-                                                        "Now: {}".format(container.__class__)
-            test_id, bio = container.get()
-            view_state = container.unpack()
+        container = self.__area_inbound[ViewParts.DISPATCHER][ViewData.STAGE_STATUS].receive()
+        assert isinstance(container, BioContainer), "Container class should be a BioContainer. " \
+                                                    "Now: {}".format(container.__class__)
+        test_id, bio = container.get()
+        view_state = container.unpack()
 
         logger.debug('Положение изделия в СКИП. x: {}, y: {}'.format(view_state.position.x, view_state.position.y))
         # длительность предыдущего статуса изделия
@@ -12,9 +12,10 @@ from structures import RealWorldStageStatusN
 from con_intr.ifaces import ISocket, IReceiver, ISender, BioEnum
 from tkview.view_chn import ViewParts, ViewData
 from time import sleep
-from app_cons import SLEEP_TIME
+from app_cons import SLEEP_TIME, WAIT_TIME
 from app_type import TestId
 from con_simp.contain import BioContainer
+from con_simp.selector import WireSelector
 
 ViewInbound = Dict[ViewParts, Dict[ViewData, IReceiver]]
 ViewOutbound = Dict[ViewParts, Dict[ViewData, ISender]]
@@ -98,20 +99,23 @@ class StageViewWindow(WindowsMSInterface):
         previous_status_duration = 0
 
         # Получение данных для отображения изделия.
-        while not self.__states_in[ViewParts.DISPATCHER][ViewData.STAGE_STATUS].has_incoming():
-            sleep(SLEEP_TIME)
-            if self.__states_in[ViewParts.AREA_WINDOW][ViewData.APP_FINISH].has_incoming():
-                return
-        else:
-            container = self.__states_in[ViewParts.DISPATCHER][ViewData.STAGE_STATUS].receive()
-            assert isinstance(container, BioContainer), "Container class should be a BioContainer. " \
-                                                        "Now: {}".format(container.__class__)
-            test_id, bio = container.get()
-            self.__any_state = container.unpack()
-
-            transform = self.__any_state
-            previous_status_duration = transform.time_stamp - self.__previous_status_time_stamp
-            self.__previous_status_time_stamp = transform.time_stamp
+        with WireSelector([self.__states_in[ViewParts.DISPATCHER][ViewData.STAGE_STATUS],
+                           self.__states_in[ViewParts.AREA_WINDOW][ViewData.APP_FINISH]]) as selector:
+            while not self.__states_in[ViewParts.DISPATCHER][ViewData.STAGE_STATUS].has_incoming():
+                # Селектор будит сразу по данным или по команде на завершение.
+                if len(selector.wait(WAIT_TIME)) > 0 and \
+                        self.__states_in[ViewParts.AREA_WINDOW][ViewData.APP_FINISH].has_incoming():
+                    return
+
+        container = self.__states_in[ViewParts.DISPATCHER][ViewData.STAGE_STATUS].receive()
+        assert isinstance(container, BioContainer), "Container class should be a BioContainer. " \
+                                                    "Now: {}".format(container.__class__)
+        test_id, bio = container.get()
+        self.__any_state = container.unpack()
+
+        transform = self.__any_state
+        previous_status_duration = transform.time_stamp - self.__previous_status_time_stamp
+        self.__previous_status_time_stamp = transform.time_stamp
 
         # Визуализация информации
         while self.__info_view is None:
@@ -133,7 +137,7 @@ class StageViewWindow(WindowsMSInterface):
 
             # Получить данных из канала связи, поставляющего данные в блок визуализации информации.
             # На данном этапе проектирования приложения, этот канал поступления данных не используется.
-            test_id, bio, state = self.__info_view.info_block_data(self.__info_view.data_inbound, SLEEP_TIME)
+            test_id, bio, state = self.__info_view.info_block_data(self.__info_view.data_inbound, WAIT_TIME)
 
         # отрисовка нового положения объектов на основании полученных данных из очереди
         if transform is not None:
@@ -244,31 +248,33 @@ class InfoView:
         """
         self.__data_inbound: ViewInbound = socket.get_in_dict()
 
-    def info_block_data(self, info_in: ViewInbound, sleep_time: float) \
+    def info_block_data(self, info_in: ViewInbound, wait_time: float) \
             -> Optional[Tuple[TestId, BioEnum, RealWorldStageStatusN]]:
         """ Извлечение из канала данных для информационного блока. (Пока данные отсюда не используются)
 
         :param info_in: входные каналы информации
-        :param sleep_time: время сна в ожидании появления даанных
+        :param wait_time: максимальное время сна в ожидании появления данных
         :return: Данные для отображения по текущему испытанию.
         """
         # Ждём установления фактического, реального значения атрибута.
         while len(info_in) == 0:
-            sleep(sleep_time)
+            sleep(SLEEP_TIME)
             if info_in[ViewParts.AREA_WINDOW][ViewData.APP_FINISH].has_incoming():
                 return
 
         # Извлекаем из канала значения данных для информационного блока.
         # В данный момент эти значения не используются, в работу берутся значения из канала данных для
         # визуализации изделия.
-        while not info_in[ViewParts.DISPATCHER][ViewData.STAGE_STATUS].has_incoming():
-            sleep(sleep_time)
-            if info_in[ViewParts.DISPATCHER][ViewData.APP_FINISH].has_incoming():
-                return
-        else:
-            container = info_in[ViewParts.DISPATCHER][ViewData.STAGE_STATUS].receive()
-            test_id, bio = container.get()
-            state = container.unpack()
+        with WireSelector([info_in[ViewParts.DISPATCHER][ViewData.STAGE_STATUS],
+                           info_in[ViewParts.DISPATCHER][ViewData.APP_FINISH]]) as selector:
+            while not info_in[ViewParts.DISPATCHER][ViewData.STAGE_STATUS].has_incoming():
+                if len(selector.wait(wait_time)) > 0 and \
+                        info_in[ViewParts.DISPATCHER][ViewData.APP_FINISH].has_incoming():
+                    return
+
+        container = info_in[ViewParts.DISPATCHER][ViewData.STAGE_STATUS].receive()
+        test_id, bio = container.get()
+        state = container.unpack()
 
         return test_id, bio, state
 
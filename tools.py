@@ -1,12 +1,13 @@
 from point import VectorComplex
-from math import fabs
+from math import fabs, atan2
 from stage import Sizes, BigMap
 from structures import RealWorldStageStatusN, StageControlCommands, ReinforcementValue
-from typing import TypeVar, Dict, AnyStr, List, Optional, Callable, overload
+from typing import TypeVar, Dict, AnyStr, List, Optional, Callable, Tuple, overload
 from enum import Enum
 from app_type import ZeroOne, Bit
 from random import random
-from con_intr.ifaces import Inbound, DataTypeEnum, AppModulesEnum
+from con_intr.ifaces import Inbound, DataTypeEnum, AppModulesEnum, IReceiver
+from con_simp.selector import WireSelector
 import time
 import threading
 import platform
@@ -117,6 +118,11 @@ class Finish:
     def __init__(self):
         pass
 
+    @classmethod
+    def floor(cls) -> float:
+        """ Наименьшая допустимая высота центра масс изделия. Ниже - удар о землю. """
+        return cls.__leg_relative_y - cls.__yEpsilon
+
     @classmethod
     def is_one_test_failed(cls, coord: VectorComplex) -> bool:
         """ Проверка на неблагополучное завершение очередной тренировки
@@ -128,7 +134,7 @@ class Finish:
         # Метод необходим исключительно для того, чтобы одно испытание не длилось вечно
         if fabs(coord.x) * 2 > BigMap.width \
             or coord.y > BigMap.height \
-            or coord.y < cls.__leg_relative_y - cls.__yEpsilon:
+            or coord.y < cls.floor():
             # Если ступень вылетела за пределы испытательного полигона:
             # - ступень вылетела за левую/правую границу полигона
             # - вылетела за верхнюю границу полигона
@@ -161,40 +167,49 @@ class Finish:
         if within(accuracy_dict["dy"], state.position.y) and within(accuracy_dict["dx"], state.position.x):
             if within(accuracy_dict["dVy"], state.velocity.y) and within(accuracy_dict["dVx"], state.velocity.x):
                 if within(accuracy_dict["dAy"], state.acceleration.y) and within(accuracy_dict["dAx"], state.acceleration.x):
-                    if within(accuracy_dict["dPhi"], state.orientation):
+                    # Ориентация проверяется по углу отклонения продольной оси изделия от вертикали.
+                    if within(accuracy_dict["dPhi"], cls.tilt(state.orientation)):
                         if within(accuracy_dict["dW"], state.angular_velocity):
                             if within(accuracy_dict["dE"], state.angular_acceleration):
                                 return True
         return False
 
+    @staticmethod
+    def tilt(orientation: VectorComplex) -> float:
+        """ Угол отклонения продольной оси изделия от вертикали (радианы), против часовой стрелки - положительный.
+
+        :param orientation: единичный вектор ориентации изделия в СКИП
+        """
+        return atan2(-orientation.x, orientation.y)
+
+    # Диапазоны параметров посадки, уже посчитанные для пары (точность, близость).
+    __scopes: Dict[Tuple[int, bool], Dict[AnyStr, Dict[AnyStr, float]]] = {}
+
     @classmethod
     def landing_scope(cls, step: int, close=True)->Dict[AnyStr, Dict[AnyStr, float]]:
         """
-        Диапазоны параметров, в которые должно попасть изделие при штатной посадке
+        Диапазоны параметров, в которые должно попасть изделие при штатной посадке. Считаются один раз для каждой
+        пары аргументов, возвращаемый словарь - общий для всех вызовов и изменяться не должен.
 
         :param step: одно из десяти значений: 0, 1, ..., 9, где 0 - максимальная точность, 9 - минимальная точность
         :param close: если True, выдаём значения высокой точности при нахождении у поверхности, если False - низкой.
         :type close: bool
         :return: Словарь, содержащий границы допустимости вида {'parameter_name': {'min': min_value, 'max': max_value}}
         """
-        def so_far(x: int)->tuple:
-            """ Линейная функция падающая от (9: 100) до (0; 1)
-
-            :return: min - (-1, +1)
-            """
-            value = ((100 - 1) / 9) * x + 1
-            return -value, +value
-
-
-        def so_close(x: int)->tuple:
-            """ Линейная функция, падающая от (9; 1) до (0; 0.01)
+        if (step, close) not in cls.__scopes:
+            cls.__scopes[(step, close)] = cls.__build_scope(step, close)
+        return cls.__scopes[(step, close)]
 
-             :return: min - (-0.01, +0.01)
-             """
-            value = ((1 - 0.01) / 9) * x + 0.01
-            return -value, +value
-
-        result = so_close(step) if close else so_far(step)
+    @classmethod
+    def __build_scope(cls, step: int, close: bool) -> Dict[AnyStr, Dict[AnyStr, float]]:
+        """ Расчёт диапазонов параметров посадки (см. *landing_scope()*) """
+        if close:
+            # Линейная функция, падающая от (9; 1) до (0; 0.01)
+            value = ((1 - 0.01) / 9) * step + 0.01
+        else:
+            # Линейная функция падающая от (9: 100) до (0; 1)
+            value = ((100 - 1) / 9) * step + 1
+        result = (-value, +value)
         # Точность по X в максимуме будет (-5, +5), в минимуме - (-50000. +50000)
         result_x = (result[0] * 500, result[1] * 500)
         # Кооректировка к точности в максимуме будет +0,01, в минимуме +45000
@@ -411,8 +426,26 @@ def finish_app_checking(inbound: Inbound) -> bool:
                     inbound[sender][DataTypeEnum.APP_FINISH].receive()
                     # Возбуждаем исключение завершения приложения.
                     return True
-                else:
-                    return False
+    return False
+
+
+def wait_incoming(inbound: Inbound, receiver: Optional[IReceiver], timeout: Optional[float]) -> bool:
+    """ Ожидание данных в канале или команды на завершение приложения (от любого отправителя). Нить не просыпается
+    периодически, а ждёт события поступления данных.
+
+    :param inbound: Словарь входных каналов блока приложения.
+    :param receiver: Канал, данные из которого ожидаются. None - ожидается только команда на завершение приложения.
+    :param timeout: Максимальное время ожидания, сек. None - без ограничения.
+    :return: В канале *receiver* есть данные?
+    """
+    receivers: List[IReceiver] = [] if receiver is None else [receiver]
+    for channels in inbound.values():
+        if DataTypeEnum.APP_FINISH in channels.keys():
+            receivers.append(channels[DataTypeEnum.APP_FINISH])
+
+    with WireSelector(receivers) as selector:
+        selector.wait(timeout)
+    return receiver is not None and receiver.has_incoming()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,115 @@
+""" Пакетные аналоги классов модуля tools: расчёт для всех испытаний батча за один вызов над тензорами. """
+from typing import Dict, Tuple
+from torch import Tensor, tensor, where, zeros_like, full_like, stack, atan2
+from app_type import PHYSICS_DTYPE
+from batch import StatesBatch, MIN_DISTANCE
+from stage import BigMap
+from tools import Finish
+
+
+class ReinforcementBatch:
+    """
+    Подкрепление для батча испытаний (см. *tools.Reinforcement*). Наименьшее достигнутое расстояние до точки посадки
+    хранится отдельно для каждого испытания - в служебном столбце матрицы состояний, поэтому испытания батча
+    не влияют на подкрепление друг друга.
+    """
+    # Подкрепление за удачную посадку.
+    __success: float = 100.
+    # "Цена" работы двигателей (в порядке столбцов матрицы команд): все одновременно работающие рулевые двигатели
+    # имеют "цену" одного работающего маршевого двигателя.
+    __jets_cost: Tensor = tensor([1.25, 1.25, 1.25, 1.25, 5.], dtype=PHYSICS_DTYPE)
+
+    @classmethod
+    def get_reinforcement(cls, states: StatesBatch, jets: Tensor, failed: Tensor, success: Tensor) -> Tensor:
+        """
+        Подкрепление. Обновляет наименьшее достигнутое расстояние до точки посадки в служебном столбце *states*.
+
+        :param states: Состояния ступеней.
+        :param jets: Матрица команд на двигатели (N, JETS_WIDTH), приведших к состояниям *states*.
+        :param failed: Маска неблагополучно завершившихся испытаний (N)
+        :param success: Маска удачно завершившихся испытаний (N)
+        :return: Подкрепления (N)
+        """
+        distance: Tensor = states.position.norm(dim=1)
+        min_distance: Tensor = states.data[:, MIN_DISTANCE]
+
+        # Подкрепление в процессе посадки - только за позицию ещё ближе, чем была самая близкая.
+        closer: Tensor = ~failed & (distance < min_distance)
+        # Множитель, понижающий подкрепление, в зависимости от включённости двигателей.
+        mult: Tensor = (jets != 0).to(PHYSICS_DTYPE) @ cls.__jets_cost
+        landing: Tensor = where(closer, where(mult == 0, 1., 10. / mult.clamp(min=1.)), zeros_like(mult))
+
+        reinforcement: Tensor = success.to(PHYSICS_DTYPE) * cls.__success + landing
+        reinforcement = where(failed, zeros_like(reinforcement), reinforcement)
+
+        # Фиксируем новое самое близкое расстояние. При завершении испытания - сброс.
+        min_distance = where(closer, distance, min_distance)
+        states.data[:, MIN_DISTANCE] = where(failed | (closer & success), full_like(min_distance, float("inf")),
+                                             min_distance)
+
+        return reinforcement
+
+
+class FinishBatch:
+    """
+    Проверка завершения испытаний батча (см. *tools.Finish*). Диапазоны параметров посадки заранее сведены
+    в тензоры границ, поэтому проверка всего батча - несколько операций над матрицами.
+    """
+    # Параметры посадки в порядке столбцов тензоров границ.
+    __parameters: Tuple[str, ...] = ("dy", "dx", "dVy", "dVx", "dAy", "dAx", "dPhi", "dW", "dE")
+    # Нижние и верхние границы параметров (в порядке __parameters) для каждой пары (точность, близость).
+    __bounds: Dict[Tuple[int, bool], Tuple[Tensor, Tensor]] = {}
+
+    @classmethod
+    def bounds(cls, accuracy: int, close: bool = True) -> Tuple[Tensor, Tensor]:
+        """ Границы параметров посадки.
+
+        :param accuracy: Параметр выбранной точности, 0, 1, 2, ..., 9
+        :param close: Ближний (точный) или дальний (не очень точный) диапазон.
+        :return: Нижние и верхние границы (9), порядок - y, x, vy, vx, ay, ax, угол, угловые скорость и ускорение.
+        """
+        if (accuracy, close) not in cls.__bounds:
+            scope = Finish.landing_scope(accuracy, close)
+            cls.__bounds[(accuracy, close)] = (
+                tensor([scope[name]["min"] for name in cls.__parameters], dtype=PHYSICS_DTYPE),
+                tensor([scope[name]["max"] for name in cls.__parameters], dtype=PHYSICS_DTYPE))
+        return cls.__bounds[(accuracy, close)]
+
+    @classmethod
+    def failed(cls, position: Tensor) -> Tensor:
+        """ Неблагополучно завершившиеся испытания (см. *Finish.is_one_test_failed()*)
+
+        :param position: Положения центров масс изделий в СКИП (N, 2)
+        :return: Маска (N)
+        """
+        return (position[:, 0].abs() * 2 > BigMap.width) | (position[:, 1] > BigMap.height) \
+            | (position[:, 1] < Finish.floor())
+
+    @classmethod
+    def success(cls, states: StatesBatch, accuracy: int, close: bool = True) -> Tensor:
+        """ Удачно завершившиеся испытания (см. *Finish.is_one_test_success()*)
+
+        :param states: Состояния изделий.
+        :param accuracy: Параметр выбранной точности, 0, 1, 2, ..., 9
+        :param close: Ближний (точный) или дальний (не очень точный) диапазон.
+        :return: Маска (N)
+        """
+        low, high = cls.bounds(accuracy, close)
+        orientation: Tensor = states.orientation
+        values: Tensor = stack((states.position[:, 1], states.position[:, 0],
+                                states.velocity[:, 1], states.velocity[:, 0],
+                                states.acceleration[:, 1], states.acceleration[:, 0],
+                                atan2(-orientation[:, 0], orientation[:, 1]),
+                                states.angular_velocity, states.angular_acceleration), dim=1)
+        return ((low < values) & (values < high)).all(dim=1)
+
+    @classmethod
+    def test_end(cls, states: StatesBatch, accuracy: int) -> Tuple[Tensor, Tensor]:
+        """ Проверка на окончание испытаний батча.
+
+        :param states: Новые состояния испытаний.
+        :param accuracy: Параметр выбранной точности, 0, 1, 2, ..., 9
+        :return: Маски неблагополучно и удачно завершившихся испытаний (N). Неудача исключает успех.
+        """
+        failed: Tensor = cls.failed(states.position)
+        return failed, ~failed & cls.success(states, accuracy)
@@ -0,0 +1,119 @@
+""" Пакетное окружение: N испытаний в одном процессе, без нитей и каналов передачи данных. """
+from typing import List, Optional, Tuple
+from torch import Tensor, zeros, nonzero
+from app_type import TestId, PHYSICS_DTYPE
+from batch import StatesBatch, PHYSICS_WIDTH, JETS_WIDTH
+from physics_bt import MovingBatch, CheckPeriodBatch, CoastBatch
+from integrators import IIntegrator
+from states.i_states import IInitStates
+from structures import RealWorldStageStatusN
+from tools import Reinforcement
+from tools_bt import ReinforcementBatch, FinishBatch
+
+
+class VectorEnv:
+    """
+    Окружение для пакета испытаний с интерфейсом *reset()* / *step()*. Предназначено для обучения, проверки
+    и замеров производительности без обмена контейнерами между нитями физической модели и нейросети.
+
+    Состояния всех испытаний хранятся в одной матрице. Завершившееся испытание остаётся в матрице (его строка
+    больше не меняется) до следующего вызова *reset()*, поэтому размеры возвращаемых тензоров постоянны.
+    """
+    def __init__(self, initial_states: IInitStates, finish: Optional[FinishBatch] = None,
+                 integrator: Optional[IIntegrator] = None, coast_fast_forward: bool = True):
+        """
+
+        :param initial_states: Генератор начальных состояний испытаний.
+        :param finish: Условие окончания испытаний. Если не задано - условие по умолчанию.
+        :param integrator: Метод интегрирования. Если не задан - метод по умолчанию физической модели.
+        :param coast_fast_forward: Перематывать баллистический полёт к ближайшему событию.
+        """
+        self.__initial_states: IInitStates = initial_states
+        self.__finish: FinishBatch = FinishBatch() if finish is None else finish
+        self.__integrator: Optional[IIntegrator] = integrator
+        self.__coast_fast_forward: bool = coast_fast_forward
+
+        # Состояния испытаний пакета.
+        self.__states: StatesBatch = StatesBatch.empty([])
+        # Флаги завершения испытаний.
+        self.__done: Tensor = zeros(0, dtype=bool)
+        # Очередной собственный идентификатор для испытаний, которым генератор идентификатор не выдал.
+        self.__next_id: TestId = 0
+
+    @property
+    def ids(self) -> List[TestId]:
+        """ Идентификаторы испытаний в порядке строк возвращаемых тензоров. """
+        return self.__states.ids
+
+    @property
+    def states(self) -> StatesBatch:
+        """ Текущие состояния испытаний пакета. """
+        return self.__states
+
+    @property
+    def done(self) -> Tensor:
+        """ Флаги завершения испытаний (N) """
+        return self.__done.clone()
+
+    def reset(self, n: int) -> Tensor:
+        """ Начать *n* новых испытаний, взяв их начальные состояния из генератора.
+
+        :param n: Количество испытаний в пакете.
+        :return: Наблюдения - матрица физических состояний изделий (n, PHYSICS_WIDTH), столбцы как в batch.py
+        """
+        received: List[Tuple[Optional[TestId], RealWorldStageStatusN]] = []
+        for _ in range(n):
+            test_id, state = self.__initial_states.get_state()
+            assert state is not None, "Initial states generator is exhausted: {} of {} states received."\
+                .format(len(received), n)
+            received.append((test_id, state))
+
+        # Собственные идентификаторы выдаются после всех идентификаторов генератора, чтобы не совпасть с ними.
+        given: List[TestId] = [test_id for test_id, _ in received if test_id is not None]
+        if len(given) > 0:
+            self.__next_id = max(self.__next_id, max(given) + 1)
+
+        ids: List[TestId] = []
+        states: List[RealWorldStageStatusN] = []
+        for test_id, state in received:
+            if test_id is None:
+                test_id = self.__next_id
+                self.__next_id += 1
+            ids.append(test_id)
+            states.append(state)
+
+        self.__states = StatesBatch.from_states(dict(zip(ids, states)))
+        self.__done = zeros(n, dtype=bool)
+
+        return self.__states.data[:, :PHYSICS_WIDTH].clone()
+
+    def step(self, actions: Tensor) -> Tuple[Tensor, Tensor, Tensor]:
+        """ Один шаг всех незавершённых испытаний пакета.
+
+        :param actions: Матрица команд на двигатели (N, JETS_WIDTH) из 0 и 1, порядок столбцов - как в
+        *batch.jets_tensor()*
+        :return: Наблюдения (N, PHYSICS_WIDTH), подкрепления (N), флаги завершения испытаний (N).
+        Для испытаний, завершившихся ранее, подкрепление - 0, наблюдение не меняется.
+        """
+        assert tuple(actions.shape) == (len(self.__states), JETS_WIDTH), \
+            "Actions shape should be {}, but now is {}".format((len(self.__states), JETS_WIDTH), tuple(actions.shape))
+
+        rewards: Tensor = zeros(len(self.__states), dtype=PHYSICS_DTYPE)
+        rows: Tensor = nonzero(~self.__done).squeeze(1)
+        if rows.numel() > 0:
+            jets: Tensor = actions[rows].to(PHYSICS_DTYPE)
+            previous: StatesBatch = StatesBatch([self.__states.ids[row] for row in rows.tolist()],
+                                                self.__states.data[rows])
+
+            durations: Tensor = CheckPeriodBatch.set_duration(previous)
+            if self.__coast_fast_forward:
+                durations = CoastBatch.fast_forward(jets, previous, durations)
+            new: StatesBatch = MovingBatch.get_new_status(jets, previous, durations, self.__integrator)
+
+            failed_mask, success_mask = self.__finish.test_end(new, Reinforcement.accuracy)
+
+            rewards[rows] = ReinforcementBatch.get_reinforcement(new, jets, failed_mask, success_mask)
+            self.__states.data[rows] = new.data
+            self.__done[rows] = failed_mask | success_mask
+
+        return self.__states.data[:, :PHYSICS_WIDTH].clone(), rewards, self.__done.clone()